@@ -0,0 +1,179 @@
+"""
+Out-of-core preprocessing of FreshRetailNet-50K with DuckDB.
+
+Reproduces cells 81 and 94 of data_preprocessing_and_eda.ipynb without loading
+freshretailnet_full.csv into pandas:
+
+    processed_store_product_daily   store × product × day aggregates (~4.5M rows)
+    processed_store_product_params  demand parameters per store × product (~50K rows),
+                                    the historical input of optimization.py
+
+DuckDB reads only the eight columns the queries use (the hourly list columns are never
+parsed), applies --start / --end while scanning, aggregates on all cores and spills to
+--temp-dir once --memory-limit is reached. The daily table is written first and the
+parameters are aggregated from it; with --params-only the daily table stays a subquery
+and is never materialized. Outputs are Parquet (zstd) unless --format csv is given.
+Stage timings and row counts go to telemetry.metrics (preprocess_stage_seconds,
+preprocess_rows_written_total).
+
+Run from the repository root:
+    python -m EDA.preprocess
+    python -m EDA.preprocess --params-only --memory-limit 512MB
+    python -m EDA.preprocess --source large/freshretailnet_full.parquet --format csv
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from telemetry.metrics import count, stage
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BASE_DIR)
+SOURCE_PATH = os.path.join(REPO_DIR, 'large', 'freshretailnet_full.csv')
+DAILY_DIR = os.path.join(REPO_DIR, 'large')
+PARAMS_DIR = os.path.join(REPO_DIR, 'optimization', 'input')
+
+# Cell 81: store × product × day
+DAILY_SQL = """
+SELECT
+    store_id, product_id, city_id,
+    CAST(dt AS DATE)          AS date,
+    sum(sale_amount)          AS demand,
+    avg(stock_hour6_22_cnt)   AS avg_stockout_hours,
+    avg(discount)             AS avg_discount,
+    max(holiday_flag)         AS is_holiday,
+    max(activity_flag)        AS has_promotion
+FROM {source}
+{where}
+GROUP BY store_id, product_id, city_id, CAST(dt AS DATE)
+"""
+
+# Cell 94: per store × product; stddev_samp matches pandas' std (ddof=1)
+PARAMS_SQL = """
+SELECT
+    store_id, product_id, city_id,
+    avg(demand)               AS avg_daily_demand,
+    stddev_samp(demand)       AS demand_std,
+    sum(demand)               AS total_demand,
+    count(demand)             AS num_days,
+    avg(avg_stockout_hours)   AS avg_stockout_hours,
+    avg(avg_discount)         AS avg_discount,
+    avg(is_holiday)           AS holiday_proportion,
+    avg(has_promotion)        AS promotion_proportion
+FROM {daily}
+GROUP BY store_id, product_id, city_id
+ORDER BY store_id, product_id, city_id
+"""
+
+INVENTORY_SEED = 42  # the notebook's np.random.seed for simulated current inventory
+
+
+def connect(memory_limit=None, threads=None, temp_dir=None):
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError("EDA/preprocess.py needs duckdb (pip install duckdb)") from exc
+    con = duckdb.connect()
+    if memory_limit:
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if temp_dir:
+        con.execute(f"SET temp_directory = '{temp_dir}'")
+    return con
+
+
+def source_relation(path):
+    """FROM clause for the raw data: Parquet (file or glob) or CSV."""
+    if path.endswith('.parquet') or os.path.isdir(path):
+        pattern = os.path.join(path, '*.parquet') if os.path.isdir(path) else path
+        return f"read_parquet('{pattern}')"
+    return f"read_csv('{path}', header = true)"
+
+
+def date_filter(start=None, end=None):
+    clauses = []
+    if start:
+        clauses.append(f"CAST(dt AS DATE) >= DATE '{start}'")
+    if end:
+        clauses.append(f"CAST(dt AS DATE) <= DATE '{end}'")
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+
+def daily_query(source, start=None, end=None):
+    return DAILY_SQL.format(source=source_relation(source), where=date_filter(start, end))
+
+
+def copy_options(fmt):
+    return "(FORMAT parquet, COMPRESSION zstd)" if fmt == 'parquet' else "(FORMAT csv, HEADER)"
+
+
+def write_daily(con, source, path, fmt='parquet', start=None, end=None):
+    """Aggregate the raw rows to store × product × day straight into ``path``; returns the row count."""
+    query = daily_query(source, start, end) + "ORDER BY store_id, product_id, city_id, date"
+    con.execute(f"COPY ({query}) TO '{path}' {copy_options(fmt)}")
+    return con.execute(f"SELECT count(*) FROM '{path}'").fetchone()[0]
+
+
+def store_product_params(con, daily):
+    """Per store × product parameters from ``daily`` (a file path or a subquery), as pandas."""
+    relation = f"'{daily}'" if os.path.exists(daily) else f"({daily})"
+    params = con.execute(PARAMS_SQL.format(daily=relation)).df()
+
+    # Remaining columns follow the notebook exactly; 50K rows, so pandas is fine here
+    params['demand_cv'] = (
+        params['demand_std'] / params['avg_daily_demand']
+    ).replace([np.inf, -np.inf], np.nan).fillna(0)
+    rng = np.random.RandomState(INVENTORY_SEED)
+    params['current_inventory'] = (
+        params['avg_daily_demand'] * 7 * (1 + rng.randn(len(params)) * 0.3)
+    ).clip(lower=0)
+    params['inventory_imbalance'] = params['current_inventory'] - params['avg_daily_demand'] * 7
+    return params
+
+
+def write_params(con, params, path, fmt='parquet'):
+    con.register('store_product_params', params)
+    con.execute(f"COPY store_product_params TO '{path}' {copy_options(fmt)}")
+    con.unregister('store_product_params')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default=SOURCE_PATH, help='raw CSV, Parquet file or directory of Parquet files')
+    parser.add_argument('--daily-dir', default=DAILY_DIR)
+    parser.add_argument('--params-dir', default=PARAMS_DIR)
+    parser.add_argument('--format', choices=('parquet', 'csv'), default='parquet')
+    parser.add_argument('--start', help='first date to include (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last date to include (YYYY-MM-DD)')
+    parser.add_argument('--params-only', action='store_true', help='skip writing the daily table')
+    parser.add_argument('--memory-limit', default='1GB', help="DuckDB memory limit, e.g. '512MB'")
+    parser.add_argument('--threads', type=int, default=None, help='default: all cores')
+    parser.add_argument('--temp-dir', default=None, help='spill directory (default: DuckDB temp)')
+    args = parser.parse_args()
+
+    con = connect(args.memory_limit, args.threads, args.temp_dir)
+
+    if args.params_only:
+        daily = daily_query(args.source, args.start, args.end)
+    else:
+        os.makedirs(args.daily_dir, exist_ok=True)
+        daily = os.path.join(args.daily_dir, f'processed_store_product_daily.{args.format}')
+        with stage('daily', prefix='preprocess') as daily_timer:
+            rows = write_daily(con, args.source, daily, args.format, args.start, args.end)
+        count('preprocess_rows_written_total', rows, table='daily')
+        print(f"Store × Product daily data: {rows:,} rows -> {daily} ({daily_timer.elapsed:.1f}s)")
+
+    with stage('params', prefix='preprocess') as params_timer:
+        params = store_product_params(con, daily)
+        os.makedirs(args.params_dir, exist_ok=True)
+        params_path = os.path.join(args.params_dir, f'processed_store_product_params.{args.format}')
+        write_params(con, params, params_path, args.format)
+    count('preprocess_rows_written_total', len(params), table='params')
+    print(f"Store × Product parameters: {len(params):,} rows -> {params_path} ({params_timer.elapsed:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
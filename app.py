@@ -1,17 +1,24 @@
-import json
+import logging
 import subprocess
+import threading
 import time
-import requests
 import streamlit as st
 
-from nlp.intent_classifier import classify_intent, extract_parameters
-from nlp.explanation_engine import build_explanation
+from nlp.cache import data_version, set_data_version
+from nlp.history import ChatHistory
+from nlp.llm_client import ollama_url
+from nlp.pipeline import TurnPipeline, scenario_paths
 from nlp.refiner import refine_explanation
+from telemetry.metrics import export_configured, stage
+
+logger = logging.getLogger("supply_chain_app")
 
 
 def _ping_ollama() -> bool:
     try:
-        r = requests.get("http://localhost:11434/api/tags", timeout=3)
+        import requests
+
+        r = requests.get(ollama_url("/api/tags"), timeout=3)
         return r.status_code == 200
     except Exception:
         return False
@@ -37,6 +44,58 @@ def _ensure_ollama() -> tuple[bool, str]:
             return True, "Ollama started automatically."
     return False, "Ollama started but did not respond in time. Using keyword fallback."
 
+
+class OllamaStatus:
+    """Ollama availability, checked on a background thread so no render waits on it.
+
+    One instance is shared by all sessions (see _ollama_status); ``refresh`` starts a new
+    check unless one is already running, and readers see the last result meanwhile.
+    """
+
+    def __init__(self):
+        self.ok = False
+        self.message = "Checking system status..."
+        self.checking = False
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        with self._lock:
+            if self.checking:
+                return
+            self.checking = True
+        threading.Thread(target=self._check, name="ollama-check", daemon=True).start()
+
+    def _check(self) -> None:
+        try:
+            self.ok, self.message = _ensure_ollama()
+        except Exception as exc:  # never let the status thread die silently
+            self.ok, self.message = False, f"Ollama check failed: {exc}. Using keyword fallback."
+        finally:
+            self.checking = False
+
+
+@st.cache_resource
+def _ollama_status() -> OllamaStatus:
+    status = OllamaStatus()
+    status.refresh()
+    return status
+
+
+TURN_STAGES = ("classify", "build", "refine")
+
+
+def _render_latency(slot, timings: dict) -> None:
+    """Per-stage latency of the last turn; stages the turn skipped show as '–'."""
+    if not timings:
+        slot.caption("No turns yet.")
+        return
+    lines = [
+        f"- {name}: {timings[name] * 1000:,.0f} ms" if name in timings else f"- {name}: –"
+        for name in TURN_STAGES
+    ]
+    lines.append(f"- **total: {sum(timings.values()) * 1000:,.0f} ms**")
+    slot.markdown("\n".join(lines))
+
 st.set_page_config(
     page_title="Supply Chain Analytics",
     page_icon=None,
@@ -174,74 +233,102 @@ INTENT_LABELS = {
     "impact_analysis": "Impact Analysis",
     "list_entities": "Entity List",
     "total_counts": "Summary Metrics",
+    "sensitivity_analysis": "Sensitivity Analysis",
     "out_of_scope": "Out of Scope",
 }
 
 
-def load_json(path: str) -> dict:
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory()
 
 if "last_intent" not in st.session_state:
     st.session_state.last_intent = None
 
-if "ollama_ok" not in st.session_state:
-    st.session_state.ollama_ok = False
-    st.session_state.ollama_msg = "Checking system status..."
+if "turn_latency" not in st.session_state:
+    st.session_state.turn_latency = {}
 
 # Sidebar Controls
 with st.sidebar:
     st.markdown("### Control Panel")
     
     if st.button("Clear Conversation", use_container_width=True):
-        st.session_state.messages = []
+        st.session_state.history.clear()
         st.session_state.last_intent = None
         st.rerun()
 
     st.markdown("---")
     st.markdown("### System Status")
     
-    if "ollama_checked" not in st.session_state:
-        # Check ollama on first load quietly
-        ok, msg = _ensure_ollama()
-        st.session_state.ollama_ok = ok
-        st.session_state.ollama_msg = msg
-        st.session_state.ollama_checked = True
-
-    if st.session_state.ollama_ok:
+    # The first render starts the check in the background; later reruns show its result
+    ollama = _ollama_status()
+    if ollama.checking and not ollama.ok:
+        st.info("Refinement Engine: Checking…\n\n(Deterministic Fallback until ready)")
+        if st.button("Refresh Status", use_container_width=True):
+            st.rerun()
+    elif ollama.ok:
         st.success("Refinement Engine: Online")
     else:
         st.warning("Refinement Engine: Offline\n\n(Using Deterministic Fallback)")
-        st.caption(st.session_state.ollama_msg)
+        st.caption(ollama.message)
         if st.button("Start Engine", use_container_width=True):
-            with st.spinner("Starting engine..."):
-                ok, msg = _ensure_ollama()
-                st.session_state.ollama_ok = ok
-                st.session_state.ollama_msg = msg
-                st.rerun()
+            ollama.refresh()
+            st.rerun()
+
+    st.markdown("---")
+    st.markdown("### Last Turn Latency")
+    latency_slot = st.empty()
+    _render_latency(latency_slot, st.session_state.turn_latency)
 
 AVATAR_USER = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><rect width="100" height="100" fill="#334155" rx="20"/><text x="50" y="65" font-family="sans-serif" font-weight="bold" font-size="50" fill="#f8fafc" text-anchor="middle">U</text></svg>'''
 AVATAR_AI = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><rect width="100" height="100" fill="#0ea5e9" rx="20"/><text x="50" y="65" font-family="sans-serif" font-weight="bold" font-size="50" fill="#f8fafc" text-anchor="middle">AI</text></svg>'''
 
-for msg in st.session_state.messages:
+FALLBACK_NOTE = '<p class="fallback-note">System indicator: LLM refinement unavailable. Displaying root deterministic evaluation.</p>'
+
+history = st.session_state.history
+older_messages, recent_messages = history.split()
+
+# Older turns collapse to one-line summaries so reruns don't re-render their tables
+if older_messages:
+    with st.expander(f"Earlier conversation ({len(older_messages)} messages)"):
+        for msg in older_messages:
+            speaker = "You" if msg["role"] == "user" else "Assistant"
+            st.markdown(f"**{speaker}:** {msg['summary']}")
+
+for msg in recent_messages:
     avatar_val = AVATAR_USER if msg["role"] == "user" else AVATAR_AI
     with st.chat_message(msg["role"], avatar=avatar_val):
-        st.markdown(msg["content"], unsafe_allow_html=True)
+        if msg["role"] == "user":
+            st.markdown(msg["content"])
+            continue
+        if msg["content"]:
+            st.markdown(msg["content"], unsafe_allow_html=True)
+        body = history.body(msg)
+        st.markdown(body if body is not None else f"{msg['summary']}\n\n*(Full answer no longer retained.)*")
+        if msg.get("footer"):
+            st.markdown(msg["footer"], unsafe_allow_html=True)
 
 if prompt := st.chat_input("Ask about transfers, manufacturing, or scenario metrics…"):
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    history.add_user(prompt)
     with st.chat_message("user", avatar=AVATAR_USER):
         st.markdown(prompt)
 
-    with st.chat_message("assistant", avatar=AVATAR_AI):
-        with st.spinner("Classifying intent…"):
-            intent = classify_intent(prompt)
+    # Cached intents and refinements are only valid for the scenario files they came from
+    set_data_version(data_version(scenario_paths(SAMPLE_DATA_DIR)))
 
-        params = extract_parameters(prompt)
+    with st.chat_message("assistant", avatar=AVATAR_AI):
+        turn_latency = {}
+
+        # Classification, data loading and a speculative explanation start together
+        with stage("classify", prefix="nlp") as classify_timer:
+            pipeline = TurnPipeline(prompt, SAMPLE_DATA_DIR)
+            params = pipeline.params
+            with st.spinner("Classifying intent…"):
+                intent, intent_tier = pipeline.intent()
+        turn_latency["classify"] = classify_timer.elapsed
+        logger.info(
+            "classified turn: intent=%s tier=%s elapsed_ms=%.1f",
+            intent, intent_tier, classify_timer.elapsed * 1000,
+        )
 
         # Contextual fallback for follow-up questions
         if intent == "out_of_scope" and st.session_state.last_intent:
@@ -262,11 +349,12 @@ if prompt := st.chat_input("Ask about transfers, manufacturing, or scenario metr
                 "- *\"Explain the transfer recommendations\"*\n"
                 "- *\"Detail the manufacturing decisions\"*\n"
                 "- *\"Provide a high-level scenario summary\"*\n"
-                "- *\"Review the cost impact\"*\n\n"
+                "- *\"Review the cost impact\"*\n"
+                "- *\"What if capacity at store 347 went up by 100 units?\"*\n\n"
                 "Please enter your query below."
             )
             st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            history.add_assistant(response)
         elif intent == "out_of_scope":
             response = (
                 "This query appears to be outside my designated scope. I am calibrated strictly for supply chain "
@@ -277,7 +365,7 @@ if prompt := st.chat_input("Ask about transfers, manufacturing, or scenario metr
                 "- *\"Compare the optimized scenario against the baseline.\"*"
             )
             st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            history.add_assistant(response)
         else:
             has_specifics = any(params.get(k) for k in ["transfer_id", "manufacturing_id", "product_id", "store_id"])
 
@@ -285,14 +373,10 @@ if prompt := st.chat_input("Ask about transfers, manufacturing, or scenario metr
             if has_specifics:
                 badge_html += ' <span class="filter-badge">Specific Filter Applied</span>'
             st.markdown(badge_html, unsafe_allow_html=True)
-            data = {
-                "scenario": load_json(f"{SAMPLE_DATA_DIR}/scenario.json"),
-                "transfers": load_json(f"{SAMPLE_DATA_DIR}/transfer.json"),
-                "manufacturing": load_json(f"{SAMPLE_DATA_DIR}/manufacturing.json"),
-            }
 
-            with st.spinner("Building explanation…"):
-                raw_explanation = build_explanation(intent, data, params)
+            with st.spinner("Building explanation…"), stage("build", prefix="nlp") as build_timer:
+                raw_explanation = pipeline.explanation(intent)
+            turn_latency["build"] = build_timer.elapsed
 
             refined = None
             fallback = False
@@ -307,22 +391,26 @@ if prompt := st.chat_input("Ask about transfers, manufacturing, or scenario metr
                 refined = raw_explanation
             else:
                 try:
-                    with st.spinner("Refining with TinyLlama…"):
+                    with st.spinner("Refining with TinyLlama…"), stage("refine", prefix="nlp") as refine_timer:
                         refined = refine_explanation(raw_explanation, user_question=prompt)
                 except Exception:
                     fallback = True
+                turn_latency["refine"] = refine_timer.elapsed
 
             final_response = refined if refined else raw_explanation
             st.markdown(final_response)
 
-            if fallback:
-                st.markdown(
-                    '<p class="fallback-note">System indicator: LLM refinement unavailable. Displaying root deterministic evaluation.</p>',
-                    unsafe_allow_html=True,
-                )
+            footer = FALLBACK_NOTE if fallback else ""
+            if footer:
+                st.markdown(footer, unsafe_allow_html=True)
 
-            full_display = f"{badge_html}\n\n{final_response}"
-            if fallback:
-                full_display += '\n\n<p class="fallback-note">System indicator: LLM refinement unavailable. Displaying root deterministic evaluation.</p>'
+            history.add_assistant(
+                final_response,
+                header=badge_html,
+                footer=footer,
+                summary=f"[{label}] {prompt}",
+            )
 
-            st.session_state.messages.append({"role": "assistant", "content": full_display})
+    st.session_state.turn_latency = turn_latency
+    _render_latency(latency_slot, turn_latency)
+    export_configured()
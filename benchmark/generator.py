@@ -0,0 +1,151 @@
+"""
+Synthetic optimizer instances shaped like the real inputs.
+
+Writes the four files optimization.load_inputs reads:
+
+    store_supply_params.csv             one row per store, same columns as the EDA output
+    transport_cost_matrix.csv           store × store costs (origin shipping cost × distance factor)
+    processed_store_product_params.csv  store_id, product_id, city_id, avg_daily_demand, demand_std
+    product_forecasts_wide.csv          store_id, product_id, day+1 .. day+7
+
+Stores are grouped into cities around random centroids and the transport matrix follows
+the EDA construction: cost(i→j) = shipping_cost_i × (0.5 + 0.5 × distance / max_distance),
+made symmetric, with a flat SAME_CITY_COST inside a city.
+
+Size knobs:
+    n_stores            stores (the real network has 898)
+    products_per_store  assortment size per store
+    catalog             distinct products; a product is carried by about
+                        n_stores × products_per_store / catalog stores, so transfer arcs
+                        grow as n_stores² × products_per_store / catalog
+    density             fraction of store-product pairs with non-zero forecast demand
+    cost_spread         relative spread of shipping costs across cities (0 = all equal)
+
+Run from the repository root:
+    python -m benchmark.generator --stores 100 --products 200 --out /tmp/bench_instance
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+HORIZON_DAYS = 7
+SAME_CITY_COST = 20.0
+STORES_PER_CITY = 50
+
+# Means of the real store_supply_params.csv columns; generated values scatter around them
+_SUPPLY_MEANS = {
+    'shipping_costs_mean': 459.0, 'shipping_costs_std': 312.7,
+    'lead_time_days_mean': 5.2, 'lead_time_days_std': 4.5,
+    'delay_probability_mean': 0.70, 'delay_probability_std': 0.32,
+    'delivery_time_deviation_mean': 5.19, 'delivery_time_deviation_std': 4.16,
+    'route_risk_level_mean': 6.99, 'disruption_likelihood_score_mean': 0.81,
+    'supplier_reliability_score_mean': 0.50, 'traffic_congestion_level_mean': 5.03,
+    'weather_condition_severity_mean': 0.50, 'warehouse_inventory_level_mean': 300.0,
+}
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * np.arcsin(np.sqrt(a))
+
+
+def estimated_arcs(n_stores, products_per_store, catalog):
+    """Expected transfer arcs: Σ over products of k(k-1), k = stores carrying the product."""
+    k = n_stores * products_per_store / catalog
+    return int(catalog * k * max(k - 1, 0))
+
+
+def generate_instance(n_stores=20, products_per_store=50, catalog=None, density=1.0,
+                      cost_spread=0.03, seed=0):
+    """Return (store_params, transport_matrix, historical, forecast) for one synthetic network."""
+    rng = np.random.default_rng(seed)
+    catalog = catalog or products_per_store * 4
+    if products_per_store > catalog:
+        raise ValueError("products_per_store cannot exceed catalog")
+
+    # Cities and stores
+    n_cities = max(1, -(-n_stores // STORES_PER_CITY))
+    city_lat = rng.uniform(25, 48, n_cities)
+    city_lon = rng.uniform(-123, -70, n_cities)
+    city_shipping = _SUPPLY_MEANS['shipping_costs_mean'] * (1 + cost_spread * rng.standard_normal(n_cities))
+    store_city = np.sort(rng.integers(0, n_cities, n_stores))
+
+    store_params = pd.DataFrame({'store_id': np.arange(n_stores), 'city_id': store_city,
+                                 'geo_cluster': store_city})
+    for col, mean in _SUPPLY_MEANS.items():
+        city_values = mean * (1 + 0.02 * rng.standard_normal(n_cities))
+        store_params[col] = city_values[store_city]
+    store_params['shipping_costs_mean'] = city_shipping[store_city]
+    store_params['centroid_lat'] = city_lat[store_city]
+    store_params['centroid_lon'] = city_lon[store_city]
+    store_params['n_records'] = rng.integers(500, 4500, n_cities)[store_city]
+
+    # Transport matrix, built at city level then expanded to stores
+    distance = _haversine(city_lat[:, None], city_lon[:, None], city_lat[None, :], city_lon[None, :])
+    max_distance = distance.max() or 1.0
+    city_cost = city_shipping[:, None] * (0.5 + 0.5 * distance / max_distance)
+    city_cost = (city_cost + city_cost.T) / 2
+    np.fill_diagonal(city_cost, SAME_CITY_COST)
+    transport_matrix = city_cost[store_city[:, None], store_city[None, :]]
+    np.fill_diagonal(transport_matrix, 0.0)
+
+    # Assortments: each store carries products_per_store distinct products from the catalog
+    products = np.argsort(rng.random((n_stores, catalog)), axis=1)[:, :products_per_store]
+    products.sort(axis=1)
+    store_ids = np.repeat(np.arange(n_stores), products_per_store)
+    product_ids = products.ravel()
+    n_pairs = len(store_ids)
+
+    avg_daily = rng.lognormal(mean=0.5, sigma=0.8, size=n_pairs)
+    avg_daily *= rng.random(n_pairs) < density
+    historical = pd.DataFrame({
+        'store_id': store_ids,
+        'product_id': product_ids,
+        'city_id': store_city[store_ids],
+        'avg_daily_demand': avg_daily,
+        'demand_std': avg_daily * rng.uniform(0.2, 1.0, n_pairs),
+    })
+
+    daily = avg_daily[:, None] * rng.uniform(0.7, 1.3, (n_pairs, HORIZON_DAYS))
+    forecast = pd.DataFrame(np.round(daily, 3), columns=[f'day+{i}' for i in range(1, HORIZON_DAYS + 1)])
+    forecast.insert(0, 'product_id', product_ids)
+    forecast.insert(0, 'store_id', store_ids)
+    return store_params, transport_matrix, historical, forecast
+
+
+def write_instance(out_dir, store_params, transport_matrix, historical, forecast):
+    """Write an instance in the layout optimization.load_inputs expects; returns the forecast path."""
+    os.makedirs(out_dir, exist_ok=True)
+    store_params.to_csv(f'{out_dir}/store_supply_params.csv', index=False)
+    pd.DataFrame(transport_matrix).to_csv(f'{out_dir}/transport_cost_matrix.csv')
+    historical.to_csv(f'{out_dir}/processed_store_product_params.csv', index=False)
+    forecast_path = f'{out_dir}/product_forecasts_wide.csv'
+    forecast.to_csv(forecast_path, index=False)
+    return forecast_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stores', type=int, default=20)
+    parser.add_argument('--products', type=int, default=50, help='products per store')
+    parser.add_argument('--catalog', type=int, default=None, help='distinct products (default: 4 × --products)')
+    parser.add_argument('--density', type=float, default=1.0)
+    parser.add_argument('--cost-spread', type=float, default=0.03)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='output directory')
+    args = parser.parse_args()
+
+    instance = generate_instance(args.stores, args.products, args.catalog, args.density,
+                                 args.cost_spread, args.seed)
+    write_instance(args.out, *instance)
+    catalog = args.catalog or args.products * 4
+    print(f"Wrote {args.stores} stores × {args.products} products "
+          f"(~{estimated_arcs(args.stores, args.products, catalog):,} transfer arcs) to {args.out}/")
+
+
+if __name__ == '__main__':
+    main()
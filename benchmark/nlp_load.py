@@ -0,0 +1,239 @@
+"""
+Load generator for the NLP assistant.
+
+Replays planner questions through the turn path the app and the service share
+(service.store.explain_turn: classify_intent -> build_explanation -> refine_explanation)
+from --concurrency threads, and reports:
+
+    latency      p50 / p95 / p99 / max of whole turns and of each stage
+    throughput   turns per second of wall time
+    tiers        which tier answered the intent (greeting, local, cache, llm, fallback)
+    refine       refined, fallback (the LLM failed and the deterministic text was kept), skipped
+    caches       intent / refine cache hit rates, and the requests that reached the model
+
+By default an in-process benchmark.ollama_mock server answers the LLM calls, so runs
+are reproducible; the mock's latency and failure options are passed through. --host
+targets a running server instead (a real Ollama, or a separately started mock).
+--no-cache turns the intent and refine caches off, so two runs show what caching saves.
+
+Questions are drawn at random (--seed) from a built-in corpus of planner questions
+about nlp/sample_inputs, or from --questions (one per line).
+
+Run from the repository root:
+    python -m benchmark.nlp_load --turns 500 --concurrency 8
+    python -m benchmark.nlp_load --latency-ms 300 --token-ms 20 --error-rate 0.1 --no-cache
+    python -m benchmark.nlp_load --host localhost:11434 --turns 50 --concurrency 2
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmark.ollama_mock import MockOllama
+from benchmark.optimizer import RESULTS_DIR, environment
+from nlp.cache import data_version, intent_cache, refine_cache, set_data_version
+from nlp.llm_client import ollama_url
+from nlp.pipeline import scenario_paths
+from service.store import ScenarioStore, explain_turn
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DATA_DIR = os.path.join(REPO_DIR, "nlp", "sample_inputs")
+PERCENTILES = (50, 95, 99)
+STAGES = ("classify", "build", "refine")
+
+# Clear keyword hits (answered locally), mixed-topic and keyword-free questions (sent to
+# the LLM), ID lookups, greetings and out-of-scope chatter, roughly as planners ask them
+QUESTIONS = [
+    "Why should I transfer product_892 from store_112?",
+    "Explain the transfer recommendations",
+    "What transfers are recommended for store_347?",
+    "Tell me about T001",
+    "Why was T002 recommended?",
+    "Why was product_517 manufactured?",
+    "Detail the manufacturing decisions",
+    "What is behind M001?",
+    "Provide a high-level scenario summary",
+    "How did the optimized scenario compare to the baseline?",
+    "What was the cost impact?",
+    "How much did we save overall?",
+    "How many transfers are there in total?",
+    "How many manufacturing actions do you have?",
+    "What if capacity at store 347 went up by 100 units?",
+    "Which store is the bottleneck?",
+    "Give me the shadow prices",
+    "Why are we moving stock and also producing more of product_892?",
+    "Compare the savings from transfers with the production costs",
+    "What's going on with store_410?",
+    "Anything I should worry about this week?",
+    "Walk me through the plan",
+    "Is the plan good?",
+    "hello",
+    "hey there",
+    "What is the weather today?",
+    "Recommend a good pasta recipe",
+]
+
+
+def percentiles(values) -> dict:
+    if not len(values):
+        return {}
+    values = np.asarray(values) * 1000
+    return {**{f"p{p}_ms": round(float(np.percentile(values, p)), 1) for p in PERCENTILES},
+            "max_ms": round(float(values.max()), 1)}
+
+
+def run_load(questions, data_dir=SAMPLE_DATA_DIR, turns=200, concurrency=4, seed=0, refine=True):
+    """Replay ``turns`` questions at ``concurrency``; returns (per-turn records, wall seconds)."""
+    set_data_version(data_version(scenario_paths(data_dir)))
+    store = ScenarioStore()
+    picks = random.Random(seed).choices(questions, k=turns)
+
+    def turn(prompt):
+        start = time.perf_counter()
+        try:
+            response = explain_turn(prompt, data_dir, store, refine=refine)
+        except Exception as exc:
+            return {"prompt": prompt, "seconds": time.perf_counter() - start, "error": repr(exc)}
+        timings = response["timings"]
+        if "refine" not in timings:
+            refine_result = "skipped"
+        else:
+            refine_result = "refined" if response["refined"] else "fallback"
+        return {"prompt": prompt, "seconds": time.perf_counter() - start, "intent": response["intent"],
+                "tier": response["intent_tier"], "refine": refine_result, "timings": timings}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as pool:
+        records = list(pool.map(turn, picks))
+    return records, time.perf_counter() - start
+
+
+def summarize(records, wall_seconds) -> dict:
+    ok = [r for r in records if "error" not in r]
+
+    def shares(key):
+        counts = {}
+        for r in ok:
+            counts[r[key]] = counts.get(r[key], 0) + 1
+        return {k: {"turns": n, "pct": round(100 * n / len(ok), 1)} for k, n in sorted(counts.items())}
+
+    refine_attempts = sum(r["refine"] != "skipped" for r in ok)
+    refine_fallbacks = sum(r["refine"] == "fallback" for r in ok)
+    llm_tiers = sum(r["tier"] in ("llm", "fallback") for r in ok)
+    return {
+        "turns": len(records),
+        "errors": len(records) - len(ok),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_s": round(len(records) / wall_seconds, 2) if wall_seconds else None,
+        "latency": percentiles([r["seconds"] for r in ok]),
+        "stages": {s: percentiles([r["timings"][s] for r in ok if s in r["timings"]]) for s in STAGES},
+        "tiers": shares("tier"),
+        "refine": shares("refine"),
+        "fallback_rates_pct": {
+            "intent": round(100 * shares("tier").get("fallback", {}).get("turns", 0) / llm_tiers, 1)
+            if llm_tiers else 0.0,
+            "refine": round(100 * refine_fallbacks / refine_attempts, 1) if refine_attempts else 0.0,
+        },
+    }
+
+
+def cache_stats() -> dict:
+    stats = {}
+    for cache in (intent_cache, refine_cache):
+        lookups = cache.hits + cache.semantic_hits + cache.misses
+        stats[cache.name] = {"hits": cache.hits + cache.semantic_hits, "misses": cache.misses,
+                             "hit_rate_pct": round(100 * (cache.hits + cache.semantic_hits) / lookups, 1)
+                             if lookups else None}
+    return stats
+
+
+def _pct_line(groups: dict, key: str) -> str:
+    return ", ".join(f"{name} {record[key]}%" for name, record in groups.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--questions", help="file with one question per line (default: built-in corpus)")
+    parser.add_argument("--data-dir", default=SAMPLE_DATA_DIR, help="scenario JSON directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-refine", action="store_true", help="stop after the deterministic explanation")
+    parser.add_argument("--no-cache", action="store_true", help="turn the intent / refine caches off")
+    parser.add_argument("--timeout", type=float, help="per-request LLM timeout in seconds (OLLAMA_TIMEOUT)")
+    parser.add_argument("--out", help="results JSON (default benchmark/results/nlp_load_<timestamp>.json)")
+    target = parser.add_argument_group("LLM server")
+    target.add_argument("--host", help="use a running server (OLLAMA_HOST form) instead of the in-process mock")
+    target.add_argument("--latency-ms", type=float, default=200.0)
+    target.add_argument("--jitter-ms", type=float, default=50.0)
+    target.add_argument("--token-ms", type=float, default=0.0)
+    target.add_argument("--error-rate", type=float, default=0.0)
+    target.add_argument("--hang-rate", type=float, default=0.0)
+    target.add_argument("--hang-seconds", type=float, default=35.0)
+    target.add_argument("--garbage-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    questions = QUESTIONS
+    if args.questions:
+        with open(args.questions) as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    mock = None
+    if args.host:
+        os.environ["OLLAMA_HOST"] = args.host
+    else:
+        mock = MockOllama(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, token_ms=args.token_ms,
+                          error_rate=args.error_rate, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+                          garbage_rate=args.garbage_rate, seed=args.seed).start()
+        os.environ["OLLAMA_HOST"] = mock.url
+    if args.timeout:
+        os.environ["OLLAMA_TIMEOUT"] = str(args.timeout)
+    if args.no_cache:
+        intent_cache.max_entries = refine_cache.max_entries = 0
+
+    try:
+        records, wall = run_load(questions, args.data_dir, args.turns, args.concurrency, args.seed,
+                                 refine=not args.no_refine)
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    summary = summarize(records, wall)
+    summary["caches"] = cache_stats()
+    if mock is not None:
+        summary["server_requests"] = mock.stats
+
+    latency = summary["latency"]
+    print(f"{summary['turns']} turns at concurrency {args.concurrency} against {ollama_url('')}"
+          f"{' (mock)' if mock else ''}: {summary['throughput_per_s']} turns/s")
+    print(f"  turn     p50 {latency.get('p50_ms')} ms  p95 {latency.get('p95_ms')} ms  p99 {latency.get('p99_ms')} ms")
+    for name, record in summary["stages"].items():
+        if record:
+            print(f"  {name:<8} p50 {record['p50_ms']} ms  p95 {record['p95_ms']} ms  p99 {record['p99_ms']} ms")
+    print(f"  tiers    {_pct_line(summary['tiers'], 'pct')}")
+    print(f"  refine   {_pct_line(summary['refine'], 'pct')}")
+    print(f"  fallback intent {summary['fallback_rates_pct']['intent']}% of LLM calls, "
+          f"refine {summary['fallback_rates_pct']['refine']}% of attempts")
+    print(f"  caches   {_pct_line(summary['caches'], 'hit_rate_pct')}")
+    if summary["errors"]:
+        print(f"  errors   {summary['errors']} turns raised")
+
+    stamp = datetime.now(timezone.utc)
+    out = args.out or os.path.join(RESULTS_DIR, f"nlp_load_{stamp:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"timestamp": stamp.isoformat(), "environment": environment(), "args": vars(args),
+                   "summary": summary}, f, indent=2)
+    print(f"Benchmark results saved to {out}")
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Local stand-in for the Ollama HTTP API, for reproducible NLP latency measurements.
+
+Implements the endpoints nlp/llm_client.py and app.py use:
+
+    GET  /api/tags          the configured model
+    POST /api/chat          intent-classifier prompts get a label, other prompts a paragraph
+    POST /api/embeddings    a hashed bag-of-words vector, so near-duplicate prompts are close
+
+Replies are deterministic. Labels come from the keyword scorer
+(nlp.intent_classifier._keyword_classify). A refiner prompt's reply is the first
+--reply-words words of its DATA TO EXPLAIN block, joined into one paragraph.
+
+Latency is modeled like a local model: --latency-ms (± --jitter-ms, uniform) until the
+first token, then --token-ms per word. With "stream": true the reply is sent as
+newline-delimited JSON chunks, one word each, as Ollama does; otherwise the whole
+reply is sent after the same total time.
+
+Failure injection, drawn per request:
+
+    --error-rate    HTTP 500 after the first-token latency
+    --hang-rate     no answer for --hang-seconds (past llm_client's OLLAMA_TIMEOUT)
+    --garbage-rate  chat content that is not a label or summary (the classifier falls back)
+
+Run from the repository root:
+    python -m benchmark.ollama_mock --port 11435 --latency-ms 400 --token-ms 25 --error-rate 0.05
+    OLLAMA_HOST=127.0.0.1:11435 streamlit run app.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nlp.cache import normalize_prompt
+from nlp.intent_classifier import _keyword_classify
+
+DEFAULT_PORT = 11435
+EMBEDDING_DIM = 64
+GARBAGE_REPLY = "As an AI language model, I think the answer depends on many factors."
+FAULTS = ("error", "hang", "garbage")
+
+_DATA_BLOCK = re.compile(r"DATA TO EXPLAIN:\n(.*?)\n\nSUMMARY PARAGRAPH", re.S)
+
+
+def chat_reply(messages: list[dict], reply_words: int = 80) -> str:
+    """Deterministic reply to the prompts nlp sends: a label or a summary paragraph."""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    if "intent classifier" in system:
+        return _keyword_classify(user)
+    block = _DATA_BLOCK.search(user)
+    words = (block.group(1) if block else user).split()
+    return " ".join(words[:reply_words])
+
+
+def embedding(text: str, dim: int = EMBEDDING_DIM) -> list[float]:
+    """Hashed bag of words: prompts sharing most words have a high cosine similarity."""
+    vector = [0.0] * dim
+    for word in normalize_prompt(text).split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+    return vector
+
+
+class MockOllama:
+    """Threaded mock server; ``start()`` serves on a background thread, ``url`` is its base URL.
+
+    ``stats`` counts requests per endpoint and injected faults.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, model="tinyllama", latency_ms=200.0, jitter_ms=0.0,
+                 token_ms=0.0, error_rate=0.0, hang_rate=0.0, hang_seconds=35.0, garbage_rate=0.0,
+                 reply_words=80, seed=0):
+        self.model = model
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_ms = token_ms
+        self.rates = {"error": error_rate, "hang": hang_rate, "garbage": garbage_rate}
+        self.hang_seconds = hang_seconds
+        self.reply_words = reply_words
+        self.stats = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ollama-mock", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    # --- request model ------------------------------------------------------------
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def draw(self):
+        """(first-token delay in seconds, injected fault or None) for one request."""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            roll = self._random.random()
+        delay = max(self.latency_ms + jitter, 0.0) / 1000
+        for fault in FAULTS:
+            if roll < self.rates[fault]:
+                return delay, fault
+            roll -= self.rates[fault]
+        return delay, None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client-side connection reuse shows up
+    server_version = "ollama-mock"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def mock(self) -> MockOllama:
+        return self.server.mock
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, payload: dict) -> None:
+        line = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            return self._send_json(404, {"error": "not found"})
+        self.mock.record("tags")
+        self._send_json(200, {"models": [{"name": f"{self.mock.model}:latest", "model": f"{self.mock.model}:latest"}]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "invalid JSON"})
+        endpoint = {"/api/chat": "chat", "/api/embeddings": "embeddings"}.get(self.path)
+        if endpoint is None:
+            return self._send_json(404, {"error": "not found"})
+
+        mock = self.mock
+        mock.record(endpoint)
+        delay, fault = mock.draw()
+        if fault:
+            mock.record(f"fault_{fault}")
+        try:
+            if fault == "hang":
+                time.sleep(mock.hang_seconds)
+                return self._send_json(503, {"error": "injected hang"})
+            time.sleep(delay)
+            if fault == "error":
+                return self._send_json(500, {"error": "injected failure"})
+            if endpoint == "embeddings":
+                return self._send_json(200, {"embedding": embedding(request.get("prompt", ""))})
+            content = GARBAGE_REPLY if fault == "garbage" else chat_reply(request.get("messages", []),
+                                                                           mock.reply_words)
+            self._chat(request, content)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and went away
+
+    def _chat(self, request: dict, content: str) -> None:
+        mock = self.mock
+        base = {"model": request.get("model", mock.model)}
+        words = content.split(" ")
+        if not request.get("stream", True):
+            time.sleep(mock.token_ms * len(words) / 1000)
+            return self._send_json(200, {
+                **base, "created_at": _now(), "message": {"role": "assistant", "content": content},
+                "done": True, "done_reason": "stop",
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for k, word in enumerate(words):
+            time.sleep(mock.token_ms / 1000)
+            piece = word if k == 0 else f" {word}"
+            self._chunk({**base, "created_at": _now(), "message": {"role": "assistant", "content": piece},
+                         "done": False})
+        self._chunk({**base, "created_at": _now(), "message": {"role": "assistant", "content": ""},
+                     "done": True, "done_reason": "stop"})
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--model", default="tinyllama")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--token-ms", type=float, default=0.0, help="per generated word")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=35.0)
+    parser.add_argument("--garbage-rate", type=float, default=0.0)
+    parser.add_argument("--reply-words", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockOllama(args.host, args.port, args.model, args.latency_ms, args.jitter_ms, args.token_ms,
+                      args.error_rate, args.hang_rate, args.hang_seconds, args.garbage_rate,
+                      args.reply_words, args.seed)
+    print(f"Mock Ollama on {mock.url} (OLLAMA_HOST={mock.url}); Ctrl-C to stop")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Requests: {mock.stats}")
+
+
+if __name__ == "__main__":
+    main()
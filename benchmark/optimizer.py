@@ -0,0 +1,195 @@
+"""
+Scaling benchmark for the optimization pipeline.
+
+Each size preset gets a synthetic instance (benchmark.generator), written to a scratch
+directory. Then the stages of `python -m optimization.optimization` run and are timed:
+
+    load      read the four input CSVs
+    prepare   prepare_demand (pair table, safety stock)
+    build     build_lookups + build_structure + structure_lp (sparse CSR model)
+    heuristic greedy_plan (optimization/heuristic.py); its cost gap against the LP is
+              recorded, and with --warm-start it is the solver's starting solution
+    solve     solvers.solve with the chosen backend
+    write     write_outputs into the scratch directory; decisions and reason codes are
+              extracted chunk by chunk while the tables and JSON files are written
+
+For every stage the wall time, the tracemalloc peak of Python/NumPy allocations inside
+the stage, and the process peak RSS after it are recorded. The RSS also counts the
+solver's native memory. Results go to one JSON file per run, so runs can be diffed to
+catch regressions.
+
+Run from the repository root:
+    python -m benchmark.optimizer --sizes small medium --solver highs
+    python -m benchmark.optimizer --sizes medium --solver highs --warm-start
+    python -m benchmark.optimizer --sizes xl --max-arcs 20000000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmark.generator import estimated_arcs, generate_instance, write_instance
+from optimization import solvers
+from optimization.heuristic import cost_gap, greedy_plan
+from optimization.lp_model import build_structure, structure_lp
+from optimization.outputs import FORMATS
+from optimization.optimization import (
+    build_lookups, load_inputs, prepare_demand, write_outputs,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# name: (stores, products per store, catalog)
+SIZES = {
+    'small': (20, 50, 200),
+    'medium': (100, 200, 2000),
+    'large': (400, 500, 10000),
+    'xl': (898, 1000, 20000),
+}
+DEFAULT_MAX_ARCS = 50_000_000
+
+
+def _rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+class StageTimer:
+    """Collects per-stage timings and memory peaks; use ``with timer.stage('solve'):``."""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'seconds': round(time.perf_counter() - start, 4)}
+            if self.trace_memory:
+                record['alloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+                tracemalloc.stop()
+            record['rss_peak_mb'] = round(_rss_mb(), 1)
+            self.stages[name] = record
+
+
+def run_instance(n_stores, products_per_store, catalog, backend='highs', density=1.0,
+                 cost_spread=0.03, seed=0, time_limit=300, trace_memory=True,
+                 max_arcs=DEFAULT_MAX_ARCS, output_format='csv', warm_start=False):
+    """Generate one instance and time every pipeline stage; returns a result dict."""
+    result = {
+        'instance': {'stores': n_stores, 'products_per_store': products_per_store, 'catalog': catalog,
+                     'density': density, 'cost_spread': cost_spread, 'seed': seed,
+                     'estimated_arcs': estimated_arcs(n_stores, products_per_store, catalog)},
+        'solver': backend,
+        'output_format': output_format,
+        'warm_start': warm_start,
+    }
+    if result['instance']['estimated_arcs'] > max_arcs:
+        result['status'] = 'skipped: estimated arcs above --max-arcs'
+        return result
+
+    timer = StageTimer(trace_memory)
+    result['stages'] = timer.stages
+    with tempfile.TemporaryDirectory(prefix='optimizer_bench_') as scratch:
+        forecast_path = write_instance(
+            f'{scratch}/input',
+            *generate_instance(n_stores, products_per_store, catalog, density, cost_spread, seed),
+        )
+        try:
+            with timer.stage('load'):
+                forecast, historical, store_params, transport_matrix = load_inputs(forecast_path, f'{scratch}/input')
+            with timer.stage('prepare'):
+                demand_df = prepare_demand(forecast, historical, store_params)
+            with timer.stage('build'):
+                lookups = build_lookups(demand_df, store_params, transport_matrix)
+                structure = build_structure(demand_df, store_params, transport_matrix)
+                lp = structure_lp(structure, lookups['params'])
+            result['model'] = {'pairs': structure['n_pairs'], 'arcs': structure['n_arcs'],
+                               'rows': lp['a'].shape[0], 'columns': lp['a'].shape[1], 'nonzeros': lp['a'].nnz}
+            with timer.stage('heuristic'):
+                plan = greedy_plan(structure, lookups['params'])
+            result['heuristic'] = {'status': plan['status'], 'objective': round(plan['objective'], 2)}
+            with timer.stage('solve'):
+                start = plan['x'] if warm_start and plan['status'] == 'Feasible' else None
+                solved = solvers.solve(lp, backend, time_limit, start=start)
+            result['status'] = solved['status']
+            if solved['x'] is None:
+                return result
+            result['objective'] = round(float(solved['objective']), 2)
+            result['heuristic']['gap_pct'] = round(cost_gap(plan['objective'], solved['objective']), 3)
+            with timer.stage('write'), contextlib.redirect_stdout(None):
+                write_outputs(lookups, structure, solved['x'], f'{scratch}/csv', f'{scratch}/json', output_format)
+        except MemoryError:
+            result['status'] = f'MemoryError after {list(timer.stages)[-1] if timer.stages else "generate"}'
+    result['total_seconds'] = round(sum(s['seconds'] for s in timer.stages.values()), 4)
+    return result
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=SIZES, default=['small', 'medium'])
+    parser.add_argument('--solver', choices=solvers.BACKENDS, default='highs')
+    parser.add_argument('--density', type=float, default=1.0)
+    parser.add_argument('--cost-spread', type=float, default=0.03)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=300)
+    parser.add_argument('--max-arcs', type=int, default=DEFAULT_MAX_ARCS,
+                        help='skip sizes whose estimated transfer arcs exceed this')
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help='record only peak RSS (tracemalloc slows pandas-heavy stages)')
+    parser.add_argument('--output-format', choices=FORMATS, default='csv')
+    parser.add_argument('--warm-start', action='store_true', help='start the solver from the greedy plan')
+    parser.add_argument('--out', default=None, help='results JSON path (default: benchmark/results/)')
+    args = parser.parse_args()
+
+    runs = []
+    for name in args.sizes:
+        n_stores, per_store, catalog = SIZES[name]
+        print(f"[{name}] {n_stores} stores × {per_store} products (catalog {catalog})", flush=True)
+        run = run_instance(n_stores, per_store, catalog, args.solver, args.density, args.cost_spread,
+                           args.seed, args.time_limit, not args.no_tracemalloc, args.max_arcs,
+                           args.output_format, args.warm_start)
+        run['size'] = name
+        runs.append(run)
+        for stage, record in run.get('stages', {}).items():
+            print(f"  {stage:<9} {record['seconds']:>9.3f}s  rss {record['rss_peak_mb']:>8.1f} MB")
+        print(f"  status: {run['status']}")
+        if 'gap_pct' in run.get('heuristic', {}):
+            print(f"  greedy gap: {run['heuristic']['gap_pct']:+.3f}%")
+
+    stamp = datetime.now(timezone.utc)
+    out = args.out or os.path.join(RESULTS_DIR, f"optimizer_{stamp:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({'timestamp': stamp.isoformat(), 'environment': environment(), 'runs': runs}, f, indent=2)
+    print(f"Benchmark results saved to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Startup benchmark: how long the app and the command-line tools take to become usable.
+
+Each target runs in a fresh interpreter with ``python -X importtime``. The wall time of
+the whole process is recorded, and the importtime report (self / cumulative µs per
+module) is parsed so the slowest imports point at the module to blame:
+
+    app-imports   the modules app.py imports at the top (needs streamlit)
+    nlp           the nlp chain app.py pulls in, without streamlit
+    service       service.app (needs fastapi)
+    cli:<name>    `--help` of a command-line entry point; parsing arguments needs every
+                  module-level import, so this is the floor of any short invocation
+
+Targets whose optional dependency is missing are recorded as skipped. Every target runs
+--repeat times and the fastest run is kept, since the first run also pays for the disk
+cache and bytecode compilation. The exit code is 1 when a target is slower than its
+budget (BUDGETS, or --budget for every target), so the check can gate CI.
+
+Run from the repository root:
+    python -m benchmark.startup
+    python -m benchmark.startup --targets cli:optimizer app-imports --budget 1.0
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmark.optimizer import RESULTS_DIR, environment
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NLP_MODULES = 'nlp.cache, nlp.history, nlp.pipeline, nlp.refiner, telemetry.metrics'
+
+# name: interpreter arguments
+TARGETS = {
+    'app-imports': ['-c', f'import streamlit, {NLP_MODULES}'],
+    'nlp': ['-c', f'import {NLP_MODULES}'],
+    'service': ['-c', 'import service.app'],
+    'cli:optimizer': ['-m', 'optimization.optimization', '--help'],
+    'cli:scenarios': ['-m', 'optimization.scenarios', '--help'],
+    'cli:simulation': ['-m', 'optimization.simulation', '--help'],
+    'cli:multiperiod': ['-m', 'optimization.multiperiod', '--help'],
+    'cli:cube': ['-m', 'forecasting.cube', '--help'],
+    'cli:intermittent': ['-m', 'forecasting.intermittent', '--help'],
+    'cli:bench-optimizer': ['-m', 'benchmark.optimizer', '--help'],
+}
+DEFAULT_TARGETS = ['nlp', 'app-imports', 'cli:optimizer', 'cli:scenarios', 'cli:cube']
+# Seconds; optimization.optimization imports pandas / NumPy / SciPy only once it runs
+BUDGETS = {'cli:optimizer': 0.5}
+TOP_IMPORTS = 10
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+MISSING_MODULE = re.compile(r"No module named '([^']+)'")
+
+
+def parse_importtime(stderr):
+    """importtime report -> list of (module, self µs, cumulative µs, depth)."""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def run_target(name, args, repeat=3, top=TOP_IMPORTS):
+    """Fastest of ``repeat`` runs of one target, with its slowest imports."""
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')]))}
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=REPO_DIR, env=env,
+                              capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        if proc.returncode != 0:
+            missing = MISSING_MODULE.search(proc.stderr)
+            if missing:
+                return {'target': name, 'status': f"skipped: {missing.group(1)} not installed"}
+            return {'target': name, 'status': 'error', 'stderr': proc.stderr.strip().splitlines()[-1:]}
+        if best is None or seconds < best[0]:
+            best = (seconds, proc.stderr)
+
+    seconds, stderr = best
+    imports = parse_importtime(stderr)
+    top_level = sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])
+    return {
+        'target': name,
+        'status': 'ok',
+        'command': ' '.join(['python', *args]),
+        'seconds': round(seconds, 3),
+        'import_seconds': round(sum(i[2] for i in top_level) / 1e6, 3),
+        'modules': len(imports),
+        'top_imports': [{'module': m, 'cumulative_ms': round(c / 1e3, 1)} for m, _, c, _ in top_level[:top]],
+        'top_self': [{'module': m, 'self_ms': round(s / 1e3, 1)}
+                     for m, s, _, _ in sorted(imports, key=lambda i: -i[1])[:top]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=DEFAULT_TARGETS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=TOP_IMPORTS, help='slowest imports listed per target')
+    parser.add_argument('--budget', type=float, help='fail when any target takes longer (seconds); '
+                                                     'default: the per-target BUDGETS')
+    parser.add_argument('--out', help='results JSON (default benchmark/results/startup_<timestamp>.json)')
+    args = parser.parse_args()
+
+    runs = []
+    for name in args.targets:
+        run = run_target(name, TARGETS[name], args.repeat, args.top)
+        run['budget_seconds'] = args.budget or BUDGETS.get(name)
+        runs.append(run)
+        if run['status'] != 'ok':
+            print(f"{name:<20} {run['status']}")
+            continue
+        print(f"{name:<20} {run['seconds']:>6.3f}s  imports {run['import_seconds']:.3f}s  {run['modules']} modules")
+        for record in run['top_imports'][:3]:
+            print(f"  {record['module']:<30} {record['cumulative_ms']:>8.1f} ms")
+
+    over = [r['target'] for r in runs
+            if r['status'] == 'ok' and r['budget_seconds'] and r['seconds'] > r['budget_seconds']]
+    stamp = datetime.now(timezone.utc)
+    out = args.out or os.path.join(RESULTS_DIR, f"startup_{stamp:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({'timestamp': stamp.isoformat(), 'environment': environment(), 'over_budget': over,
+                   'runs': runs}, f, indent=2)
+    print(f"Benchmark results saved to {out}")
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Forecast cube: every forecast as one float32 (store × product × horizon) array.
+
+Stores and products get integer indexes (sorted ids); pairs without a forecast are NaN.
+On disk a cube is a directory holding
+
+    manifest.json          version, shape, store_ids, product_ids, data file name, and
+                           the size and mtime of the CSV it was built from (``source``)
+    cube-<version>.npy     the array, in .npy format so readers can memory-map it
+
+``save`` writes the .npy first and then swaps the manifest in with os.replace, so a
+reader sees either the old or the new cube, never a partial one; older data files are
+removed once the new manifest is in place. ``ForecastCube.open`` memory-maps the array
+read-only, so opening costs the manifest read and slicing touches only the pages used.
+At 898 stores × 1,000 products × 7 days the array is about 25 MB.
+
+``is_current`` compares the recorded source with the file on disk, so readers can tell a
+cube built from an older CSV (or with no recorded source) and read the CSV instead.
+
+``build`` reports its stage timings and cube size to telemetry.metrics
+(cube_stage_seconds, cube_rows_loaded_total, cube_size).
+
+Run from the repository root:
+    python -m forecasting.cube build        # from demand-forecast/output/product_forecasts_wide.csv
+    python -m forecasting.cube info
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from telemetry.metrics import count, gauge, stage
+
+HORIZON = 7
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "demand-forecast", "output")
+CUBE_DIR = os.path.join(OUTPUT_DIR, "forecast_cube")
+WIDE_PATH = os.path.join(OUTPUT_DIR, "product_forecasts_wide.csv")
+MANIFEST = "manifest.json"
+DAY_COLUMNS = [f"day+{i}" for i in range(1, HORIZON + 1)]
+
+
+class ForecastCube:
+    """(store, product, horizon) float32 forecasts with id <-> index maps."""
+
+    def __init__(self, values, store_ids, product_ids, version=None, source=None):
+        self.values = values
+        self.store_ids = np.asarray(store_ids)
+        self.product_ids = np.asarray(product_ids)
+        self.version = version
+        self.source = source
+        self._store_index = {int(s): k for k, s in enumerate(self.store_ids)}
+        self._product_index = {int(p): k for k, p in enumerate(self.product_ids)}
+
+    # --- construction -------------------------------------------------------
+
+    @classmethod
+    def from_pairs(cls, store_id, product_id, daily):
+        """Build from aligned arrays: store ids, product ids and a (pairs, horizon) forecast."""
+        store_ids, s_idx = np.unique(np.asarray(store_id), return_inverse=True)
+        product_ids, p_idx = np.unique(np.asarray(product_id), return_inverse=True)
+        daily = np.asarray(daily, dtype=np.float32)
+        values = np.full((len(store_ids), len(product_ids), daily.shape[1]), np.nan, dtype=np.float32)
+        values[s_idx, p_idx] = daily
+        return cls(values, store_ids, product_ids)
+
+    @classmethod
+    def from_wide(cls, wide: pd.DataFrame):
+        """From the product_forecasts_wide.csv layout (store_id, product_id, day+1..day+7)."""
+        return cls.from_pairs(wide["store_id"], wide["product_id"], wide[DAY_COLUMNS].to_numpy())
+
+    @classmethod
+    def from_long(cls, long: pd.DataFrame):
+        """From the product_forecasts.csv layout (horizon_day, forecast_demand, store_id, product_id)."""
+        wide = long.pivot_table(index=["store_id", "product_id"], columns="horizon_day",
+                                values="forecast_demand", aggfunc="mean")
+        return cls.from_pairs(wide.index.get_level_values(0), wide.index.get_level_values(1), wide.to_numpy())
+
+    # --- storage --------------------------------------------------------------
+
+    def save(self, cube_dir=CUBE_DIR, source=None) -> str:
+        """Write atomically (data file, then manifest swap); returns the version stamp.
+
+        ``source`` is the file the cube was built from; its stamp goes in the manifest.
+        """
+        os.makedirs(cube_dir, exist_ok=True)
+        values = np.ascontiguousarray(self.values, dtype=np.float32)
+        digest = hashlib.sha1(values.tobytes()).hexdigest()[:10]
+        version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{digest}"
+        data_file = f"cube-{version}.npy"
+
+        tmp = os.path.join(cube_dir, f".{data_file}.tmp")
+        with open(tmp, "wb") as f:
+            np.lib.format.write_array(f, values)
+        os.replace(tmp, os.path.join(cube_dir, data_file))
+
+        manifest = {
+            "version": version,
+            "data_file": data_file,
+            "dtype": "float32",
+            "shape": list(values.shape),
+            "store_ids": self.store_ids.tolist(),
+            "product_ids": self.product_ids.tolist(),
+            "source": source_stamp(source) if source else None,
+        }
+        tmp = os.path.join(cube_dir, f".{MANIFEST}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(cube_dir, MANIFEST))
+
+        # Readers holding an older memmap keep their (unlinked) file open until they close it
+        for name in os.listdir(cube_dir):
+            if name.startswith("cube-") and name.endswith(".npy") and name != data_file:
+                os.remove(os.path.join(cube_dir, name))
+        self.version = version
+        self.source = manifest["source"]
+        return version
+
+    @classmethod
+    def open(cls, cube_dir=CUBE_DIR, mmap_mode="r"):
+        with open(os.path.join(cube_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+        values = np.load(os.path.join(cube_dir, manifest["data_file"]), mmap_mode=mmap_mode)
+        return cls(values, manifest["store_ids"], manifest["product_ids"], manifest["version"],
+                   manifest.get("source"))
+
+    # --- queries ----------------------------------------------------------------
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def store_index(self, store_id) -> int:
+        return self._store_index[int(store_id)]
+
+    def product_index(self, product_id) -> int:
+        return self._product_index[int(product_id)]
+
+    def get(self, store_id, product_id) -> np.ndarray:
+        """(horizon,) forecast of one pair; NaN when the pair has none."""
+        return self.values[self.store_index(store_id), self.product_index(product_id)]
+
+    def store(self, store_id) -> np.ndarray:
+        """(products, horizon) forecasts of one store, indexed like ``product_ids``."""
+        return self.values[self.store_index(store_id)]
+
+    def product(self, product_id) -> np.ndarray:
+        """(stores, horizon) forecasts of one product, indexed like ``store_ids``."""
+        return self.values[:, self.product_index(product_id)]
+
+    def horizon(self, day: int) -> np.ndarray:
+        """(stores, products) forecasts for horizon day ``day`` (1-based)."""
+        return self.values[:, :, day - 1]
+
+    def totals(self, days: int = None) -> np.ndarray:
+        """(stores, products) demand summed over the first ``days`` horizon days (default all)."""
+        return self.values[:, :, :days].sum(axis=2)
+
+    def pairs(self):
+        """(store_idx, product_idx) of the pairs that have a forecast."""
+        return np.nonzero(~np.isnan(self.values[:, :, 0]))
+
+    def pair_frame(self, total_days: int = None) -> pd.DataFrame:
+        """The wide layout read slice by slice: ids and one float column per ``horizon`` day.
+
+        Each day column is gathered from its horizon slice, so the memory map is never
+        copied whole; with ``total_days`` a ``total`` column holds ``totals(total_days)``.
+        """
+        s_idx, p_idx = self.pairs()
+        frame = pd.DataFrame({"store_id": self.store_ids[s_idx], "product_id": self.product_ids[p_idx]})
+        for day in range(1, self.shape[2] + 1):
+            frame[f"day+{day}"] = self.horizon(day)[s_idx, p_idx].astype(float)
+        if total_days:
+            frame["total"] = self.totals(total_days)[s_idx, p_idx].astype(float)
+        return frame
+
+    def to_wide(self) -> pd.DataFrame:
+        """The product_forecasts_wide.csv layout, for pairs that have a forecast."""
+        s_idx, p_idx = self.pairs()
+        wide = pd.DataFrame(self.values[s_idx, p_idx].astype(float),
+                            columns=[f"day+{i}" for i in range(1, self.shape[2] + 1)])
+        wide.insert(0, "product_id", self.product_ids[p_idx])
+        wide.insert(0, "store_id", self.store_ids[s_idx])
+        return wide
+
+
+def source_stamp(path) -> dict:
+    """Name, size and mtime of a cube's source file, as recorded in the manifest."""
+    stat = os.stat(path)
+    return {"file": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_current(cube_dir=CUBE_DIR, source=WIDE_PATH) -> bool:
+    """Whether the cube in ``cube_dir`` was built from ``source`` as it is on disk now.
+
+    A cube whose manifest records no source is not current; a missing ``source`` leaves
+    the cube as the only copy, so it is.
+    """
+    if not os.path.exists(source):
+        return True
+    with open(os.path.join(cube_dir, MANIFEST)) as f:
+        recorded = json.load(f).get("source")
+    return recorded is not None and recorded == source_stamp(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("build", "info"))
+    parser.add_argument("--wide", default=WIDE_PATH, help="product_forecasts_wide.csv to build from")
+    parser.add_argument("--cube-dir", default=CUBE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with stage("read", prefix="cube"):
+            wide = pd.read_csv(args.wide)
+        count("cube_rows_loaded_total", len(wide))
+        with stage("build", prefix="cube"):
+            cube = ForecastCube.from_wide(wide)
+        with stage("save", prefix="cube"):
+            version = cube.save(args.cube_dir, source=args.wide)
+        gauge("cube_size", len(wide), dimension="pairs")
+        gauge("cube_size", cube.values.nbytes, dimension="bytes")
+        print(f"Forecast cube {version}: {cube.shape} -> {args.cube_dir}/")
+    else:
+        cube = ForecastCube.open(args.cube_dir)
+        s_idx, _ = cube.pairs()
+        print(f"Version:  {cube.version}")
+        print(f"Shape:    {cube.shape} (stores × products × horizon), {cube.values.nbytes / 1e6:.1f} MB")
+        print(f"Pairs:    {len(s_idx):,} with forecasts")
+        if cube.source:
+            state = "current" if is_current(args.cube_dir, args.wide) else "stale, rebuild"
+            print(f"Source:   {cube.source['file']} ({state})")
+        else:
+            print("Source:   not recorded, rebuild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Intermittent-demand forecasts for the long tail, vectorized across all series.
+
+The notebook fits a RandomForest per series for the top 50 products of each store; the
+rest of the catalog is too sparse or too short for it. Here every store-product series
+is one row of a (series, days) matrix and the classic estimators run as NumPy updates
+over the time axis, for all rows at once:
+
+    croston  demand size z and inter-demand interval p, both smoothed when demand occurs;
+             forecast z / p
+    sba      Syntetos-Boylan approximation, croston × (1 - alpha / 2) to remove its bias
+    tsb      Teunter-Syntetos-Babai: size z smoothed on demand days, demand probability
+             smoothed every day; forecast probability × z (decays for dying products)
+
+``full_catalog`` keeps the RandomForest forecasts for the head pairs and fills every other
+pair from the chosen estimator, in the product_forecasts_wide.csv layout with a ``model``
+column, so the optimizer takes it like the head-only file. Stage timings and row counts
+go to telemetry.metrics (intermittent_stage_seconds, intermittent_*_total).
+
+Run from the repository root (input from EDA/preprocess.py):
+    python -m forecasting.intermittent --method sba
+    python -m forecasting.intermittent --method tsb --daily large/processed_store_product_daily.csv --cube
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecasting.cube import DAY_COLUMNS, HORIZON, OUTPUT_DIR, WIDE_PATH, ForecastCube
+from telemetry.metrics import count, stage
+
+METHODS = ("croston", "sba", "tsb")
+ALPHA = 0.1
+BETA = 0.1
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAILY_PATH = os.path.join(REPO_DIR, "large", "processed_store_product_daily.parquet")
+FULL_WIDE_PATH = os.path.join(OUTPUT_DIR, "product_forecasts_full_wide.csv")
+FULL_CUBE_DIR = os.path.join(OUTPUT_DIR, "forecast_cube_full")
+
+
+def demand_matrix(daily: pd.DataFrame):
+    """Long store × product × day table -> (keys, (series, days) float32 matrix); missing days are 0."""
+    pairs = daily[["store_id", "product_id"]]
+    series = pairs.groupby(["store_id", "product_id"], sort=True).ngroup().to_numpy()
+    keys = pairs.drop_duplicates().sort_values(["store_id", "product_id"], ignore_index=True)
+    day, dates = pd.factorize(daily["date"], sort=True)
+    matrix = np.zeros((len(keys), len(dates)), dtype=np.float32)
+    np.add.at(matrix, (series, day), daily["demand"].to_numpy(dtype=np.float32))
+    return keys, matrix
+
+
+def croston(demand: np.ndarray, alpha: float = ALPHA, variant: str = "croston") -> np.ndarray:
+    """Per-series Croston (or SBA with ``variant='sba'``) demand rate for a (series, days) matrix."""
+    n_series, n_days = demand.shape
+    size = np.full(n_series, np.nan, dtype=np.float32)
+    interval = np.full(n_series, np.nan, dtype=np.float32)
+    since = np.ones(n_series, dtype=np.float32)  # periods since the last demand, this one included
+
+    for t in range(n_days):
+        y = demand[:, t]
+        hit = y > 0
+        first = hit & np.isnan(size)
+        update = hit & ~first
+        # The first demand initializes the estimates, later ones smooth them
+        size[first], interval[first] = y[first], since[first]
+        size[update] += alpha * (y[update] - size[update])
+        interval[update] += alpha * (since[update] - interval[update])
+        since = np.where(hit, 1, since + 1)
+
+    rate = np.nan_to_num(size / interval)  # series that never sold forecast 0
+    if variant == "sba":
+        rate *= 1 - alpha / 2
+    return rate
+
+
+def tsb(demand: np.ndarray, alpha: float = ALPHA, beta: float = BETA) -> np.ndarray:
+    """Per-series TSB demand rate for a (series, days) matrix."""
+    hit = demand > 0
+    n_hits = hit.sum(axis=1)
+    # Start from the whole-history occurrence rate and mean size, then smooth forward
+    probability = (n_hits / demand.shape[1]).astype(np.float32)
+    size = np.divide(demand.sum(axis=1), n_hits, out=np.zeros(len(demand), dtype=np.float32), where=n_hits > 0)
+
+    for t in range(demand.shape[1]):
+        y, h = demand[:, t], hit[:, t]
+        probability += beta * (h - probability)
+        size[h] += alpha * (y[h] - size[h])
+    return probability * size
+
+
+def forecast_rates(demand: np.ndarray, method: str = "sba", alpha: float = ALPHA, beta: float = BETA):
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+    if method == "tsb":
+        return tsb(demand, alpha, beta)
+    return croston(demand, alpha, method)
+
+
+def full_catalog(daily: pd.DataFrame, head_wide: pd.DataFrame = None, method: str = "sba",
+                 alpha: float = ALPHA, beta: float = BETA, horizon: int = HORIZON) -> pd.DataFrame:
+    """Wide forecasts for every store-product in ``daily``; pairs in ``head_wide`` keep their model."""
+    keys, demand = demand_matrix(daily)
+    rates = forecast_rates(demand, method, alpha, beta)
+    # The estimators are level forecasts: the same rate for every horizon day
+    wide = keys.assign(**{col: rates.round(3) for col in DAY_COLUMNS[:horizon]}, model=method)
+
+    if head_wide is not None:
+        head = head_wide[["store_id", "product_id", *DAY_COLUMNS[:horizon]]].assign(model="random_forest")
+        in_head = pd.MultiIndex.from_frame(wide[["store_id", "product_id"]]).isin(
+            pd.MultiIndex.from_frame(head[["store_id", "product_id"]]))
+        wide = pd.concat([head, wide[~in_head]], ignore_index=True)
+    return wide.sort_values(["store_id", "product_id"], ignore_index=True)
+
+
+def load_daily(path: str) -> pd.DataFrame:
+    columns = ["store_id", "product_id", "date", "demand"]
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--daily", default=DAILY_PATH, help="processed_store_product_daily (.parquet or .csv)")
+    parser.add_argument("--head", default=WIDE_PATH, help="RandomForest forecasts to keep (wide CSV); '' for none")
+    parser.add_argument("--method", choices=METHODS, default="sba")
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="size / interval smoothing")
+    parser.add_argument("--beta", type=float, default=BETA, help="TSB probability smoothing")
+    parser.add_argument("--out", default=FULL_WIDE_PATH)
+    parser.add_argument("--cube", action="store_true", help=f"also write a forecast cube to {FULL_CUBE_DIR}")
+    args = parser.parse_args()
+
+    with stage("load", prefix="intermittent") as load_timer:
+        daily = load_daily(args.daily)
+        head_wide = pd.read_csv(args.head) if args.head else None
+    count("intermittent_rows_loaded_total", len(daily), table="daily")
+    with stage("forecast", prefix="intermittent") as forecast_timer:
+        wide = full_catalog(daily, head_wide, args.method, args.alpha, args.beta)
+    with stage("write", prefix="intermittent") as write_timer:
+        wide.to_csv(args.out, index=False)
+
+    counts = wide["model"].value_counts()
+    for model, n in counts.items():
+        count("intermittent_pairs_written_total", n, model=model)
+    seconds = load_timer.elapsed + forecast_timer.elapsed + write_timer.elapsed
+    print(f"Full catalog: {len(wide):,} store-product pairs "
+          f"({', '.join(f'{n:,} {m}' for m, n in counts.items())}) in {seconds:.1f}s")
+    print(f"Saved to {args.out}")
+    if args.cube:
+        with stage("cube", prefix="intermittent"):
+            version = ForecastCube.from_wide(wide).save(FULL_CUBE_DIR, source=args.out)
+        print(f"Forecast cube {version} -> {FULL_CUBE_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Quantile demand forecasts from the per-tree predictions of the forecasting forests.
+
+The notebook (demand-forecast/Demand_prediction_V3_AsifKhan.ipynb) fits one
+RandomForestRegressor per store-product and rolls it forward 7 days, feeding each day's
+mean prediction back in as lag / rolling-mean features. ``forecast_with_trees`` runs the
+same recursion but keeps every tree's prediction at every step, an empirical predictive
+distribution, at no extra cost: a forest's mean is exactly the average of its trees.
+
+The per-series arrays are stacked into one (series, horizon, trees) array and reduced
+with a single np.quantile call, so all series are summarized at once:
+
+    product_forecast_quantiles.csv     store_id, product_id, horizon_day, mean, p50, p90, p95
+    product_forecast_quantiles_7d.csv  store_id, product_id, mean_7d, p50_7d, p90_7d, p95_7d
+
+The 7-day columns are quantiles over trees of each tree's 7-day total, not sums of
+daily quantiles. optimization.py --target-quantile reads the 7-day file to set target
+inventory directly from a quantile instead of demand + z × σ safety stock.
+save_quantiles reports its stage timings and series count to telemetry.metrics
+(quantiles_stage_seconds, quantiles_series_total).
+"""
+
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from telemetry.metrics import count, stage
+
+QUANTILES = (0.5, 0.9, 0.95)
+HORIZON = 7
+EXO_COLS = ["discount", "holiday_flag", "activity_flag", "precpt",
+            "avg_temperature", "avg_humidity", "avg_wind_level"]
+
+FORECAST_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "demand-forecast", "output")
+DAILY_FILE = "product_forecast_quantiles.csv"
+TOTAL_FILE = "product_forecast_quantiles_7d.csv"
+
+
+def quantile_name(q: float) -> str:
+    """0.9 -> 'p90', 0.95 -> 'p95'."""
+    return f"p{round(q * 100):d}"
+
+
+def tree_predictions(model, X) -> np.ndarray:
+    """(rows, trees) predictions of every tree of a fitted forest."""
+    # Validated once here instead of once per tree
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    return np.stack([tree.predict(X, check_input=False) for tree in model.estimators_], axis=-1)
+
+
+def forecast_with_trees(model, dfm: pd.DataFrame, features: list[str], horizon: int = HORIZON):
+    """Recursive ``horizon``-day forecast as in the notebook, keeping per-tree predictions.
+
+    Returns (forecast, tree_paths): the notebook's forecast frame (horizon_day, date,
+    forecast_demand) and a (horizon, trees) array.
+    """
+    demand = dfm["demand"].tolist()
+    last_dt = dfm["dt"].max()
+    future_dates = [last_dt + timedelta(days=i) for i in range(1, horizon + 1)]
+    recent = dfm.tail(7)
+    exo_future = {c: float(recent[c].mean()) for c in EXO_COLS}
+
+    paths = []
+    for d in future_dates:
+        row = {
+            "dayofweek": d.dayofweek,
+            "month": d.month,
+            **exo_future,
+            "lag_1": demand[-1],
+            "lag_7": demand[-7],
+            "roll_7_mean": np.mean(demand[-7:]),
+            "roll_14_mean": np.mean(demand[-14:]),
+        }
+        trees = tree_predictions(model, [[row[f] for f in features]])[0]
+        paths.append(trees)
+        demand.append(float(trees.mean()))
+
+    forecast = pd.DataFrame({
+        "horizon_day": range(1, horizon + 1),
+        "date": future_dates,
+        "forecast_demand": demand[-horizon:],
+    })
+    return forecast, np.stack(paths)
+
+
+def quantile_tables(keys: pd.DataFrame, tree_paths, quantiles=QUANTILES):
+    """Per-day and 7-day quantile tables for stacked tree paths.
+
+    ``keys`` holds store_id / product_id, one row per series; ``tree_paths`` is a
+    (series, horizon, trees) array or a list of (horizon, trees) arrays in the same order.
+    """
+    paths = np.stack(tree_paths) if isinstance(tree_paths, list) else np.asarray(tree_paths)
+    n_series, horizon, _ = paths.shape
+    names = [quantile_name(q) for q in quantiles]
+
+    daily_q = np.quantile(paths, quantiles, axis=-1)          # (q, series, horizon)
+    daily = pd.DataFrame({
+        "store_id": np.repeat(keys["store_id"].to_numpy(), horizon),
+        "product_id": np.repeat(keys["product_id"].to_numpy(), horizon),
+        "horizon_day": np.tile(np.arange(1, horizon + 1), n_series),
+        "mean": paths.mean(axis=-1).ravel(),
+        **{name: daily_q[k].ravel() for k, name in enumerate(names)},
+    })
+
+    totals = paths.sum(axis=1)                                  # (series, trees)
+    total_q = np.quantile(totals, quantiles, axis=-1)           # (q, series)
+    total = pd.DataFrame({
+        "store_id": keys["store_id"].to_numpy(),
+        "product_id": keys["product_id"].to_numpy(),
+        f"mean_{horizon}d": totals.mean(axis=-1),
+        **{f"{name}_{horizon}d": total_q[k] for k, name in enumerate(names)},
+    })
+    return daily.round(3), total.round(3)
+
+
+def save_quantiles(keys, tree_paths, output_dir=FORECAST_DIR, quantiles=QUANTILES):
+    with stage("reduce", prefix="quantiles"):
+        daily, total = quantile_tables(keys, tree_paths, quantiles)
+    count("quantiles_series_total", len(total))
+    with stage("write", prefix="quantiles"):
+        os.makedirs(output_dir, exist_ok=True)
+        daily.to_csv(os.path.join(output_dir, DAILY_FILE), index=False)
+        total.to_csv(os.path.join(output_dir, TOTAL_FILE), index=False)
+    return daily, total
@@ -0,0 +1,148 @@
+"""Bounded caches for LLM results so repeated questions skip the Ollama round-trip.
+
+Two module-level caches are shared by the classifier and the refiner:
+
+- ``intent_cache``: intent labels keyed by normalized prompt text, with an optional
+  embedding-similarity tier for near-duplicate questions.
+- ``refine_cache``: refined paragraphs keyed by a hash of ``raw_explanation``.
+
+Both are tied to a data version (see ``data_version``); when the scenario files
+change, ``set_data_version`` drops every cached entry.
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from telemetry.metrics import count
+
+DEFAULT_MAX_ENTRIES = 256
+SEMANTIC_THRESHOLD = 0.92
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so trivial rewordings share a key."""
+    return " ".join(re.findall(r"[a-z0-9_]+", text.lower()))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def data_version(paths: list[str]) -> tuple:
+    """Fingerprint of the scenario files (path, mtime, size); missing files count too."""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class LRUCache:
+    """Thread-safe exact-match LRU with an optional embedding-similarity fallback.
+
+    ``embed`` is a callable mapping text to a vector. When set, a key miss is
+    retried against the stored entries and the closest one is returned if its
+    cosine similarity is at least ``similarity_threshold``.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, embed=None,
+                 similarity_threshold: float = SEMANTIC_THRESHOLD, name: str = "cache"):
+        self.name = name
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.version = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, embedding or None)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_version(self, version) -> None:
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                count("nlp_cache_lookups_total", cache=self.name, result="hit")
+                return self._entries[key][0]
+            candidates = [(k, emb) for k, (_, emb) in self._entries.items() if emb is not None]
+
+        if self.embed is not None and candidates:
+            try:
+                query = self.embed(key)
+            except Exception:
+                query = None
+            if query is not None:
+                best_key, best_sim = None, self.similarity_threshold
+                for k, emb in candidates:
+                    sim = _cosine(query, emb)
+                    if sim >= best_sim:
+                        best_key, best_sim = k, sim
+                with self._lock:
+                    if best_key in self._entries:
+                        self._entries.move_to_end(best_key)
+                        self.semantic_hits += 1
+                        count("nlp_cache_lookups_total", cache=self.name, result="semantic_hit")
+                        return self._entries[best_key][0]
+
+        with self._lock:
+            self.misses += 1
+        count("nlp_cache_lookups_total", cache=self.name, result="miss")
+        return None
+
+    def put(self, key: str, value) -> None:
+        embedding = None
+        if self.embed is not None:
+            try:
+                embedding = self.embed(key)
+            except Exception:
+                embedding = None
+        with self._lock:
+            self._entries[key] = (value, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+intent_cache = LRUCache(name="intent")
+refine_cache = LRUCache(name="refine")
+
+
+def set_data_version(version) -> None:
+    """Invalidate every cache when the scenario data fingerprint changes."""
+    intent_cache.set_version(version)
+    refine_cache.set_version(version)
+
+
+def enable_semantic_intent_cache(embed=None, threshold: float = SEMANTIC_THRESHOLD) -> None:
+    """Turn on the near-duplicate tier for intent labels (defaults to Ollama embeddings)."""
+    if embed is None:
+        from nlp.llm_client import embed_text as embed
+    intent_cache.embed = embed
+    intent_cache.similarity_threshold = threshold
@@ -117,6 +117,16 @@ def explain_manufacturing(data: dict, params: dict = None) -> str:
 
 def explain_scenario(data: dict) -> str:
     scen_data = data.get("scenario", {})
+    has_comparison = bool(data.get("comparison", {}).get("scenarios"))
+    if has_comparison and not scen_data.get("baseline"):
+        # Optimizer runs carry no baseline of their own; the scenario runs are the comparison
+        optimized = scen_data.get("optimized", {})
+        return "\n".join([
+            f"**Scenario:** {scen_data.get('scenario', 'Unknown')} (total cost ${optimized.get('total_cost', 0):,.0f})",
+            "",
+            explain_comparison(data),
+        ])
+
     scenario = scen_data.get("scenario", "Unknown")
     baseline = scen_data.get("baseline", {})
     optimized = scen_data.get("optimized", {})
@@ -138,9 +148,52 @@ def explain_scenario(data: dict) -> str:
         f"| Stockout units reduced | {delta.get('stockout_reduction_units', 0)} |",
         f"| Stockout reduction | {delta.get('stockout_reduction_pct', 0) * 100:.1f}% |",
     ]
+    if has_comparison:
+        lines += ["", explain_comparison(data)]
     return "\n".join(lines)
 
 
+def _signed_dollars(value: float) -> str:
+    return f"{'-' if value < 0 else '+'}${abs(value):,.0f}"
+
+
+def explain_comparison(data: dict) -> str:
+    comparison = data.get("comparison", {})
+    runs = comparison.get("scenarios", [])
+    if not runs:
+        return "No scenario comparison is available. Run optimization/scenarios.py to produce scenario_comparison.json."
+
+    baseline_id = comparison.get("baseline_scenario", "baseline")
+    solved = sorted((r for r in runs if "optimized" in r), key=lambda r: r["optimized"]["total_cost"])
+    unsolved = [r for r in runs if "optimized" not in r]
+    baseline = next((r for r in solved if r["scenario"] == baseline_id), None)
+
+    lines = [f"**What-if scenarios:** {len(runs) - 1} compared against {baseline_id} (default parameters)", ""]
+    if baseline:
+        lines.append(f"Baseline total cost: **${baseline['optimized']['total_cost']:,.0f}**  ")
+    alternatives = [r for r in solved if r["scenario"] != baseline_id]
+    if alternatives and baseline:
+        best = alternatives[0]
+        lines.append(f"Cheapest alternative: **{best['scenario']}** at ${best['optimized']['total_cost']:,.0f} "
+                     f"({_signed_dollars(best['delta']['cost_change'])} vs baseline)  ")
+    lines.append("")
+
+    if solved:
+        lines.append("| Scenario | Total cost | Change vs baseline | Transfers | Manufactured units |")
+        lines.append("|----------|------------|--------------------|-----------|--------------------|")
+        for r in solved[:10]:
+            delta = r.get("delta") or {}
+            pct = delta.get("cost_change_pct")
+            change = _signed_dollars(delta.get("cost_change", 0)) + (f" ({pct * 100:+.1f}%)" if pct is not None else "")
+            lines.append(f"| {r['scenario']} | ${r['optimized']['total_cost']:,.0f} | {change} "
+                         f"| {r['optimized'].get('total_transfers', 0)} "
+                         f"| {r['optimized'].get('manufacturing_units', 0):,.0f} |")
+        lines.append("")
+    if unsolved:
+        lines.append("**Not solved:** " + ", ".join(f"{r['scenario']} ({r['status']})" for r in unsolved))
+    return "\n".join(lines).rstrip()
+
+
 def explain_entities(data: dict) -> str:
     scenario = data.get("scenario", {}).get("scenario", "Unknown")
     transfers = data.get("transfers", {}).get("transfers", [])
@@ -200,6 +253,68 @@ def explain_counts(data: dict) -> str:
     ]
     return "\n".join(lines)
 
+def _store_number(store_id: str) -> str:
+    # "store_012", "Store 12" and "12" all name the same store
+    return str(store_id).lower().replace("store", "").strip(" _").lstrip("0") or "0"
+
+
+def explain_sensitivity(data: dict, params: dict = None) -> str:
+    sens = data.get("sensitivity", {})
+    capacity = sens.get("capacity", [])
+    if not capacity:
+        return "No sensitivity report is available for this scenario. Run the optimizer to produce sensitivity.json."
+
+    scenario = sens.get("scenario", "Unknown")
+    params = params or {}
+    wanted = {_store_number(s) for s in params.get("store_id", [])}
+    amount = params.get("amount")
+
+    if wanted:
+        stores = [c for c in capacity if _store_number(c.get("store_id", "")) in wanted]
+        if not stores:
+            return "No capacity sensitivity matches the given store in this scenario."
+        lines = [f"**Scenario:** {scenario}", ""]
+        for c in stores:
+            price = c.get("shadow_price", 0)
+            lines.append("---")
+            lines.append(f"**Store {_store_number(c['store_id'])}**  ")
+            lines.append(f"Manufacturing capacity: {c.get('capacity', 0):,.0f} units, "
+                         f"used: {c.get('manufactured', 0):,.0f} ({c.get('utilization', 0) * 100:.0f}%)  ")
+            if price < 0:
+                lines.append(f"Each extra unit of capacity lowers total cost by **${-price:,.2f}**.  ")
+                if amount:
+                    lines.append(f"Raising capacity by {amount:,.0f} units would save about "
+                                 f"**${-price * amount:,.0f}**, as long as the current plan structure holds.  ")
+            else:
+                lines.append("Capacity is not a bottleneck here; adding capacity would not lower total cost.  ")
+            lines.append("")
+        return "\n".join(lines).rstrip()
+
+    binding = [c for c in capacity if c.get("shadow_price", 0) < 0]
+    lines = [
+        f"**Scenario:** {scenario}",
+        f"**Stores with binding manufacturing capacity:** {len(binding)} of {len(capacity)}",
+        "",
+    ]
+    if binding:
+        lines.append("| Store | Utilization | Saving per extra unit |")
+        lines.append("|-------|-------------|-----------------------|")
+        for c in binding[:10]:
+            lines.append(f"| {_store_number(c['store_id'])} | {c.get('utilization', 0) * 100:.0f}% "
+                         f"| ${-c.get('shadow_price', 0):,.2f} |")
+        lines.append("")
+
+    marginal = sens.get("marginal_costs", [])
+    if marginal:
+        lines.append("**Most expensive store-product pairs to cover one more unit of demand:**")
+        lines.append("")
+        lines.append("| Store | Product | Marginal cost |")
+        lines.append("|-------|---------|---------------|")
+        for m in marginal[:10]:
+            lines.append(f"| {_store_number(m['store_id'])} | {m.get('product_id')} | ${m.get('marginal_cost', 0):,.2f} |")
+    return "\n".join(lines).rstrip()
+
+
 def build_explanation(intent: str, data: dict, params: dict = None) -> str:
     if intent == "explain_transfer":
         return explain_transfer(data, params)
@@ -211,4 +326,6 @@ def build_explanation(intent: str, data: dict, params: dict = None) -> str:
         return explain_counts(data)
     if intent in ("scenario_summary", "impact_analysis"):
         return explain_scenario(data)
+    if intent == "sensitivity_analysis":
+        return explain_sensitivity(data, params)
     return ""
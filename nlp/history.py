@@ -0,0 +1,90 @@
+"""Bounded chat history for the Streamlit app.
+
+Assistant answers (markdown tables, long transfer lists) are stored once in a
+content-addressed artifact store and messages only keep a key to them, so asking the
+same question twice does not duplicate the table. The history caps both the number
+of messages and the total artifact bytes; the oldest entries go first. Only the
+most recent turns are meant to be rendered in full; older ones keep a one-line
+summary for a collapsed view.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+MAX_MESSAGES = 100
+MAX_FULL_MESSAGES = 10
+MAX_ARTIFACT_BYTES = 2_000_000
+SUMMARY_CHARS = 90
+
+
+def _summarize(text: str) -> str:
+    for line in text.splitlines():
+        line = line.strip(" *#-|")
+        if line:
+            return line if len(line) <= SUMMARY_CHARS else line[: SUMMARY_CHARS - 1] + "…"
+    return ""
+
+
+class ChatHistory:
+    def __init__(self, max_messages: int = MAX_MESSAGES, max_full_messages: int = MAX_FULL_MESSAGES,
+                 max_artifact_bytes: int = MAX_ARTIFACT_BYTES):
+        self.max_messages = max_messages
+        self.max_full_messages = max_full_messages
+        self.max_artifact_bytes = max_artifact_bytes
+        self.messages = []
+        self.artifacts = OrderedDict()  # key -> markdown body, oldest first
+        self.artifact_bytes = 0
+
+    def add_user(self, text: str) -> None:
+        self._append({"role": "user", "content": text, "artifact": None, "summary": _summarize(text)})
+
+    def add_assistant(self, body: str, header: str = "", footer: str = "", summary: str = "") -> None:
+        """Store an answer; ``body`` goes to the artifact store, header/footer stay inline."""
+        key = self._store_artifact(body)
+        self._append({
+            "role": "assistant",
+            "content": header,
+            "footer": footer,
+            "artifact": key,
+            "summary": summary or _summarize(body),
+        })
+
+    def body(self, message: dict):
+        """Full answer text, or None when the artifact was evicted by the memory cap."""
+        key = message.get("artifact")
+        if key is None:
+            return message["content"]
+        return self.artifacts.get(key)
+
+    def split(self) -> tuple[list, list]:
+        """Return (older, recent) messages; only ``recent`` should be rendered in full."""
+        cut = max(0, len(self.messages) - self.max_full_messages)
+        return self.messages[:cut], self.messages[cut:]
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.artifacts.clear()
+        self.artifact_bytes = 0
+
+    def _store_artifact(self, body: str) -> str:
+        key = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        if key in self.artifacts:
+            self.artifacts.move_to_end(key)
+        else:
+            self.artifacts[key] = body
+            self.artifact_bytes += len(body)
+        return key
+
+    def _append(self, message: dict) -> None:
+        self.messages.append(message)
+        if len(self.messages) > self.max_messages:
+            del self.messages[: len(self.messages) - self.max_messages]
+            self._drop_unreferenced()
+        while self.artifact_bytes > self.max_artifact_bytes and len(self.artifacts) > 1:
+            _, body = self.artifacts.popitem(last=False)
+            self.artifact_bytes -= len(body)
+
+    def _drop_unreferenced(self) -> None:
+        referenced = {m["artifact"] for m in self.messages if m["artifact"]}
+        for key in [k for k in self.artifacts if k not in referenced]:
+            self.artifact_bytes -= len(self.artifacts.pop(key))
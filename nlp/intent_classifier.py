@@ -1,5 +1,18 @@
+import logging
 import re
+from nlp.cache import intent_cache, normalize_prompt
 from nlp.llm_client import call_llm
+from telemetry.metrics import count, timer
+
+logger = logging.getLogger(__name__)
+
+# The LLM round-trip is skipped only when the keyword scorer's winner has at least this
+# share of the total score, this absolute score (or LOCAL_MIN_HITS distinct keywords) and
+# this lead over the runner-up. A single weak hit ("I recommend a good movie") goes to the LLM.
+LOCAL_CONFIDENCE_THRESHOLD = 0.6
+LOCAL_MIN_SCORE = 3.0
+LOCAL_MIN_HITS = 2
+LOCAL_MIN_MARGIN = 1.0
 
 ALLOWED_INTENTS = {
     "explain_transfer",
@@ -7,6 +20,7 @@ ALLOWED_INTENTS = {
     "scenario_summary",
     "impact_analysis",
     "total_counts",
+    "sensitivity_analysis",
     "out_of_scope",
     "greeting",
 }
@@ -24,6 +38,7 @@ SYSTEM_PROMPT = (
     "  scenario_summary\n"
     "  impact_analysis\n"
     "  total_counts\n"
+    "  sensitivity_analysis\n"
     "  out_of_scope\n\n"
     "Label definitions:\n"
     "  explain_transfer      → anything about moving/transferring inventory between stores, "
@@ -33,6 +48,7 @@ SYSTEM_PROMPT = (
     "  scenario_summary      → high-level overview of a scenario, baseline vs optimized comparison\n"
     "  impact_analysis       → cost savings, stockout reductions, financial impact of decisions\n"
     "  total_counts          → asking for counts or quantities like 'how many transfers', 'how many products', 'total recommendations'\n"
+    "  sensitivity_analysis  → what-if questions about capacity, shadow prices or marginal costs\n"
     "  out_of_scope          → unrelated to supply chain (e.g. weather, cooking, general chat)\n\n"
     "Examples:\n"
     "  'why should I transfer?' → explain_transfer\n"
@@ -41,6 +57,7 @@ SYSTEM_PROMPT = (
     "  'how did the scenario perform?' → scenario_summary\n"
     "  'what was the cost impact?' → impact_analysis\n"
     "  'how many recommendations in total do you have?' → total_counts\n"
+    "  'what if capacity at store 12 went up?' → sensitivity_analysis\n"
     "  'what is the weather today?' → out_of_scope\n\n"
     "Rules:\n"
     "- Return ONLY the label. No punctuation, no explanation, no extra text.\n"
@@ -72,46 +89,136 @@ _KEYWORD_MAP = {
     "total_counts": [
         "how many", "count", "total number", "amount of", "number of",
     ],
+    "sensitivity_analysis": [
+        "what if", "capacity", "shadow price", "marginal cost", "sensitivity",
+        "went up", "go up", "increase capacity", "more capacity", "bottleneck",
+    ],
 }
 
 
+# Count phrases outweigh the topic they count, so "how many transfers" stays total_counts
+_INTENT_WEIGHTS = {"total_counts": 3.0}
+
+_ALL_WORDS = ["all", "every", "overview", "list", "total", "everything"]
+
+_KEYWORD_INTENT = {kw: intent for intent, keywords in _KEYWORD_MAP.items() for kw in keywords}
+
+
+def _alternation(words) -> str:
+    # Longest first so the most specific phrase wins at a given position
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# Keywords match whole words, optionally inflected ("transfers", "manufactured"), so
+# "count" does not fire inside "discount". Underscores and digits may follow, as in "store_12".
+_WORD_START = r"(?<![a-z0-9])"
+_WORD_END = r"(?:s|es|d|ed|red|ing|ion|ions|ation|ations)?(?![a-z])"
+
+# One pass over the lowercased message finds IDs, intent keywords and "all" words.
+# IDs consume their text; keywords and "all" words sit in lookaheads so phrases that
+# overlap ("why transfer", "transfer") are all found.
+_TURN_PATTERN = re.compile(
+    r"(?P<transfer_id>\bt_?\d{3,}\b)"
+    r"|(?P<manufacturing_id>\bm_?\d{3,}\b)"
+    r"|\b(?P<entity>store|product)(?:_|\s+)(?P<entity_num>\d+)\b"
+    r"|\b(?P<amount>\d+(?:\.\d+)?)\b"
+    rf"|(?={_WORD_START}(?P<keyword>{_alternation(_KEYWORD_INTENT)}){_WORD_END})?"
+    rf"(?={_WORD_START}(?P<all>{_alternation(_ALL_WORDS)}){_WORD_END})?"
+)
+
+
+def match_turn(text: str) -> dict:
+    """Score intents and extract parameters in a single regex pass.
+
+    Returns {"scores": {intent: weight}, "hits": {intent: distinct keywords},
+    "params": {...}} where params has the same shape as extract_parameters. Compute it
+    once per turn and pass it along.
+    """
+    params = {"transfer_id": [], "manufacturing_id": [], "product_id": [], "store_id": [], "is_all": False,
+              "amount": None}
+    keywords = set()
+    for m in _TURN_PATTERN.finditer(text.lower()):
+        kind = m.lastgroup
+        if kind in ("transfer_id", "manufacturing_id"):
+            params[kind].append(m.group(kind).replace("_", "").upper())
+        elif m.group("entity"):
+            params[f"{m.group('entity')}_id"].append(f"{m.group('entity')}_{m.group('entity_num')}")
+        elif m.group("amount"):
+            if params["amount"] is None:
+                params["amount"] = float(m.group("amount"))
+        else:
+            if m.group("keyword"):
+                keywords.add(m.group("keyword"))
+            if m.group("all"):
+                params["is_all"] = True
+
+    # Multi-word phrases count once per word; each keyword counts once however often it appears
+    scores, hits = {}, {}
+    for kw in keywords:
+        intent = _KEYWORD_INTENT[kw]
+        scores[intent] = scores.get(intent, 0) + len(kw.split()) * _INTENT_WEIGHTS.get(intent, 1.0)
+        hits[intent] = hits.get(intent, 0) + 1
+    return {"scores": scores, "hits": hits, "params": params}
+
+
+def _local_classify(text: str, match: dict = None) -> tuple[str, float]:
+    """Return (intent, confidence) from the keyword scorer without calling the LLM.
+
+    Confidence is the winning intent's share of the total score, so a message that
+    only hits one intent scores 1.0 and one split across topics scores lower.
+    No keyword hits gives out_of_scope with zero confidence.
+    """
+    scores = (match or match_turn(text))["scores"]
+    if not scores:
+        return "out_of_scope", 0.0
+    # Ties go to the intent listed first in _KEYWORD_MAP
+    best = max(_KEYWORD_MAP, key=lambda intent: scores.get(intent, 0))
+    return best, scores[best] / sum(scores.values())
+
+
+def _local_is_confident(text: str, match: dict = None) -> bool:
+    """True when the keyword scorer may answer without the LLM (see LOCAL_MIN_SCORE)."""
+    match = match or match_turn(text)
+    scores = match["scores"]
+    if not scores:
+        return False
+    best, confidence = _local_classify(text, match)
+    runner_up = max((v for k, v in scores.items() if k != best), default=0.0)
+    strong = scores[best] >= LOCAL_MIN_SCORE or match["hits"].get(best, 0) >= LOCAL_MIN_HITS
+    return (confidence >= LOCAL_CONFIDENCE_THRESHOLD and strong
+            and scores[best] - runner_up >= LOCAL_MIN_MARGIN)
+
+
 def _keyword_classify(text: str) -> str:
-    lower = text.lower()
-    
-    # Check total_counts first to prioritize "how many transfers" over just "transfers"
-    for kw in _KEYWORD_MAP["total_counts"]:
-        if kw in lower:
-            return "total_counts"
-            
-    for intent, keywords in _KEYWORD_MAP.items():
-        if intent == "total_counts": continue
-        if any(kw in lower for kw in keywords):
-            return intent
-            
-    return "out_of_scope"
+    return _local_classify(text)[0]
 
 
 def extract_parameters(text: str) -> dict:
-    lower = text.lower()
-    # Normalize "store 223" -> "store_223" and "product 892" -> "product_892"
-    normalized = re.sub(r'\b(store|product)\s+(\d+)\b', r'\1_\2', lower)
-    # Extract IDs
-    t_ids = [m.replace("_", "").upper() for m in re.findall(r'\bt_?\d{3}\b', normalized)]
-    m_ids = [m.replace("_", "").upper() for m in re.findall(r'\bm_?\d{3}\b', normalized)]
-    
-    return {
-        "transfer_id": t_ids,
-        "manufacturing_id": m_ids,
-        "product_id": re.findall(r'\bproduct_\d+\b', normalized),
-        "store_id": re.findall(r'\bstore_\d+\b', normalized),
-        "is_all": any(w in lower for w in ["all", "every", "overview", "list", "total", "everything"]),
-    }
+    return match_turn(text)["params"]
 
 
-def classify_intent(user_message: str) -> str:
+def classify_intent(user_message: str, match: dict = None) -> str:
+    return classify_intent_tiered(user_message, match)[0]
+
+
+def classify_intent_tiered(user_message: str, match: dict = None) -> tuple[str, str]:
+    """Classify a message and report which tier answered.
+
+    Tiers: "greeting", "local" (keyword scorer confident, see _local_is_confident),
+    "cache" (LLM label seen before), "llm" and "fallback" (LLM failed or returned
+    an invalid label). ``match`` is a precomputed match_turn result to reuse.
+    """
+    with timer("nlp_classify_seconds") as t:
+        intent, tier = _classify(user_message, match or match_turn(user_message))
+    count("nlp_intent_tier_total", tier=tier)
+    logger.info("intent=%s tier=%s elapsed_ms=%.1f", intent, tier, t.elapsed * 1000)
+    return intent, tier
+
+
+def _classify(user_message: str, match: dict) -> tuple[str, str]:
     lower = user_message.strip().lower()
     if lower in _GREETING_KEYWORDS or any(lower.startswith(g) for g in _GREETING_KEYWORDS):
-        return "greeting"
+        return "greeting", "greeting"
 
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
@@ -120,7 +227,7 @@ def classify_intent(user_message: str) -> str:
     
     def _fallback_with_params(intent: str) -> str:
         if intent == "out_of_scope":
-            params = extract_parameters(user_message)
+            params = match["params"]
             if params.get("store_id") or params.get("transfer_id"):
                 return "explain_transfer"
             if params.get("manufacturing_id"):
@@ -129,11 +236,21 @@ def classify_intent(user_message: str) -> str:
                 return "explain_transfer" # defaults to showing product transfers
         return intent
 
+    local_label, _ = _local_classify(user_message, match)
+    if _local_is_confident(user_message, match):
+        return _fallback_with_params(local_label), "local"
+
+    cache_key = normalize_prompt(user_message)
+    cached = intent_cache.get(cache_key)
+    if cached is not None:
+        return _fallback_with_params(cached), "cache"
+
     try:
         raw = call_llm(messages).strip().lower()
         label = raw.split()[0] if raw else ""
         if label in ALLOWED_INTENTS:
-            return _fallback_with_params(label)
-        return _fallback_with_params(_keyword_classify(user_message))
+            intent_cache.put(cache_key, label)
+            return _fallback_with_params(label), "llm"
+        return _fallback_with_params(local_label), "fallback"
     except Exception:
-        return _fallback_with_params(_keyword_classify(user_message))
+        return _fallback_with_params(local_label), "fallback"
@@ -1,8 +1,27 @@
-import requests
+import os
+
+from telemetry.metrics import count, timer
 
-OLLAMA_URL = "http://localhost:11434/api/chat"
 MODEL = "tinyllama"
-TIMEOUT = 30
+DEFAULT_HOST = "localhost:11434"
+DEFAULT_TIMEOUT = 30.0
+
+
+def ollama_url(path: str) -> str:
+    """URL of an Ollama API path on the server named by OLLAMA_HOST, read on every call.
+
+    OLLAMA_HOST takes the forms the ollama CLI accepts: "127.0.0.1", "127.0.0.1:11435"
+    or a full URL, so the app can be pointed at another server (e.g. benchmark/ollama_mock.py).
+    """
+    host = (os.environ.get("OLLAMA_HOST") or DEFAULT_HOST).strip().rstrip("/")
+    if "://" not in host:
+        host = f"http://{host}" if ":" in host else f"http://{host}:11434"
+    return f"{host}{path}"
+
+
+def request_timeout() -> float:
+    """Seconds per request; OLLAMA_TIMEOUT overrides the default."""
+    return float(os.environ.get("OLLAMA_TIMEOUT") or DEFAULT_TIMEOUT)
 
 
 def call_llm(messages: list[dict]) -> str:
@@ -12,6 +31,27 @@ def call_llm(messages: list[dict]) -> str:
         "stream": False,
         "options": {"temperature": 0.2},
     }
-    response = requests.post(OLLAMA_URL, json=payload, timeout=TIMEOUT)
-    response.raise_for_status()
+    import requests  # imported on the first request; it is most of this module's import time
+
+    try:
+        with timer("llm_request_seconds", endpoint="chat"):
+            response = requests.post(ollama_url("/api/chat"), json=payload, timeout=request_timeout())
+            response.raise_for_status()
+    except Exception:
+        count("llm_errors_total", endpoint="chat")
+        raise
     return response.json()["message"]["content"].strip()
+
+
+def embed_text(text: str) -> list[float]:
+    import requests
+
+    payload = {"model": MODEL, "prompt": text}
+    try:
+        with timer("llm_request_seconds", endpoint="embeddings"):
+            response = requests.post(ollama_url("/api/embeddings"), json=payload, timeout=request_timeout())
+            response.raise_for_status()
+    except Exception:
+        count("llm_errors_total", endpoint="embeddings")
+        raise
+    return response.json()["embedding"]
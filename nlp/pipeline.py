@@ -0,0 +1,149 @@
+"""Per-turn request pipeline that overlaps the intent LLM call with everything else.
+
+Scenario loading and parameter extraction do not depend on the intent, so they run
+while ``classify_intent`` waits on Ollama. The keyword scorer's best guess is used to
+build an explanation speculatively; if the final label agrees, the refiner can start
+the moment the label arrives.
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from nlp.explanation_engine import build_explanation
+from nlp.intent_classifier import _local_classify, classify_intent_tiered, match_turn
+from nlp.scenario_io import RECORD_KEYS, load_json, record_adapter
+
+logger = logging.getLogger(__name__)
+
+SCENARIO_FILES = {
+    "scenario": "scenario.json",
+    "transfers": "transfer.json",
+    "manufacturing": "manufacturing.json",
+}
+
+# The same files under the names optimization.py writes to output-json/
+OPTIMIZER_SCENARIO_FILES = {
+    "scenario": "scenario_summary.json",
+    "transfers": "transfer_recommendations.json",
+    "manufacturing": "manufacturing_decisions.json",
+}
+
+# Loaded when present: sensitivity.json is written by the optimizer when the solver
+# reports duals, scenario_comparison.json by optimization/scenarios.py
+OPTIONAL_SCENARIO_FILES = {
+    "sensitivity": "sensitivity.json",
+    "comparison": "scenario_comparison.json",
+}
+
+# Intents build_explanation can answer; anything else is not worth speculating on
+_EXPLAINABLE_INTENTS = {
+    "explain_transfer",
+    "explain_manufacturing",
+    "scenario_summary",
+    "impact_analysis",
+    "total_counts",
+    "sensitivity_analysis",
+}
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nlp-turn")
+
+
+def scenario_files(data_dir: str) -> dict:
+    """File names for ``data_dir``: the sample layout, or the optimizer's output-json layout."""
+    if (not os.path.exists(os.path.join(data_dir, SCENARIO_FILES["scenario"]))
+            and os.path.exists(os.path.join(data_dir, OPTIMIZER_SCENARIO_FILES["scenario"]))):
+        return OPTIMIZER_SCENARIO_FILES
+    return SCENARIO_FILES
+
+
+def scenario_paths(data_dir: str) -> list[str]:
+    names = [*scenario_files(data_dir).values(), *OPTIONAL_SCENARIO_FILES.values()]
+    return [os.path.join(data_dir, name) for name in names]
+
+
+def validate_scenario_data(data: dict) -> None:
+    """Bulk-check the record lists against nlp.schemas; problems are logged, not raised."""
+    from pydantic import ValidationError
+
+    for kind, (key, _) in RECORD_KEYS.items():
+        try:
+            record_adapter(kind).validate_python(data.get(kind, {}).get(key, []))
+        except ValidationError as exc:
+            logger.warning("%s records failed schema validation (%d errors): %s",
+                           kind, exc.error_count(), exc.errors()[0]["msg"])
+
+
+def load_comparison(path: str) -> dict:
+    """scenario_comparison.json, or {} when it is missing or does not match nlp.schemas."""
+    from pydantic import ValidationError
+
+    from nlp.schemas import ScenarioComparison
+
+    if not os.path.exists(path):
+        return {}
+    comparison = load_json(path)
+    try:
+        ScenarioComparison.model_validate(comparison)
+    except ValidationError as exc:
+        logger.warning("%s failed schema validation (%d errors): %s; ignoring it",
+                       path, exc.error_count(), exc.errors()[0]["msg"])
+        return {}
+    return comparison
+
+
+# Optional files that need more than load_json
+_OPTIONAL_LOADERS = {"comparison": load_comparison}
+
+
+def load_scenario_data(data_dir: str) -> dict:
+    data = {key: load_json(os.path.join(data_dir, name)) for key, name in scenario_files(data_dir).items()}
+    validate_scenario_data(data)
+    for key, name in OPTIONAL_SCENARIO_FILES.items():
+        path = os.path.join(data_dir, name)
+        if key in _OPTIONAL_LOADERS:
+            data[key] = _OPTIONAL_LOADERS[key](path)
+        else:
+            data[key] = load_json(path) if os.path.exists(path) else {}
+    return data
+
+
+class TurnPipeline:
+    """Starts classification, data loading and a speculative explanation on creation.
+
+    Callers block only when they ask for a result: ``intent()``, ``data()`` or
+    ``explanation(intent)``. ``loader`` maps ``data_dir`` to scenario data; pass a
+    cached lookup to skip re-reading the files every turn.
+    """
+
+    def __init__(self, prompt: str, data_dir: str, executor: ThreadPoolExecutor = None,
+                 loader=load_scenario_data):
+        executor = executor or _executor
+        self.prompt = prompt
+        # One matcher pass serves the classifier, the speculative guess and the filters
+        self.match = match_turn(prompt)
+        self.params = self.match["params"]
+        self._intent = executor.submit(classify_intent_tiered, prompt, self.match)
+        self._data = executor.submit(loader, data_dir)
+
+        guess, _ = _local_classify(prompt, self.match)
+        self.speculative_intent = guess if guess in _EXPLAINABLE_INTENTS else None
+        self._speculative = None
+        if self.speculative_intent:
+            self._speculative = executor.submit(self._build, self.speculative_intent)
+
+    def _build(self, intent: str) -> str:
+        return build_explanation(intent, self._data.result(), self.params)
+
+    def intent(self) -> tuple[str, str]:
+        """Block until classification finishes; returns (intent, tier)."""
+        return self._intent.result()
+
+    def data(self) -> dict:
+        return self._data.result()
+
+    def explanation(self, intent: str) -> str:
+        """Return the speculative explanation when the guess was right, else build it now."""
+        if self._speculative is not None and intent == self.speculative_intent:
+            return self._speculative.result()
+        return self._build(intent)
@@ -1,7 +1,14 @@
+from nlp.cache import refine_cache, text_hash
 from nlp.llm_client import call_llm
 
 
 def refine_explanation(raw_explanation: str, user_question: str = "") -> str:
+    # The prompt below only depends on raw_explanation, so that is the cache key
+    cache_key = text_hash(raw_explanation)
+    cached = refine_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     tone_instruction = (
         f'The user asked: "{user_question}". Match the tone of their question — '
         "casual questions should get a conversational answer, formal questions a professional one. "
@@ -16,5 +23,7 @@ def refine_explanation(raw_explanation: str, user_question: str = "") -> str:
         "SUMMARY PARAGRAPH:\n"
     )
     messages = [{"role": "user", "content": prompt}]
-    return call_llm(messages)
+    refined = call_llm(messages)
+    refine_cache.put(cache_key, refined)
+    return refined
 
@@ -0,0 +1,121 @@
+"""Streaming JSON I/O for scenario record files (transfers, manufacturing actions).
+
+``write_records`` writes the usual envelope
+
+    {"scenario": "...", "transfers": [
+    {...record...},
+    {...record...}
+    ]}
+
+with one orjson-encoded record per line, from any iterable, validating in batches as
+it goes, so the full list never has to exist in memory. The file is still plain JSON
+for every reader.
+
+``iter_records`` reads such a file back line by line and validates it in batches
+with a TypeAdapter, keeping memory bounded for very large scenarios.
+``load_records`` parses any scenario file with orjson and validates the whole
+record list with one TypeAdapter call.
+
+nlp.schemas (and with it pydantic) is imported on the first validation, not with this
+module, so reading scenario files stays cheap at startup.
+"""
+
+import os
+
+import orjson
+
+# File-level key of the record list, and the name of its bulk validator in nlp.schemas
+RECORD_KEYS = {
+    "transfers": ("transfers", "TransferList"),
+    "manufacturing": ("manufacturing_actions", "ManufacturingList"),
+}
+
+DEFAULT_BATCH = 10_000
+
+
+def record_adapter(kind: str):
+    """TypeAdapter validating a record list of ``kind``."""
+    from nlp import schemas
+
+    return getattr(schemas, RECORD_KEYS[kind][1])
+
+
+def load_json(path: str) -> dict:
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _batches(records, size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_records(path: str, scenario: str, kind: str, records, validate: bool = True,
+                  batch_size: int = DEFAULT_BATCH) -> int:
+    """Write ``records`` (dicts) under the envelope for ``kind``; returns the record count.
+
+    Records are consumed ``batch_size`` at a time, so a generator is never materialized
+    in full. With ``validate`` each batch gets one TypeAdapter pass before it is written;
+    the write is atomic (temp file + rename), so an invalid record never reaches ``path``.
+    """
+    key = RECORD_KEYS[kind][0]
+    adapter = record_adapter(kind) if validate else None
+    tmp = f"{path}.tmp"
+    count = 0
+    try:
+        with open(tmp, "wb") as f:
+            f.write(b'{"scenario": ' + orjson.dumps(scenario) + b', "' + key.encode() + b'": [')
+            for batch in _batches(records, batch_size):
+                if validate:
+                    adapter.validate_python(batch)
+                for record in batch:
+                    f.write(b",\n" if count else b"\n")
+                    f.write(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY))
+                    count += 1
+            f.write(b"\n]}\n")
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return count
+
+
+def load_records(path: str, kind: str) -> tuple[str, list]:
+    """Return (scenario, validated models) for a scenario file in any JSON layout."""
+    key = RECORD_KEYS[kind][0]
+    doc = load_json(path)
+    return doc.get("scenario", "Unknown"), record_adapter(kind).validate_python(doc.get(key, []))
+
+
+def iter_records(path: str, kind: str, batch_size: int = DEFAULT_BATCH):
+    """Yield validated models from a file written by ``write_records``, batch by batch.
+
+    Each batch of raw record lines is joined into one JSON array and validated with
+    ``TypeAdapter.validate_json``, so parsing and validation happen in a single pass
+    without building intermediate dicts. Files in other layouts fall back to
+    ``load_records``.
+    """
+    adapter = record_adapter(kind)
+    with open(path, "rb") as f:
+        header = f.readline()
+        if not header.rstrip().endswith(b"["):
+            yield from load_records(path, kind)[1]
+            return
+        batch = []
+        for line in f:
+            line = line.strip().rstrip(b",")
+            if not line or line == b"]}":
+                continue
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield from adapter.validate_json(b"[" + b",".join(batch) + b"]")
+                batch = []
+        if batch:
+            yield from adapter.validate_json(b"[" + b",".join(batch) + b"]")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import Dict, List, Optional
 
 class CostImpact(BaseModel):
     transport_cost: Optional[float] = None
@@ -15,36 +15,69 @@ class ServiceLevelImpact(BaseModel):
     post_transfer_stockout_units: int
     stockout_reduction_pct: float
 
+# Records sit in a file-level list; ``scenario`` is normally set once on the file, not per record
 class TransferRecommendation(BaseModel):
-    scenario: str
+    transfer_id: str
+    scenario: Optional[str] = None
     from_store: str
     to_store: str
     product_id: str
-    quantity: int
+    quantity: float
     reason_codes: List[str]
     cost_impact: CostImpact
     service_level_impact: ServiceLevelImpact
 
 class ManufacturingDecision(BaseModel):
-    scenario: str
+    manufacturing_id: str
+    scenario: Optional[str] = None
     product_id: str
-    manufacture_quantity: int
+    manufacture_quantity: float
     reason_codes: List[str]
     cost_impact: CostImpact
 
 class ScenarioMetrics(BaseModel):
     total_cost: float
-    total_stockouts: int
+    total_stockouts: Optional[int] = None
     total_transfers: Optional[int] = None
-    manufacturing_units: Optional[int] = None
+    manufacturing_units: Optional[float] = None
+    transfer_units: Optional[float] = None
 
 class ScenarioDelta(BaseModel):
     cost_change: float
     stockout_reduction_units: Optional[int] = None
     stockout_reduction_pct: float
 
+# Optimizer runs report only the optimized plan; baseline/delta come from comparison runs
 class ScenarioSummary(BaseModel):
     scenario: str
-    baseline: ScenarioMetrics
+    baseline: Optional[ScenarioMetrics] = None
     optimized: ScenarioMetrics
-    delta: ScenarioDelta
+    delta: Optional[ScenarioDelta] = None
+
+class CostBreakdown(BaseModel):
+    manufacturing_cost: float
+    transfer_cost: float
+    holding_cost: float
+
+class ComparisonDelta(BaseModel):
+    cost_change: float
+    cost_change_pct: Optional[float] = None
+
+# One row of optimization/scenarios.py; unsolved runs carry only params and status
+class ScenarioRun(BaseModel):
+    scenario: str
+    params: Dict[str, float]
+    status: str
+    solver: str
+    solve_seconds: float
+    optimized: Optional[ScenarioMetrics] = None
+    cost_breakdown: Optional[CostBreakdown] = None
+    delta: Optional[ComparisonDelta] = None
+
+class ScenarioComparison(BaseModel):
+    baseline_scenario: str
+    scenarios: List[ScenarioRun]
+
+# Bulk validators: one call checks a whole record list, no per-record model construction
+TransferList = TypeAdapter(List[TransferRecommendation])
+ManufacturingList = TypeAdapter(List[ManufacturingDecision])
@@ -0,0 +1,161 @@
+"""
+Greedy allocator for the inventory LP: a feasible plan in milliseconds.
+
+Works on the same structure as lp_model (pair table, transfer arcs, cost vector) and
+returns a solution vector in the LP layout [ x | t | final_inv ], so it can be written,
+compared with the LP or handed to a backend as its starting point:
+
+  1. Every pair's target is demand_7d + z × safety_unit. Pairs below target have a
+     deficit; pairs above it have a surplus, which is at most their current inventory
+     (the transfer limit Σ t_out ≤ current always holds).
+  2. Deficits are filled from surpluses of the same product, cheapest arc first, in
+     vectorized rounds: each deficit pair asks its cheapest arc that still has surplus,
+     and each source serves its requests in cost order until its surplus runs out,
+     stores whose deficits exceed mfg_capacity first. Only arcs cheaper than
+     manufacturing at the destination are used.
+  3. At stores whose remaining deficits exceed mfg_capacity, the excess is covered the
+     same way from stores with spare capacity, which ship their own stock (within
+     Σ t_out ≤ current) and manufacture the replacement.
+  4. The remaining deficit is manufactured at the destination store, up to
+     mfg_capacity per store. Anything still uncovered is shortfall, and the plan is
+     reported Infeasible.
+
+optimization.optimize runs it before every solve: as the warm start (see solvers.solve)
+and as the plan that is written when the backend returns no solution.
+"""
+
+import time
+
+import numpy as np
+
+from optimization.lp_model import scenario_vectors, solution_costs
+
+TOLERANCE = 1e-9
+
+
+def _within_group_before(values, groups):
+    """Exclusive running sum of ``values`` within runs of equal ``groups`` (already sorted)."""
+    before = np.cumsum(values) - values
+    group_start = np.r_[True, groups[1:] != groups[:-1]]
+    return before - np.maximum.accumulate(np.where(group_start, before, 0))
+
+
+def _fill_transfers(structure, supply, deficit, arc_cost, live, urgent=None, store_spare=None, store_need=None):
+    """Greedy transfer quantities per arc in vectorized rounds.
+
+    ``supply`` (per pair: what it may still ship) and ``deficit`` are updated in place.
+    Sources serve destinations flagged ``urgent`` (per pair) before the others.
+    With ``store_spare`` every unit shipped is also manufactured at the source store, so
+    grants are further limited by that store's spare capacity; ``store_need`` caps what
+    each destination store receives in total. Both are per-store and updated in place.
+    """
+    src, dst = structure['src'], structure['dst']
+    store_index = structure['store_index']
+    t = np.zeros(structure['n_arcs'])
+    rounds = 0
+
+    while len(live):
+        rounds += 1
+        # Each destination asks its cheapest live arc for its whole deficit
+        by_dst = live[np.lexsort((arc_cost[live], dst[live]))]
+        asks = by_dst[np.r_[True, dst[by_dst][1:] != dst[by_dst][:-1]]]
+
+        # Each source grants requests in cost order while its supply lasts
+        first_served = ~urgent[dst[asks]] if urgent is not None else np.zeros(len(asks), dtype=bool)
+        asks = asks[np.lexsort((arc_cost[asks], first_served, src[asks], store_index[src[asks]]))]
+        s = src[asks]
+        request = deficit[dst[asks]]
+        grant = np.clip(supply[s] - _within_group_before(request, s), 0, request)
+        if store_need is not None:
+            to_store = store_index[dst[asks]]
+            order = np.argsort(to_store, kind='stable')
+            grant[order] = np.clip(store_need[to_store[order]] - _within_group_before(grant[order], to_store[order]),
+                                   0, grant[order])
+        if store_spare is not None:
+            stores = store_index[s]
+            grant = np.clip(store_spare[stores] - _within_group_before(grant, stores), 0, grant)
+            np.subtract.at(store_spare, stores, grant)
+        if store_need is not None:
+            np.subtract.at(store_need, to_store, grant)
+
+        t[asks] += grant
+        np.subtract.at(supply, s, grant)
+        deficit[dst[asks]] -= grant  # one ask per destination, so no repeated indices
+        keep = (supply[src[live]] > TOLERANCE) & (deficit[dst[live]] > TOLERANCE)
+        if store_spare is not None:
+            keep &= store_spare[store_index[src[live]]] > TOLERANCE
+        if store_need is not None:
+            keep &= store_need[store_index[dst[live]]] > TOLERANCE
+        live = live[keep]
+    return t, rounds
+
+
+def greedy_plan(structure, params):
+    """Greedy plan for one parameter set, as a solvers.solve-style result dict.
+
+    ``status`` is 'Feasible', or 'Infeasible' when manufacturing capacity leaves a
+    shortfall; ``x`` is the full solution vector either way.
+    """
+    start = time.perf_counter()
+    n, m = structure['n_pairs'], structure['n_arcs']
+    c, _, _ = scenario_vectors(structure, params)
+    mfg_cost, arc_cost = c[:n], c[n:n + m]
+
+    current = structure['current']
+    target = structure['demand'] + params['z'] * structure['safety_unit']
+    surplus = np.maximum(current - target, 0)
+    deficit = np.maximum(target - current, 0)
+
+    # Surplus goes first to stores whose deficits exceed their manufacturing capacity
+    src, dst = structure['src'], structure['dst']
+    store_index = structure['store_index']
+    n_stores = len(structure['stores'])
+    over_capacity = np.bincount(store_index, weights=deficit, minlength=n_stores) > params['mfg_capacity']
+    usable = np.flatnonzero((surplus[src] > TOLERANCE) & (deficit[dst] > TOLERANCE) & (arc_cost < mfg_cost[dst]))
+    t, rounds = _fill_transfers(structure, surplus, deficit, arc_cost, usable, urgent=over_capacity[store_index])
+
+    # Capacity repair: a store with spare capacity ships its own stock to a store whose
+    # deficits exceed its capacity and manufactures the same amount to replace it
+    store_total = np.bincount(store_index, weights=deficit, minlength=n_stores)
+    excess = np.maximum(store_total - params['mfg_capacity'], 0)
+    x = np.zeros(n)
+    if (excess > TOLERANCE).any():
+        store_spare = np.maximum(params['mfg_capacity'] - store_total, 0)
+        ship_limit = current - np.bincount(src, weights=t, minlength=n)
+        live = np.flatnonzero((deficit[dst] > TOLERANCE) & (excess[store_index[dst]] > TOLERANCE)
+                              & (ship_limit[src] > TOLERANCE) & (store_spare[store_index[src]] > TOLERANCE))
+        repair, repair_rounds = _fill_transfers(structure, ship_limit, deficit, mfg_cost[src] + arc_cost, live,
+                                                store_spare=store_spare, store_need=excess)
+        t += repair
+        x += np.bincount(src, weights=repair, minlength=n)
+        rounds += repair_rounds
+
+    # Manufacture the rest at the destination store, scaled down where still over capacity
+    store_total = np.bincount(store_index, weights=deficit, minlength=n_stores)
+    scale = np.minimum(1, params['mfg_capacity'] / np.maximum(store_total, TOLERANCE))
+    made = deficit * scale[store_index]
+    x += made
+    deficit -= made
+    shortfall = float(deficit.sum())
+
+    final_inv = (current + x
+                 + np.bincount(dst, weights=t, minlength=n)
+                 - np.bincount(src, weights=t, minlength=n))
+    solution = np.concatenate([x, t, final_inv])
+    return {
+        'status': 'Infeasible' if shortfall > 1e-6 else 'Feasible',
+        'x': solution,
+        'objective': float(c @ solution),
+        'costs': solution_costs(structure, c, solution),
+        'shortfall': shortfall,
+        'rounds': rounds,
+        'row_duals': None,
+        'reduced_costs': None,
+        'backend': 'greedy',
+        'solve_seconds': time.perf_counter() - start,
+    }
+
+
+def cost_gap(heuristic_objective, lp_objective):
+    """Relative excess cost of the greedy plan over the LP optimum, in percent."""
+    return 100 * (heuristic_objective - lp_objective) / abs(lp_objective) if lp_objective else 0.0
@@ -0,0 +1,151 @@
+"""
+Sparse matrix form of the inventory LP in optimization.py.
+
+The constraint matrix only depends on which (store, product) pairs exist, so it is
+built once and shared; a scenario only changes the cost vector and right-hand sides.
+
+Variable layout:  [ x (n_pairs) | t (n_arcs) | final_inv (n_pairs) ]
+
+Rows:
+  A_eq  balance    final_inv - x - Σ t_in + Σ t_out = current
+  A_ub  demand     -final_inv                        <= -(demand_7d + z × safety_unit)
+        transfer   Σ t_out                           <= current
+        capacity   Σ x over the store's products     <= mfg_capacity
+
+structure_lp stacks both blocks into the row-bounded form solved by solvers.py.
+Functions here take a complete parameter dict (see optimization.DEFAULT_PARAMS).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from optimization import solvers
+
+# Fallbacks used by optimization.build_lookups when a store has no data
+DEFAULT_SHIPPING_COST = 450
+FALLBACK_TRANSPORT_COST = 5.0
+
+
+def build_structure(demand_df, store_params, transport_matrix):
+    """Index arrays, base data vectors and sparse constraint matrices for the pair table."""
+    store_ids = demand_df['store_id'].to_numpy()
+    product_ids = demand_df['product_id'].to_numpy()
+    n = len(demand_df)
+
+    stores = np.unique(store_ids)
+    store_index = np.searchsorted(stores, store_ids)
+
+    # Transfer arcs: every ordered pair of distinct stores that both carry the product
+    side = pd.DataFrame({'src': np.arange(n), 'product_id': product_ids})
+    arcs = side.merge(side.rename(columns={'src': 'dst'}), on='product_id')
+    arcs = arcs[arcs['src'] != arcs['dst']]
+    src = arcs['src'].to_numpy()
+    dst = arcs['dst'].to_numpy()
+    m = len(src)
+
+    from_store, to_store = store_ids[src], store_ids[dst]
+    in_matrix = (from_store < transport_matrix.shape[0]) & (to_store < transport_matrix.shape[1])
+    transport_raw = np.full(m, np.nan)
+    transport_raw[in_matrix] = transport_matrix[from_store[in_matrix], to_store[in_matrix]]
+
+    shipping = store_params.set_index('store_id')['shipping_costs_mean']
+    mfg_factor = 1 + shipping.reindex(stores).fillna(DEFAULT_SHIPPING_COST).to_numpy() / 1000
+
+    # Safety stock without the z-score, so scenarios can rescale the service level
+    # (prepare_demand supplies it directly when targets come from forecast quantiles)
+    if 'safety_unit' in demand_df.columns:
+        safety_unit = demand_df['safety_unit'].to_numpy(dtype=float)
+    else:
+        safety_unit = (
+            demand_df['demand_std'] * np.sqrt(demand_df['lead_time_days_mean']) * demand_df['risk_factor']
+        ).to_numpy()
+
+    x_cols = np.arange(n)
+    t_cols = n + np.arange(m)
+    f_cols = n + m + np.arange(n)
+
+    a_eq = sparse.csr_matrix(
+        (
+            np.concatenate([np.ones(n), -np.ones(n), -np.ones(m), np.ones(m)]),
+            (np.concatenate([x_cols, x_cols, dst, src]), np.concatenate([f_cols, x_cols, t_cols, t_cols])),
+        ),
+        shape=(n, 2 * n + m),
+    )
+    a_ub = sparse.csr_matrix(
+        (
+            np.concatenate([-np.ones(n), np.ones(m), np.ones(n)]),
+            (np.concatenate([x_cols, n + src, 2 * n + store_index]), np.concatenate([f_cols, t_cols, x_cols])),
+        ),
+        shape=(2 * n + len(stores), 2 * n + m),
+    )
+
+    return {
+        'store_id': store_ids,
+        'product_id': product_ids,
+        'stores': stores,
+        'store_index': store_index,
+        'src': src,
+        'dst': dst,
+        'n_pairs': n,
+        'n_arcs': m,
+        'current': demand_df['current_inventory'].to_numpy(dtype=float),
+        'demand': demand_df['total_demand_7d'].to_numpy(dtype=float),
+        'safety_unit': safety_unit,
+        'mfg_factor': mfg_factor,
+        'transport_raw': transport_raw,
+        'a_eq': a_eq,
+        'a_ub': a_ub,
+    }
+
+
+def scenario_vectors(structure, params):
+    """Return (c, b_ub, b_eq) for a parameter set; the matrices are untouched."""
+    n = structure['n_pairs']
+
+    mfg_cost = params['mfg_base'] * structure['mfg_factor'][structure['store_index']]
+    raw = structure['transport_raw']
+    transport_cost = np.where(np.isnan(raw), FALLBACK_TRANSPORT_COST, raw * params['transport_scale'])
+    c = np.concatenate([mfg_cost, transport_cost, np.full(n, params['holding_cost'])])
+
+    target = structure['demand'] + params['z'] * structure['safety_unit']
+    b_ub = np.concatenate([-target, structure['current'], np.full(len(structure['stores']), params['mfg_capacity'])])
+    return c, b_ub, structure['current']
+
+
+def structure_lp(structure, params):
+    """Row-bounded LP (see solvers.make_lp): balance rows first, then the A_ub rows."""
+    c, b_ub, b_eq = scenario_vectors(structure, params)
+    return solvers.make_lp(
+        c, sparse.vstack([structure['a_eq'], structure['a_ub']]).tocsr(),
+        np.concatenate([b_eq, np.full(len(b_ub), -np.inf)]),
+        np.concatenate([b_eq, b_ub]),
+    )
+
+
+def split_solution(structure, solution):
+    """Return (x, t, final_inv) slices of a solution vector."""
+    n, m = structure['n_pairs'], structure['n_arcs']
+    return solution[:n], solution[n:n + m], solution[n + m:]
+
+
+def solution_costs(structure, c, solution):
+    weighted = c * solution
+    n, m = structure['n_pairs'], structure['n_arcs']
+    return {
+        'total': float(weighted.sum()),
+        'manufacturing': float(weighted[:n].sum()),
+        'transfer': float(weighted[n:n + m].sum()),
+        'holding': float(weighted[n + m:].sum()),
+    }
+
+
+def solve_structure(structure, params, backend='scipy', time_limit=300):
+    """Solve one scenario with a solvers.py backend; returns status, solution and cost breakdown."""
+    lp = structure_lp(structure, params)
+    res = solvers.solve(lp, backend, time_limit)
+    result = {'status': res['status'], 'backend': backend, 'solve_seconds': res['solve_seconds'],
+              'solution': res['x'], 'row_duals': res['row_duals'], 'costs': None}
+    if res['x'] is not None:
+        result['costs'] = solution_costs(structure, lp['c'], res['x'])
+    return result
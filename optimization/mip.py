@@ -0,0 +1,215 @@
+"""
+Integer shipment lots and fixed route costs on top of the inventory LP.
+
+The LP ships any fraction of a unit on any arc; a real transfer moves whole case packs
+and costs a truck on the route. The MIP keeps the LP rows and adds, per arc a and
+route r = (from_store, to_store):
+
+    t_a = lot_size × k_a,   k_a ≥ 0 integer            whole lots only
+    Σ_{a∈r} t_a ≤ M_r × y_r,   y_r ∈ {0, 1}            a route ships only when opened,
+                                                       paying route_cost once
+    Σ_{a∈r} t_a ≥ min_shipment × y_r                   no token shipments on an open route
+
+M_r is the stock the route's source pairs hold (Σ t_out ≤ current bounds it anyway).
+Manufacturing stays continuous. To keep solve times bounded, solve_mip works in steps:
+
+  1. LP relaxation: the plain LP. Its optimum is a lower bound on the MIP cost, since
+     every MIP plan is an LP plan with extra (non-negative) route costs.
+  2. Variable fixing: routes without LP flow stay closed and their arcs are dropped.
+     By default (fix='arcs') arcs without LP flow on open routes are dropped as well,
+     which leaves a few percent of the arcs and solves in seconds; fix='routes' keeps
+     them, so the MIP can re-route products, at a much longer solve; fix='none' keeps
+     every arc.
+  3. A time-bounded MIP on the reduced model, started from the LP plan rounded down to
+     whole lots (shortfalls re-manufactured), so there is an incumbent from the start.
+     When manufacturing capacity binds, the rounded-down flows may not be replaceable
+     and the reduced model is infeasible although the full one is not; the MIP is then
+     retried with the next wider mode ('arcs' -> 'routes' -> 'none') in the time left.
+
+The result reports the solver's gap on the reduced model and the gap to the LP bound,
+which bounds the distance from the true optimum of the full MIP.
+
+NumPy, SciPy and lp_model are imported by the functions that need them, so the CLI can
+read FIX_MODES / MIP_BACKENDS without loading them.
+"""
+
+import time
+
+from optimization import solvers
+from optimization.solvers import MIP_BACKENDS
+
+FLOW_TOLERANCE = 1e-6
+FIX_MODES = ('arcs', 'routes', 'none')
+
+
+def arc_routes(structure):
+    """Return (route of every arc, (routes, 2) array of from_store / to_store)."""
+    import numpy as np
+
+    store_ids = structure['store_id']
+    pairs = np.column_stack([store_ids[structure['src']], store_ids[structure['dst']]])
+    routes, route_of_arc = np.unique(pairs, axis=0, return_inverse=True)
+    return route_of_arc.ravel(), routes
+
+
+def mip_model(structure, params, arcs, route_of_arc, lot_size=1.0, route_cost=0.0, min_shipment=0.0):
+    """Row-bounded MIP over the arcs in ``arcs``; columns [ x | lots | final_inv | y ].
+
+    Returns (lp, routes) where ``routes`` are the route indexes of the y columns.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    from optimization.lp_model import structure_lp
+
+    n, m = structure['n_pairs'], structure['n_arcs']
+    routes, local_route = np.unique(route_of_arc[arcs], return_inverse=True)
+    k, n_routes = len(arcs), len(routes)
+
+    base = structure_lp(structure, params)
+    cols = np.concatenate([np.arange(n), n + arcs, n + m + np.arange(n)])
+    scale = np.ones(len(cols))
+    scale[n:n + k] = lot_size
+    a = base['a'][:, cols] @ sparse.diags(scale)
+    c = np.concatenate([base['c'][cols] * scale, np.full(n_routes, route_cost)])
+
+    # Route capacity: stock of the distinct source pairs on the route
+    route_src = np.unique(np.column_stack([local_route, structure['src'][arcs]]), axis=0)
+    big_m = np.bincount(route_src[:, 0], weights=structure['current'][route_src[:, 1]], minlength=n_routes)
+
+    lot_cols = n + np.arange(k)
+    y_cols = len(cols) + np.arange(n_routes)
+    flow = (np.full(k, lot_size), (local_route, lot_cols))
+    rows = [sparse.hstack([a, sparse.csr_matrix((a.shape[0], n_routes))]),
+            sparse.csr_matrix((np.r_[flow[0], -big_m], (np.r_[local_route, np.arange(n_routes)], np.r_[lot_cols, y_cols])),
+                              shape=(n_routes, len(c)))]
+    row_lower = [base['row_lower'], np.full(n_routes, -np.inf)]
+    row_upper = [base['row_upper'], np.zeros(n_routes)]
+    if min_shipment > 0:
+        rows.append(sparse.csr_matrix(
+            (np.r_[flow[0], np.full(n_routes, -min_shipment)],
+             (np.r_[local_route, np.arange(n_routes)], np.r_[lot_cols, y_cols])),
+            shape=(n_routes, len(c))))
+        row_lower.append(np.zeros(n_routes))
+        row_upper.append(np.full(n_routes, np.inf))
+
+    integrality = np.zeros(len(c), dtype=bool)
+    integrality[lot_cols] = True
+    integrality[y_cols] = True
+    lp = solvers.make_lp(
+        c, sparse.vstack(rows).tocsr(), np.concatenate(row_lower), np.concatenate(row_upper),
+        col_upper=np.r_[np.full(len(cols), np.inf), np.ones(n_routes)], integrality=integrality,
+    )
+    return lp, routes
+
+
+def rounded_start(structure, params, lp_solution, arcs, route_of_arc, routes, lot_size=1.0, min_shipment=0.0):
+    """LP plan rounded down to whole lots, in mip_model's columns; None if capacity breaks."""
+    import numpy as np
+
+    from optimization.lp_model import split_solution
+
+    n = structure['n_pairs']
+    x, t, _ = split_solution(structure, lp_solution)
+    lots = np.floor(t[arcs] / lot_size + FLOW_TOLERANCE)
+
+    # Close routes whose rounded flow is below the minimum shipment
+    local_route = np.searchsorted(routes, route_of_arc[arcs])
+    route_flow = np.bincount(local_route, weights=lots * lot_size, minlength=len(routes))
+    lots[route_flow[local_route] < max(min_shipment, FLOW_TOLERANCE)] = 0
+    route_flow = np.bincount(local_route, weights=lots * lot_size, minlength=len(routes))
+
+    # Less inflow than the LP planned: manufacture the difference at the destination
+    shipped = lots * lot_size
+    final_inv = (structure['current'] + x
+                 + np.bincount(structure['dst'][arcs], weights=shipped, minlength=n)
+                 - np.bincount(structure['src'][arcs], weights=shipped, minlength=n))
+    target = structure['demand'] + params['z'] * structure['safety_unit']
+    short = np.maximum(target - final_inv, 0)
+    x = x + short
+    if (np.bincount(structure['store_index'], weights=x) > params['mfg_capacity'] + FLOW_TOLERANCE).any():
+        return None
+    return np.concatenate([x, lots, final_inv + short, (route_flow > FLOW_TOLERANCE).astype(float)])
+
+
+def kept_arcs(structure, t, route_of_arc, n_routes, fix):
+    """Indexes of the arcs the MIP keeps under fix mode ``fix`` for LP flows ``t``."""
+    import numpy as np
+
+    if fix == 'none':
+        return np.arange(structure['n_arcs'])
+    if fix == 'routes':
+        has_flow = np.bincount(route_of_arc, weights=t, minlength=n_routes) > FLOW_TOLERANCE
+        return np.flatnonzero(has_flow[route_of_arc])
+    return np.flatnonzero(t > FLOW_TOLERANCE)
+
+
+def solve_mip(structure, params, backend='highs', time_limit=300, lot_size=1.0, route_cost=0.0,
+              min_shipment=0.0, relaxation=None, fix='arcs'):
+    """LP relaxation -> variable fixing -> time-bounded MIP on the reduced model.
+
+    ``relaxation`` is an already solved LP result for the same parameters (skips step 1).
+    ``fix='arcs'`` keeps only the arcs with LP flow, ``fix='routes'`` every arc of a
+    route with LP flow, ``fix='none'`` every arc. An infeasible reduced model is retried
+    with the wider modes after ``fix``, so 'Infeasible' means the full MIP is; the modes
+    tried are listed in ``mip['fix_tried']``, also when no solution was found.
+    Returns a solvers.solve-style result whose ``x`` is in the LP layout [ x | t | final_inv ],
+    so write_outputs takes it unchanged, plus a ``mip`` dict with the lot / route figures.
+    """
+    import numpy as np
+
+    from optimization.lp_model import split_solution, structure_lp
+
+    began = time.perf_counter()
+    if relaxation is None:
+        relaxation = solvers.solve(structure_lp(structure, params), backend, time_limit)
+    if relaxation['x'] is None:
+        return relaxation
+    if fix not in FIX_MODES:
+        raise ValueError(f"Unknown fix mode {fix!r}; expected one of {FIX_MODES}")
+
+    n, m = structure['n_pairs'], structure['n_arcs']
+    t = split_solution(structure, relaxation['x'])[1]
+    route_of_arc, all_routes = arc_routes(structure)
+    tried = []
+    for mode in FIX_MODES[FIX_MODES.index(fix):]:
+        arcs = kept_arcs(structure, t, route_of_arc, len(all_routes), mode)
+        lp, routes = mip_model(structure, params, arcs, route_of_arc, lot_size, route_cost, min_shipment)
+        start = rounded_start(structure, params, relaxation['x'], arcs, route_of_arc, routes, lot_size, min_shipment)
+        remaining = max(time_limit - (time.perf_counter() - began), 1.0)
+        result = solvers.solve(lp, backend, remaining, start=start)
+        tried.append(mode)
+        if result['x'] is not None or result['status'] != 'Infeasible':
+            break
+        print(f"MIP: reduced model infeasible with fix={mode!r}")
+    result['solve_seconds'] = time.perf_counter() - began
+    if result['x'] is None:
+        result['mip'] = {'fix_tried': tried}
+        return result
+
+    k = len(arcs)
+    lots, y = result['x'][n:n + k], result['x'][2 * n + k:]
+    solution = np.zeros(2 * n + m)
+    solution[:n] = result['x'][:n]
+    solution[n + arcs] = np.round(lots) * lot_size
+    solution[n + m:] = result['x'][n + k:2 * n + k]
+
+    # A greedy plan (optimization.optimize's fallback) fixes variables too, but is no bound
+    lp_objective = relaxation.get('objective') if relaxation.get('backend') != 'greedy' else None
+    routes_used = int((y > 0.5).sum())
+    result['x'] = solution
+    result['mip'] = {
+        'lot_size': lot_size,
+        'route_cost': route_cost,
+        'min_shipment': min_shipment,
+        'fix': mode,
+        'fix_tried': tried,
+        'arcs': {'total': m, 'kept': k},
+        'routes': {'total': len(all_routes), 'kept': len(routes), 'used': routes_used},
+        'fixed_route_cost': round(routes_used * route_cost, 2),
+        'solver_gap_pct': None if result.get('mip_gap') is None else round(100 * result['mip_gap'], 3),
+        'lp_objective': None if lp_objective is None else round(lp_objective, 2),
+        'gap_vs_lp_pct': None if not lp_objective else round(100 * (result['objective'] - lp_objective) / lp_objective, 3),
+        'started_from_rounded_lp': start is not None,
+    }
+    return result
@@ -0,0 +1,316 @@
+"""
+Time-indexed (multi-period) version of the inventory model, solved on a rolling horizon.
+
+optimization.py sums day+1..day+7 into one aggregate period, so a transfer arriving on
+day 5 counts as covering day 1 demand. Here every forecast day keeps its own
+inventory balance and decisions only count once they arrive:
+
+    I[k,d] = I[k,d-1] + x[k,d-MFG_LEAD] + Σ_in t[a,d-L[a]] - Σ_out t[a,d] - (D[k,d] - u[k,d])
+    I[k,d] + v[k,d] ≥ safety_stock[k]             (soft, v penalized)
+    Σ_out t[a,d]   ≤ I[k,d-1]                      (ship only what is on hand)
+    Σ_p x[s,p,d]   ≤ mfg_capacity / HORIZON_DAYS   (capacity spread over the horizon)
+    0 ≤ u[k,d] ≤ D[k,d]                            (lost sales, penalized)
+
+Objective: manufacturing + transport + holding per unit-day + stockout and safety penalties.
+
+L[a], the transfer lead of arc a, is the destination store's lead_time_days_mean from
+store_supply_params.csv rounded up to whole days (DEFAULT_TRANSFER_LEAD_DAYS for stores
+without one), or --transfer-lead-days for every arc. A transfer that cannot arrive within
+a window earns that window nothing, so leads of ``window`` days or more plan no transfers;
+the default window is therefore one day longer than the longest lead, up to HORIZON_DAYS.
+
+The horizon is solved in windows of ``window`` days; the first ``step`` days of each
+window are committed, their shipments become fixed pipeline arrivals and the closing
+inventory becomes the next window's opening stock. Every window has the same shape
+(days past the horizon carry zero demand), so the sparse matrix is built once and each
+window only changes bounds. With HiGHS (highspy) the same model object is reused, so
+each window warm-starts from the previous optimal basis; without it the window is
+solved from scratch through scipy.
+
+Run from the repository root:
+    python -m optimization.multiperiod
+    python -m optimization.multiperiod --window 3 --step 1 --mfg-lead-days 2 --transfer-lead-days 1
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from optimization import solvers
+from optimization.lp_model import build_structure, scenario_vectors
+from optimization.optimization import (
+    CSV_OUTPUT_DIR, DEFAULT_PARAMS, MFG_BASE, load_inputs, prepare_demand,
+)
+
+HORIZON_DAYS = 7
+DEFAULT_TRANSFER_LEAD_DAYS = 5  # prepare_demand's lead time for stores without supply params
+MFG_LEAD_DAYS = 1
+STOCKOUT_PENALTY = 4 * MFG_BASE
+SAFETY_PENALTY = 2 * MFG_BASE
+MIN_REPORTED_QTY = 0.01
+
+
+class _WindowModel:
+    """Sparse window LP, built once; ``solve`` takes the bounds that change between windows."""
+
+    def __init__(self, structure, window, params, transfer_lead, mfg_lead):
+        """``transfer_lead`` holds the lead in days of every arc."""
+        n, m, W = structure['n_pairs'], structure['n_arcs'], window
+        n_stores = len(structure['stores'])
+        src, dst, store_index = structure['src'], structure['dst'], structure['store_index']
+        self.n, self.m, self.W = n, m, W
+
+        # Column blocks, entity-major: col = offset + entity * W + day
+        self.off = {'x': 0, 't': n * W, 'I': (n + m) * W, 'u': (2 * n + m) * W, 'v': (3 * n + m) * W}
+        self.n_cols = (4 * n + m) * W
+        col = lambda block, entity, day: self.off[block] + entity * W + day
+
+        days = np.arange(W)
+        k_d = np.repeat(np.arange(n), W), np.tile(days, n)  # (pair, day) for every pair-day
+        a_d = np.repeat(np.arange(m), W), np.tile(days, m)  # (arc, day) for every arc-day
+        row_kd = lambda base, k, d: base + k * W + d
+
+        rows, cols, vals = [], [], []
+
+        def add(r, c, v):
+            rows.append(r)
+            cols.append(c)
+            vals.append(np.broadcast_to(v, r.shape))
+
+        # Balance rows [0, nW): I_d - I_{d-1} - x_{d-Lm} - t_in_{d-Lt} + t_out_d - u_d = pipeline_d - D_d
+        k, d = k_d
+        add(row_kd(0, k, d), col('I', k, d), 1.0)
+        prev = d > 0
+        add(row_kd(0, k[prev], d[prev]), col('I', k[prev], d[prev] - 1), -1.0)
+        ok = d >= mfg_lead
+        add(row_kd(0, k[ok], d[ok]), col('x', k[ok], d[ok] - mfg_lead), -1.0)
+        add(row_kd(0, k, d), col('u', k, d), -1.0)
+        a, d_a = a_d
+        ok = d_a >= transfer_lead[a]
+        add(row_kd(0, dst[a[ok]], d_a[ok]), col('t', a[ok], d_a[ok] - transfer_lead[a[ok]]), -1.0)
+        add(row_kd(0, src[a], d_a), col('t', a, d_a), 1.0)
+
+        # Safety rows [nW, 2nW): I_d + v_d >= safety_stock
+        add(row_kd(n * W, k, d), col('I', k, d), 1.0)
+        add(row_kd(n * W, k, d), col('v', k, d), 1.0)
+
+        # Transfer-limit rows [2nW, 3nW): Σ t_out_d - I_{d-1} <= 0 (opening stock on day 0)
+        add(row_kd(2 * n * W, src[a], d_a), col('t', a, d_a), 1.0)
+        add(row_kd(2 * n * W, k[prev], d[prev]), col('I', k[prev], d[prev] - 1), -1.0)
+
+        # Capacity rows [3nW, 3nW + n_stores W): Σ x over the store's products <= daily capacity
+        add(row_kd(3 * n * W, store_index[k], d), col('x', k, d), 1.0)
+
+        self.n_rows = 3 * n * W + n_stores * W
+        self.a = sparse.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(self.n_rows, self.n_cols),
+        )
+
+        c, _, _ = scenario_vectors(structure, params)
+        per_day = lambda v: np.repeat(v, W)
+        self.c = np.concatenate([
+            per_day(c[:n]),
+            per_day(c[n:n + m]),
+            np.full(n * W, params['holding_cost'] / HORIZON_DAYS),
+            np.full(n * W, params.get('stockout_penalty', STOCKOUT_PENALTY)),
+            np.full(n * W, params.get('safety_penalty', SAFETY_PENALTY)),
+        ])
+        self.capacity = params['mfg_capacity'] / HORIZON_DAYS
+        self._highs = None
+
+    def bounds(self, demand, pipeline, opening, safety):
+        """Row and column bounds for one window; demand/pipeline are (n, W), opening/safety (n,)."""
+        n, W = self.n, self.W
+        row_lo = np.concatenate([
+            (pipeline - demand).ravel(),
+            np.repeat(safety, W),
+            np.full(n * W, -np.inf),
+            np.full(self.n_rows - 3 * n * W, -np.inf),
+        ])
+        row_up = row_lo.copy()
+        row_up[n * W:2 * n * W] = np.inf
+        limit = np.zeros((n, W))
+        limit[:, 0] = opening
+        row_up[2 * n * W:3 * n * W] = limit.ravel()
+        row_up[3 * n * W:] = self.capacity
+        # Opening stock enters day-0 balance as a constant
+        row_lo[0:n * W:W] += opening
+        row_up[0:n * W:W] += opening
+
+        col_lo = np.zeros(self.n_cols)
+        col_up = np.full(self.n_cols, np.inf)
+        col_up[self.off['u']:self.off['v']] = demand.ravel()
+        return row_lo, row_up, col_lo, col_up
+
+    def solve(self, row_lo, row_up, col_lo, col_up):
+        """Return (status, solution); reuses the HiGHS model so later windows warm-start."""
+        try:
+            import highspy  # noqa: F401
+        except ImportError:
+            return self._solve_scipy(row_lo, row_up, col_lo, col_up)
+
+        if self._highs is None:
+            self._highs = solvers.highs_model(solvers.make_lp(self.c, self.a, row_lo, row_up, col_lo, col_up))
+        else:
+            h = self._highs
+            h.changeRowsBounds(self.n_rows, np.arange(self.n_rows, dtype=np.int32), row_lo, row_up)
+            h.changeColsBounds(self.n_cols, np.arange(self.n_cols, dtype=np.int32), col_lo, col_up)
+        res = solvers.run_highs(self._highs)
+        return res['status'], res['x']
+
+    def _solve_scipy(self, row_lo, row_up, col_lo, col_up):
+        res = solvers.solve(solvers.make_lp(self.c, self.a, row_lo, row_up, col_lo, col_up), 'scipy')
+        return res['status'], res['x']
+
+    def block(self, solution, name, entities):
+        start = self.off[name]
+        return solution[start:start + entities * self.W].reshape(entities, self.W)
+
+
+def transfer_lead_days(structure, store_params, default=DEFAULT_TRANSFER_LEAD_DAYS):
+    """Lead of every arc in whole days: its destination store's lead_time_days_mean, rounded up."""
+    lead = store_params.set_index('store_id')['lead_time_days_mean'].reindex(structure['stores'])
+    store_lead = np.ceil(lead.fillna(default).to_numpy()).astype(int)
+    return store_lead[structure['store_index'][structure['dst']]]
+
+
+def solve_rolling_horizon(demand_df, store_params, transport_matrix, params=None, window=None, step=1,
+                          transfer_lead=None, mfg_lead=MFG_LEAD_DAYS,
+                          default_transfer_lead=DEFAULT_TRANSFER_LEAD_DAYS):
+    """Solve the 7-day plan window by window; returns a dict of per-day result frames and totals.
+
+    ``transfer_lead`` (days) applies to every arc; by default each arc takes its destination
+    store's lead time (see transfer_lead_days). ``window`` defaults to the longest lead
+    plus one day, so transfers on every arc can land inside it, capped at HORIZON_DAYS.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    structure = build_structure(demand_df, store_params, transport_matrix)
+    n, m = structure['n_pairs'], structure['n_arcs']
+    dst = structure['dst']
+    if transfer_lead is None:
+        transfer_lead = transfer_lead_days(structure, store_params, default_transfer_lead)
+    else:
+        transfer_lead = np.full(m, int(transfer_lead))
+    if window is None:
+        window = int(min(transfer_lead.max(initial=0) + 1, HORIZON_DAYS))
+    if not 1 <= step <= window:
+        raise ValueError("step must be between 1 and window")
+
+    model = _WindowModel(structure, window, params, transfer_lead, mfg_lead)
+    lead_pad = window + max(transfer_lead.max(initial=0), mfg_lead)
+    daily_demand = np.zeros((n, HORIZON_DAYS + lead_pad))
+    daily_demand[:, :HORIZON_DAYS] = demand_df[[f'day+{i}' for i in range(1, HORIZON_DAYS + 1)]].to_numpy()
+    pipeline = np.zeros_like(daily_demand)
+    safety = params['z'] * structure['safety_unit']
+    opening = structure['current'].copy()
+
+    plan = {key: np.zeros((size, HORIZON_DAYS)) for key, size in
+            [('x', n), ('t', m), ('I', n), ('u', n), ('v', n)]}
+    windows = []
+    for d0 in range(0, HORIZON_DAYS, step):
+        days = slice(d0, d0 + window)
+        bounds = model.bounds(daily_demand[:, days], pipeline[:, days], opening, safety)
+        status, solution = model.solve(*bounds)
+        windows.append({'start_day': d0 + 1, 'status': status})
+        if solution is None:
+            raise RuntimeError(f"Window starting day {d0 + 1} not solved: {status}")
+
+        commit = min(step, HORIZON_DAYS - d0)
+        blocks = {key: model.block(solution, key, plan[key].shape[0]) for key in plan}
+        for key, values in blocks.items():
+            plan[key][:, d0:d0 + commit] = values[:, :commit]
+
+        # Committed shipments arrive later as fixed pipeline inflows
+        for w in range(commit):
+            np.add.at(pipeline, (dst, d0 + w + transfer_lead), blocks['t'][:, w])
+            pipeline[:, d0 + w + mfg_lead] += blocks['x'][:, w]
+        # Pipeline already counted in this window's balance rows up to the committed days
+        pipeline[:, d0:d0 + commit] = 0
+        opening = blocks['I'][:, commit - 1]
+
+    result = _plan_frames(structure, model, plan, daily_demand[:, :HORIZON_DAYS], transfer_lead, windows)
+    result['transfer_lead'] = transfer_lead
+    result['window'] = window
+    return result
+
+
+def _plan_frames(structure, model, plan, demand, transfer_lead, windows):
+    n, W = structure['n_pairs'], HORIZON_DAYS
+    store_id, product_id = structure['store_id'], structure['product_id']
+    src, dst = structure['src'], structure['dst']
+    day = np.tile(np.arange(1, W + 1), n)
+
+    inventory = pd.DataFrame({
+        'store_id': np.repeat(store_id, W), 'product_id': np.repeat(product_id, W), 'day': day,
+        'demand': demand.ravel(), 'inventory': plan['I'].ravel(),
+        'shortfall': plan['u'].ravel(), 'safety_gap': plan['v'].ravel(),
+    })
+
+    k, d = np.nonzero(plan['x'] > MIN_REPORTED_QTY)
+    manufacturing = pd.DataFrame({
+        'store_id': store_id[k], 'product_id': product_id[k], 'day': d + 1, 'qty': plan['x'][k, d],
+    })
+
+    a, d = np.nonzero(plan['t'] > MIN_REPORTED_QTY)
+    transfers = pd.DataFrame({
+        'from_store': store_id[src[a]], 'to_store': store_id[dst[a]], 'product_id': product_id[src[a]],
+        'ship_day': d + 1, 'arrive_day': d + 1 + transfer_lead[a], 'qty': plan['t'][a, d],
+    })
+
+    c = model.c
+    cost_of = lambda key: float((c[model.off[key]:model.off[key] + plan[key].shape[0] * model.W]
+                                 .reshape(-1, model.W)[:, 0] * plan[key].sum(axis=1)).sum())
+    costs = {
+        'manufacturing': cost_of('x'), 'transfer': cost_of('t'), 'holding': cost_of('I'),
+        'stockout_penalty': cost_of('u'), 'safety_penalty': cost_of('v'),
+    }
+    costs['total'] = sum(costs.values())
+    return {'inventory': inventory, 'manufacturing': manufacturing, 'transfers': transfers,
+            'costs': costs, 'windows': windows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--window', type=int, default=None,
+                        help=f'days per rolling window (default: longest transfer lead + 1, at most {HORIZON_DAYS})')
+    parser.add_argument('--step', type=int, default=1, help='days committed per window')
+    parser.add_argument('--mfg-lead-days', type=int, default=MFG_LEAD_DAYS,
+                        help=f'days from production to stock (default: {MFG_LEAD_DAYS})')
+    parser.add_argument('--transfer-lead-days', type=int, default=None,
+                        help="transfer lead for every arc (default: the destination store's lead_time_days_mean, "
+                             "rounded up)")
+    parser.add_argument('--default-transfer-lead-days', type=int, default=DEFAULT_TRANSFER_LEAD_DAYS,
+                        help=f'transfer lead for stores without supply params (default: {DEFAULT_TRANSFER_LEAD_DAYS})')
+    args = parser.parse_args()
+
+    forecast, historical, store_params, transport_matrix = load_inputs()
+    demand_df = prepare_demand(forecast, historical, store_params)
+
+    result = solve_rolling_horizon(demand_df, store_params, transport_matrix, window=args.window, step=args.step,
+                                   transfer_lead=args.transfer_lead_days, mfg_lead=args.mfg_lead_days,
+                                   default_transfer_lead=args.default_transfer_lead_days)
+    print(f"Rolling horizon: {HORIZON_DAYS} days, window {result['window']}, step {args.step}, "
+          f"manufacturing lead {args.mfg_lead_days}d")
+    leads = result['transfer_lead']
+    if leads.size:
+        print(f"Transfer leads: {leads.min()}-{leads.max()} days")
+        if leads.min() >= result['window']:
+            print(f"  No transfer can arrive within a {result['window']}-day window; use a longer --window to plan them")
+    for w in result['windows']:
+        print(f"  Window from day {w['start_day']}: {w['status']}")
+    for name, value in result['costs'].items():
+        print(f"{name:<17} ${value:>12,.2f}")
+    print(f"Unmet demand:     {result['inventory']['shortfall'].sum():,.1f} units")
+
+    os.makedirs(CSV_OUTPUT_DIR, exist_ok=True)
+    for name in ('inventory', 'manufacturing', 'transfers'):
+        result[name].round(3).to_csv(f'{CSV_OUTPUT_DIR}/multiperiod_{name}.csv', index=False)
+    print(f"CSV outputs saved to {CSV_OUTPUT_DIR}/")
+
+
+if __name__ == '__main__':
+    main()
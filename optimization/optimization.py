@@ -1,133 +1,196 @@
 """
 Inventory Optimization Model
 Minimizes total cost (manufacturing + transfer + holding) while meeting demand + safety stock.
+
+Run from the repository root:
+    python -m optimization.optimization [--solver cbc|highs|scipy|glop|greedy]
+    python -m optimization.optimization --output-format ndjson --compression gzip
+    python -m optimization.optimization --forecast demand-forecast/output/product_forecasts_full_wide.csv
+    python -m optimization.optimization --solver highs --mip --lot-size 6 --route-cost 25
 """
 
-import pandas as pd
-import numpy as np
+import argparse
 import json
 import os
-from pulp import *
 import warnings
 warnings.filterwarnings('ignore')
 
+# pandas, NumPy, SciPy and the model modules are imported by the functions that use them,
+# so --help and importers that only need constants (service, scenarios) start quickly
+from optimization.mip import FIX_MODES, MIP_BACKENDS
+from optimization.outputs import CHUNK_ROWS, FORMATS, TableWriter
+from optimization.solvers import BACKENDS
+from nlp.scenario_io import write_records
+from telemetry.metrics import count, gauge, stage
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FORECAST_PATH = os.path.join(BASE_DIR, '..', 'demand-forecast', 'output', 'product_forecasts_wide.csv')
+FORECAST_CUBE_DIR = os.path.join(BASE_DIR, '..', 'demand-forecast', 'output', 'forecast_cube')
+QUANTILE_FORECAST_PATH = os.path.join(BASE_DIR, '..', 'demand-forecast', 'output', 'product_forecast_quantiles_7d.csv')
+INPUT_DIR = os.path.join(BASE_DIR, 'input')
+CSV_OUTPUT_DIR = os.path.join(BASE_DIR, 'output-csv')
+JSON_OUTPUT_DIR = os.path.join(BASE_DIR, 'output-json')
+
+SOLVER_CHOICES = (*BACKENDS, 'greedy')  # greedy: the heuristic plan alone, no LP
+SCENARIO_NAME = "optimization_run"
+MIN_REPORTED_QTY = 0.01  # smaller solution values are solver noise, not decisions
+# Columns of the decision tables, also written when a table has no rows
+MANUFACTURING_COLUMNS = ('store_id', 'product_id', 'qty', 'cost', 'reason_codes')
+TRANSFER_COLUMNS = ('from_store', 'to_store', 'product_id', 'qty', 'cost', 'stockout_before',
+                    'stockout_after', 'reason_codes')
+INVENTORY_COLUMNS = ('store_id', 'product_id', 'current', 'final', 'target')
+
 # Thresholds for reason codes
 THRESHOLDS = {'high_cv': 0.7, 'high_delay_prob': 0.5, 'capacity_ratio': 0.9}
 
+# Cost parameters
+Z_95 = 1.65  # 95% service level
+MFG_BASE = 50
+HOLDING_COST = 1.0
+TRANSPORT_SCALE = 0.1
+MFG_CAPACITY = 5000
+
+# Scenario parameters; scenario runs override any subset of these
+DEFAULT_PARAMS = {
+    'mfg_base': MFG_BASE,
+    'holding_cost': HOLDING_COST,
+    'transport_scale': TRANSPORT_SCALE,
+    'mfg_capacity': MFG_CAPACITY,
+    'z': Z_95,
+}
+
 
 def assign_transfer_reasons(i, j, p, qty, data):
     """Assign reason codes for a transfer decision."""
     reasons = []
-    
+
     current_dest = data['inv'].get((j, p), 0)
     demand_dest = data['demand'].get((j, p), 0)
     target_dest = demand_dest + data['safety'].get((j, p), 0)
     current_src = data['inv'].get((i, p), 0)
     target_src = data['demand'].get((i, p), 0) + data['safety'].get((i, p), 0)
-    
+
     # Stockout risk at destination
     if current_dest < demand_dest:
         reasons.append("projected_stockout_at_destination")
-    
+
     # Excess at source
     if current_src > target_src:
         reasons.append("excess_inventory_at_source")
-    
+
     # Safety stock violation prevented
     if current_dest < data['safety'].get((j, p), 0):
         reasons.append("safety_stock_violation_prevented")
-    
+
     # High demand variability at destination
     cv = data['cv'].get((j, p), 0)
     if cv > THRESHOLDS['high_cv']:
         reasons.append("high_demand_variability")
-    
+
     # High delay probability at destination
     delay = data['delay'].get(j, 0)
     if delay > THRESHOLDS['high_delay_prob']:
         reasons.append("high_delay_probability")
-    
+
     # Transfer cheaper than manufacturing
     if data['transport'].get((i, j), 999) < data['mfg'].get(j, 999):
         reasons.append("transport_cost_acceptable")
-    
+
     return reasons if reasons else ["rebalance_inventory"]
 
 
 def assign_manufacturing_reasons(s, p, qty, data, store_mfg_total):
     """Assign reason codes for a manufacturing decision."""
     reasons = []
-    
+
     current = data['inv'].get((s, p), 0)
     demand = data['demand'].get((s, p), 0)
     safety = data['safety'].get((s, p), 0)
-    
+
     # Demand exceeds inventory
     if current < demand:
         reasons.append("manufacture_to_avoid_stockout")
-    
+
     # Safety stock replenishment
     if current < safety:
         reasons.append("safety_stock_violation_prevented")
-    
+
     # High variability
     cv = data['cv'].get((s, p), 0)
     if cv > THRESHOLDS['high_cv']:
         reasons.append("high_demand_variability")
-    
+
     # High delay probability
     delay = data['delay'].get(s, 0)
     if delay > THRESHOLDS['high_delay_prob']:
         reasons.append("high_delay_probability")
-    
-    # Capacity constrained
-    if store_mfg_total.get(s, 0) > THRESHOLDS['capacity_ratio'] * data['capacity']:
+
+    # Capacity constrained: binding capacity row when duals are available, else the utilization heuristic
+    binding = data.get('capacity_binding')
+    if binding is not None:
+        constrained = s in binding
+    else:
+        constrained = store_mfg_total.get(s, 0) > THRESHOLDS['capacity_ratio'] * data['capacity']
+    if constrained:
         reasons.append("manufacturing_capacity_constrained")
-    
+
     return reasons if reasons else ["aggregate_demand_exceeds_inventory"]
 
 
-def save_json_outputs(transfers, manufacturing, costs, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # 1. Transfer recommendations
-    transfer_json = {"scenario": "optimization_run", "transfers": transfers}
-    with open(f'{output_dir}/transfer_recommendations.json', 'w') as f:
-        json.dump(transfer_json, f, indent=2)
-    
-    # 2. Manufacturing decisions (aggregate by product)
-    mfg_by_product = {}
-    for m in manufacturing:
-        pid = m['product_id']
-        if pid not in mfg_by_product:
-            mfg_by_product[pid] = {'quantity': 0, 'cost': 0, 'reasons': set()}
-        mfg_by_product[pid]['quantity'] += m['quantity']
-        mfg_by_product[pid]['cost'] += m['cost']
-        mfg_by_product[pid]['reasons'].update(m['reason_codes'])
-    
-    mfg_json = {
-        "scenario": "optimization_run",
-        "manufacturing_actions": [
-            {
-                "product_id": str(pid),
-                "manufacture_quantity": round(data['quantity'], 1),
-                "reason_codes": list(data['reasons']),
-                "cost_impact": {"manufacturing_cost": round(data['cost'], 2)}
-            }
-            for pid, data in mfg_by_product.items()
-        ]
-    }
-    with open(f'{output_dir}/manufacturing_decisions.json', 'w') as f:
-        json.dump(mfg_json, f, indent=2)
-    
-    # 3. Scenario summary
+def record_id(prefix, index, total):
+    """T001-style IDs, widened past 999 records so every ID stays the same length."""
+    return f"{prefix}{index + 1:0{max(3, len(str(total)))}d}"
+
+
+def manufacturing_by_product(mfg_df):
+    """Per-product quantity, cost and the union of reason codes, in first-seen order."""
+    totals = mfg_df.groupby('product_id', sort=False).agg(quantity=('qty', 'sum'), cost=('cost', 'sum'))
+    reasons = (
+        mfg_df[['product_id', 'reason_codes']].explode('reason_codes').drop_duplicates()
+        .groupby('product_id', sort=False)['reason_codes'].agg(list)
+    )
+    return totals.join(reasons).reset_index()
+
+
+def manufacturing_json(by_product):
+    for k, r in enumerate(by_product.itertuples(index=False)):
+        yield {
+            "manufacturing_id": record_id("M", k, len(by_product)),
+            "product_id": str(r.product_id),
+            "manufacture_quantity": round(r.quantity, 1),
+            "reason_codes": r.reason_codes,
+            "cost_impact": {"manufacturing_cost": round(r.cost, 2)}
+        }
+
+
+def transfer_json(chunk, offset, total):
+    for k, r in enumerate(chunk.itertuples(index=False), start=offset):
+        yield {
+            'transfer_id': record_id('T', k, total),
+            'from_store': str(r.from_store),
+            'to_store': str(r.to_store),
+            'product_id': str(r.product_id),
+            'quantity': r.qty,
+            'reason_codes': r.reason_codes,
+            'cost_impact': {'transport_cost': r.cost},
+            'service_level_impact': {
+                'baseline_stockout_units': round(r.stockout_before),
+                'post_transfer_stockout_units': round(r.stockout_after),
+                'stockout_reduction_pct': round(1 - r.stockout_after / r.stockout_before, 3) if r.stockout_before else 0.0,
+            },
+        }
+
+
+def save_json_summary(costs, totals, output_dir, solver=None):
+    from nlp.schemas import ScenarioSummary  # pydantic, only needed once outputs are written
+
     scenario_json = {
-        "scenario": "optimization_run",
+        "scenario": SCENARIO_NAME,
         "optimized": {
             "total_cost": round(costs['total'], 2),
-            "total_transfers": len(transfers),
-            "manufacturing_units": round(sum(m['quantity'] for m in manufacturing), 1),
-            "transfer_units": round(sum(t['quantity'] for t in transfers), 1)
+            "total_transfers": totals['transfers'],
+            "manufacturing_units": round(totals['manufacturing_units'], 1),
+            "transfer_units": round(totals['transfer_units'], 1)
         },
         "cost_breakdown": {
             "manufacturing_cost": round(costs['manufacturing'], 2),
@@ -135,100 +198,163 @@ def save_json_outputs(transfers, manufacturing, costs, output_dir):
             "holding_cost": round(costs['holding'], 2)
         }
     }
+    if solver:
+        scenario_json["solver"] = solver
+    ScenarioSummary.model_validate(scenario_json)
     with open(f'{output_dir}/scenario_summary.json', 'w') as f:
         json.dump(scenario_json, f, indent=2)
-    
-    print(f"JSON outputs saved to {output_dir}/")
+
 
 # 1. LOAD DATA
 
-# Demand forecasts (7-day horizon per store-product)
-forecast = pd.read_csv('../demand-forecast/output/product_forecasts_wide.csv')
-forecast['total_demand_7d'] = forecast[[f'day+{i}' for i in range(1, 8)]].sum(axis=1)
-forecast['avg_daily_demand'] = forecast['total_demand_7d'] / 7
+def load_inputs(forecast_path=FORECAST_PATH, input_dir=INPUT_DIR):
+    """Return (forecast, historical, store_params, transport_matrix)."""
+    import pandas as pd
 
-# Historical parameters (for demand_std, safety stock calculation)
-historical = pd.read_csv('input/processed_store_product_params.csv')
+    from forecasting.cube import MANIFEST, ForecastCube, is_current
 
-# Store supply parameters (lead times, delay probability)
-store_params = pd.read_csv('input/store_supply_params.csv')
+    # Demand forecasts (7-day horizon per store-product); a forecast cube directory
+    # (forecasting/cube.py) is memory-mapped instead of parsed, and is preferred once built
+    # from the current CSV
+    if forecast_path == FORECAST_PATH and os.path.exists(os.path.join(FORECAST_CUBE_DIR, MANIFEST)):
+        if is_current(FORECAST_CUBE_DIR, FORECAST_PATH):
+            forecast_path = FORECAST_CUBE_DIR
+        else:
+            print(f'Forecast cube {FORECAST_CUBE_DIR} was not built from the current {FORECAST_PATH}; '
+                  'reading the CSV (rebuild with: python -m forecasting.cube build)')
+    if os.path.isdir(forecast_path):
+        forecast = ForecastCube.open(forecast_path).pair_frame(total_days=7)
+        forecast = forecast.rename(columns={'total': 'total_demand_7d'})
+    else:
+        forecast = pd.read_csv(forecast_path)
 
-# Transport cost matrix (store-to-store)
-transport_matrix = pd.read_csv('input/transport_cost_matrix.csv', index_col=0).values
+    # Historical parameters (for demand_std, safety stock calculation)
+    # (Parquet from EDA/preprocess.py when present, else the notebook's CSV)
+    params_path = f'{input_dir}/processed_store_product_params'
+    if os.path.exists(f'{params_path}.parquet'):
+        historical = pd.read_parquet(f'{params_path}.parquet')
+    else:
+        historical = pd.read_csv(f'{params_path}.csv')
 
-# 2. PREPARE DATA
+    # Store supply parameters (lead times, delay probability)
+    store_params = pd.read_csv(f'{input_dir}/store_supply_params.csv')
 
-# Merge demand with historical std
-demand_df = forecast.merge(
-    historical[['store_id', 'product_id', 'demand_std', 'city_id']],
-    on=['store_id', 'product_id'], how='left'
-)
-demand_df['demand_std'] = demand_df['demand_std'].fillna(demand_df['avg_daily_demand'] * 0.5)
-demand_df['city_id'] = demand_df['city_id'].fillna(0).astype(int)
-
-# Add supply chain params
-demand_df = demand_df.merge(
-    store_params[['store_id', 'lead_time_days_mean', 'delay_probability_mean']],
-    on='store_id', how='left'
-)
-demand_df['lead_time_days_mean'] = demand_df['lead_time_days_mean'].fillna(5)
-demand_df['delay_probability_mean'] = demand_df['delay_probability_mean'].fillna(0.7)
-
-# Simulate current inventory (in production: from inventory system)
-np.random.seed(42)
-if 'current_inventory' in historical.columns:
-    inv_lookup = historical.set_index(['store_id', 'product_id'])['current_inventory'].to_dict()
-    demand_df['current_inventory'] = demand_df.apply(
-        lambda r: inv_lookup.get((r['store_id'], r['product_id']), r['total_demand_7d'] * np.random.uniform(0.3, 0.8)), axis=1
-    )
-else:
-    demand_df['current_inventory'] = demand_df['total_demand_7d'] * np.random.uniform(0.3, 0.8, len(demand_df))
+    # Transport cost matrix (store-to-store)
+    transport_matrix = pd.read_csv(f'{input_dir}/transport_cost_matrix.csv', index_col=0).values
 
-# 3. SAFETY STOCK CALCULATION
-# Formula: SS = z × σ × √L × risk_factor
+    return forecast, historical, store_params, transport_matrix
 
-Z_95 = 1.65  # 95% service level
-demand_df['risk_factor'] = 1 + demand_df['delay_probability_mean']
-demand_df['safety_stock'] = (
-    Z_95 * demand_df['demand_std'] * 
-    np.sqrt(demand_df['lead_time_days_mean']) * 
-    demand_df['risk_factor']
-)
-demand_df['target_inventory'] = demand_df['total_demand_7d'] + demand_df['safety_stock']
 
-# 4. OPTIMIZATION SETUP
+def load_quantile_targets(quantile, path=QUANTILE_FORECAST_PATH):
+    """7-day demand quantile per store-product (forecasting/quantiles.py), as column target_7d."""
+    import pandas as pd
 
-# Only consider valid (store, product) pairs from forecast
-# Forecast already contains top 50 products per store (by total sale_amount)
-stores = sorted(demand_df['store_id'].unique())
-valid_pairs = set(zip(demand_df['store_id'], demand_df['product_id']))
-products_per_store = {s: [p for (s2, p) in valid_pairs if s2 == s] for s in stores}
-n_stores = len(stores)
-n_pairs = len(valid_pairs)
+    quantiles = pd.read_csv(path)
+    return quantiles[['store_id', 'product_id', f'{quantile}_7d']].rename(columns={f'{quantile}_7d': 'target_7d'})
 
-print(f"Scope: {n_stores} stores, {n_pairs} store-product pairs (top 50 products/store)")
 
-# Lookup dictionaries
-demand_lookup = demand_df.set_index(['store_id', 'product_id'])['total_demand_7d'].to_dict()
-safety_lookup = demand_df.set_index(['store_id', 'product_id'])['safety_stock'].to_dict()
-inv_lookup = demand_df.set_index(['store_id', 'product_id'])['current_inventory'].to_dict()
-shipping_lookup = store_params.set_index('store_id')['shipping_costs_mean'].to_dict()
+# 2. PREPARE DATA
 
-# Cost parameters
-MFG_BASE = 50
-HOLDING_COST = 1.0
-TRANSPORT_SCALE = 0.1
-MFG_CAPACITY = 5000
+def prepare_demand(forecast, historical, store_params, z=Z_95, quantile_targets=None):
+    """Build the store-product pair table: demand, variability, supply params, inventory, safety stock.
 
-mfg_cost = {s: MFG_BASE * (1 + shipping_lookup.get(s, 450) / 1000) for s in stores}
+    With ``quantile_targets`` (see load_quantile_targets) the target inventory of each pair is
+    its forecast quantile; pairs missing from it keep the z × σ safety stock.
+    """
+    import numpy as np
+
+    forecast = forecast.copy()
+    if 'total_demand_7d' not in forecast:  # a forecast cube brings its own 7-day totals
+        forecast['total_demand_7d'] = forecast[[f'day+{i}' for i in range(1, 8)]].sum(axis=1)
+    forecast['avg_daily_demand'] = forecast['total_demand_7d'] / 7
+
+    # Merge demand with historical std
+    demand_df = forecast.merge(
+        historical[['store_id', 'product_id', 'demand_std', 'city_id']],
+        on=['store_id', 'product_id'], how='left'
+    )
+    demand_df['demand_std'] = demand_df['demand_std'].fillna(demand_df['avg_daily_demand'] * 0.5)
+    demand_df['city_id'] = demand_df['city_id'].fillna(0).astype(int)
+
+    # Add supply chain params
+    demand_df = demand_df.merge(
+        store_params[['store_id', 'lead_time_days_mean', 'delay_probability_mean']],
+        on='store_id', how='left'
+    )
+    demand_df['lead_time_days_mean'] = demand_df['lead_time_days_mean'].fillna(5)
+    demand_df['delay_probability_mean'] = demand_df['delay_probability_mean'].fillna(0.7)
+
+    # Simulate current inventory (in production: from inventory system)
+    np.random.seed(42)
+    if 'current_inventory' in historical.columns:
+        inv_lookup = historical.set_index(['store_id', 'product_id'])['current_inventory'].to_dict()
+        demand_df['current_inventory'] = demand_df.apply(
+            lambda r: inv_lookup.get((r['store_id'], r['product_id']), r['total_demand_7d'] * np.random.uniform(0.3, 0.8)), axis=1
+        )
+    else:
+        demand_df['current_inventory'] = demand_df['total_demand_7d'] * np.random.uniform(0.3, 0.8, len(demand_df))
+
+    # 3. SAFETY STOCK CALCULATION
+    # Formula: SS = z × σ × √L × risk_factor
+    demand_df['risk_factor'] = 1 + demand_df['delay_probability_mean']
+    demand_df['safety_stock'] = (
+        z * demand_df['demand_std'] *
+        np.sqrt(demand_df['lead_time_days_mean']) *
+        demand_df['risk_factor']
+    )
+    if quantile_targets is not None:
+        target_7d = demand_df[['store_id', 'product_id']].merge(
+            quantile_targets, on=['store_id', 'product_id'], how='left'
+        )['target_7d'].to_numpy()
+        buffer = np.clip(target_7d - demand_df['total_demand_7d'].to_numpy(), 0, None)
+        demand_df['safety_stock'] = np.where(np.isnan(target_7d), demand_df['safety_stock'], buffer)
+        # Per unit of z, like the σ-based buffer, so scenario z overrides still rescale it
+        demand_df['safety_unit'] = demand_df['safety_stock'] / z
+    demand_df['target_inventory'] = demand_df['total_demand_7d'] + demand_df['safety_stock']
+    demand_df['demand_cv'] = (demand_df['demand_std'] / demand_df['avg_daily_demand']).fillna(0.5)
+    return demand_df
+
+
+# 4. OPTIMIZATION SETUP
+
+def build_lookups(demand_df, store_params, transport_matrix, params=None):
+    """Lookup dictionaries and per-store / per-route costs shared by model building and reporting."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+
+    # Only consider valid (store, product) pairs from forecast
+    # (top 50 products per store, or every pair with a full-catalog forecast)
+    stores = sorted(demand_df['store_id'].unique())
+    valid_pairs = set(zip(demand_df['store_id'], demand_df['product_id']))
+    products_per_store = demand_df.groupby('store_id')['product_id'].agg(list).to_dict()
+
+    indexed = demand_df.set_index(['store_id', 'product_id'])
+    shipping_lookup = store_params.set_index('store_id')['shipping_costs_mean'].to_dict()
+
+    mfg_cost = {s: params['mfg_base'] * (1 + shipping_lookup.get(s, 450) / 1000) for s in stores}
+
+    transport_cost = {}
+    for i in stores:
+        for j in stores:
+            if i != j and i < transport_matrix.shape[0] and j < transport_matrix.shape[1]:
+                transport_cost[(i, j)] = transport_matrix[i, j] * params['transport_scale']
+            else:
+                transport_cost[(i, j)] = 0 if i == j else 5.0
+
+    return {
+        'params': params,
+        'stores': stores,
+        'valid_pairs': valid_pairs,
+        'products_per_store': products_per_store,
+        'demand': indexed['total_demand_7d'].to_dict(),
+        'safety': indexed['safety_stock'].to_dict(),
+        'inv': indexed['current_inventory'].to_dict(),
+        'cv': indexed['demand_cv'].to_dict(),
+        'delay': demand_df.groupby('store_id')['delay_probability_mean'].first().to_dict(),
+        'mfg': mfg_cost,
+        'transport': transport_cost,
+        'capacity': params['mfg_capacity'],
+    }
 
-transport_cost = {}
-for i in stores:
-    for j in stores:
-        if i != j and i < transport_matrix.shape[0] and j < transport_matrix.shape[1]:
-            transport_cost[(i, j)] = transport_matrix[i, j] * TRANSPORT_SCALE
-        else:
-            transport_cost[(i, j)] = 0 if i == j else 5.0
 
 # =============================================================================
 # 5. BUILD OPTIMIZATION MODEL
@@ -246,167 +372,293 @@ for i in stores:
 #   2. Meet demand: final_inv ≥ demand + safety_stock
 #   3. Transfer limit: outgoing transfers ≤ current inventory
 #   4. Capacity: total manufacturing per store ≤ MFG_CAPACITY
+#
+# The model is assembled as sparse CSR arrays (lp_model.build_structure) and handed
+# to a solver backend from solvers.py.
 # =============================================================================
 
-model = LpProblem("Inventory_Optimization", LpMinimize)
-
-# Decision variables - only for valid (store, product) pairs
-x = LpVariable.dicts("mfg", list(valid_pairs), lowBound=0)
-final_inv = LpVariable.dicts("final_inv", list(valid_pairs), lowBound=0)
-
-# Transfer variables: only between stores for same product (if product exists at both)
-all_products = set(p for (s, p) in valid_pairs)
-t = LpVariable.dicts("transfer", 
-    [(i, j, p) for i in stores for j in stores for p in all_products 
-     if i != j and (i, p) in valid_pairs and (j, p) in valid_pairs], 
-    lowBound=0)
-
-# Objective: minimize total cost
-model += (
-    lpSum(mfg_cost[s] * x[(s, p)] for (s, p) in valid_pairs) +
-    lpSum(transport_cost.get((i, j), 5) * t[(i, j, p)] 
-          for i in stores for j in stores for p in all_products 
-          if i != j and (i, p) in valid_pairs and (j, p) in valid_pairs) +
-    lpSum(HOLDING_COST * final_inv[(s, p)] for (s, p) in valid_pairs)
-)
-
-# Constraints - only for valid pairs
-for (s, p) in valid_pairs:
-    current = inv_lookup.get((s, p), 0)
-    transfers_in = lpSum(t[(i, s, p)] for i in stores if i != s and (i, p) in valid_pairs and (i, s, p) in t)
-    transfers_out = lpSum(t[(s, j, p)] for j in stores if j != s and (j, p) in valid_pairs and (s, j, p) in t)
-    
-    # 1. Inventory balance
-    model += final_inv[(s, p)] == current + x[(s, p)] + transfers_in - transfers_out
-    
-    # 2. Meet demand + safety stock
-    target = demand_lookup.get((s, p), 0) + safety_lookup.get((s, p), 0)
-    model += final_inv[(s, p)] >= target
-    
-    # 3. Transfer limit
-    model += transfers_out <= current
-
-# 4. Manufacturing capacity per store
-for s in stores:
-    model += lpSum(x[(s, p)] for p in products_per_store[s]) <= MFG_CAPACITY
-
-# 6. SOLVE
-
-print(f"Solving: {n_stores} stores, {n_pairs} store-product pairs")
-status = model.solve(PULP_CBC_CMD(msg=0, timeLimit=300))
-print(f"Status: {LpStatus[status]}")
-
 # 7. EXTRACT RESULTS
-
-# Build data dict for reason code assignment
-demand_df['demand_cv'] = (demand_df['demand_std'] / demand_df['avg_daily_demand']).fillna(0.5)
-cv_lookup = demand_df.set_index(['store_id', 'product_id'])['demand_cv'].to_dict()
-delay_lookup = demand_df.groupby('store_id')['delay_probability_mean'].first().to_dict()
-
-reason_data = {
-    'inv': inv_lookup,
-    'demand': demand_lookup,
-    'safety': safety_lookup,
-    'cv': cv_lookup,
-    'delay': delay_lookup,
-    'transport': transport_cost,
-    'mfg': mfg_cost,
-    'capacity': MFG_CAPACITY
-}
-
-# Calculate total mfg per store for capacity check
-store_mfg_total = {}
-for (s, p) in valid_pairs:
-    qty = value(x[(s, p)])
-    if qty > 0.01:
-        store_mfg_total[s] = store_mfg_total.get(s, 0) + qty
-
-# Manufacturing decisions with reason codes
-mfg_results = []
-for (s, p) in valid_pairs:
-    qty = value(x[(s, p)])
-    if qty > 0.01:
-        reasons = assign_manufacturing_reasons(s, p, qty, reason_data, store_mfg_total)
-        mfg_results.append({
-            'store_id': s, 'product_id': p, 'qty': round(qty, 2),
-            'cost': round(qty * mfg_cost[s], 2), 'reason_codes': reasons
+#
+# Decisions are extracted straight from the solution arrays, transfers and inventory
+# in chunks, so write_outputs can stream them to disk without holding every table.
+
+def manufacturing_frame(lookups, structure, solution, unit_cost):
+    """Manufacturing decisions above MIN_REPORTED_QTY, with reason codes."""
+    import numpy as np
+    import pandas as pd
+
+    x = solution[:structure['n_pairs']]
+    made = np.flatnonzero(x > MIN_REPORTED_QTY)
+    df = pd.DataFrame({
+        'store_id': structure['store_id'][made],
+        'product_id': structure['product_id'][made],
+        'qty': np.round(x[made], 2),
+        'cost': np.round(x[made] * unit_cost[made], 2),
+    })
+
+    # Calculate total mfg per store for capacity check
+    store_mfg_total = pd.Series(x[made]).groupby(df['store_id'].to_numpy()).sum().to_dict()
+    df['reason_codes'] = [
+        assign_manufacturing_reasons(s, p, q, lookups, store_mfg_total)
+        for s, p, q in zip(df['store_id'].tolist(), df['product_id'].tolist(), x[made].tolist())
+    ]
+    return df
+
+
+def transfer_chunks(lookups, structure, solution, unit_cost, chunk_rows=CHUNK_ROWS):
+    """Yield transfer decisions above MIN_REPORTED_QTY as DataFrames of at most ``chunk_rows``."""
+    import numpy as np
+    import pandas as pd
+
+    n, m = structure['n_pairs'], structure['n_arcs']
+    t = solution[n:n + m]
+    arcs = np.flatnonzero(t > MIN_REPORTED_QTY)
+    store_ids, product_ids = structure['store_id'], structure['product_id']
+
+    for start in range(0, len(arcs), chunk_rows):
+        a = arcs[start:start + chunk_rows]
+        src, dst, qty = structure['src'][a], structure['dst'][a], t[a]
+        # Destination shortfall against 7-day demand, without and with this transfer
+        stockout_before = np.maximum(structure['demand'][dst] - structure['current'][dst], 0)
+        df = pd.DataFrame({
+            'from_store': store_ids[src],
+            'to_store': store_ids[dst],
+            'product_id': product_ids[src],
+            'qty': np.round(qty, 2),
+            'cost': np.round(qty * unit_cost[n + a], 2),
+            'stockout_before': np.round(stockout_before, 2),
+            'stockout_after': np.round(np.maximum(stockout_before - qty, 0), 2),
         })
-mfg_df = pd.DataFrame(mfg_results)
-
-# Transfer decisions with reason codes
-transfer_results = []
-for (i, j, p) in t.keys():
-    qty = value(t[(i, j, p)])
-    if qty > 0.01:
-        reasons = assign_transfer_reasons(i, j, p, qty, reason_data)
-        transfer_results.append({
-            'from_store': i, 'to_store': j, 'product_id': p,
-            'qty': round(qty, 2), 'cost': round(qty * transport_cost.get((i, j), 5), 2),
-            'reason_codes': reasons
+        df['reason_codes'] = [
+            assign_transfer_reasons(i, j, p, q, lookups)
+            for i, j, p, q in zip(df['from_store'].tolist(), df['to_store'].tolist(),
+                                  df['product_id'].tolist(), qty.tolist())
+        ]
+        yield df
+
+
+def inventory_chunks(lookups, structure, solution, chunk_rows=CHUNK_ROWS):
+    """Yield current / final / target inventory per pair in chunks."""
+    import numpy as np
+    import pandas as pd
+
+    n, m = structure['n_pairs'], structure['n_arcs']
+    final_inv = solution[n + m:]
+    target = structure['demand'] + lookups['params']['z'] * structure['safety_unit']
+    for start in range(0, n, chunk_rows):
+        sl = slice(start, start + chunk_rows)
+        yield pd.DataFrame({
+            'store_id': structure['store_id'][sl],
+            'product_id': structure['product_id'][sl],
+            'current': np.round(structure['current'][sl], 2),
+            'final': np.round(final_inv[sl], 2),
+            'target': np.round(target[sl], 2),
         })
-transfer_df = pd.DataFrame(transfer_results)
-
-# Final inventory
-inventory_results = [
-    {'store_id': s, 'product_id': p, 
-     'current': round(inv_lookup.get((s, p), 0), 2),
-     'final': round(value(final_inv[(s, p)]), 2),
-     'target': round(demand_lookup.get((s, p), 0) + safety_lookup.get((s, p), 0), 2)}
-    for (s, p) in valid_pairs
-]
-inventory_df = pd.DataFrame(inventory_results)
-
-# 8. COST SUMMARY
-
-total_mfg = sum(value(x[(s, p)]) * mfg_cost[s] for (s, p) in valid_pairs)
-total_transfer = sum(value(t[k]) * transport_cost.get((k[0], k[1]), 5) for k in t.keys())
-total_holding = sum(HOLDING_COST * value(final_inv[(s, p)]) for (s, p) in valid_pairs)
-total_cost = total_mfg + total_transfer + total_holding
-
-print(f"\n{'='*50}")
-print(f"COST BREAKDOWN")
-print(f"{'='*50}")
-print(f"Manufacturing: ${total_mfg:>12,.2f} ({100*total_mfg/total_cost:.1f}%)")
-print(f"Transfer:      ${total_transfer:>12,.2f} ({100*total_transfer/total_cost:.1f}%)")
-print(f"Holding:       ${total_holding:>12,.2f} ({100*total_holding/total_cost:.1f}%)")
-print(f"{'='*50}")
-print(f"TOTAL:         ${total_cost:>12,.2f}")
-print(f"\nManufacturing: {mfg_df['qty'].sum() if len(mfg_df) else 0:,.1f} units")
-print(f"Transfers:     {transfer_df['qty'].sum() if len(transfer_df) else 0:,.1f} units")
 
-# 9. SAVE OUTPUTS
 
-# CSV outputs
-output_dir = 'output-csv'
-os.makedirs(output_dir, exist_ok=True)
-mfg_df.to_csv(f'{output_dir}/optimization_manufacturing.csv', index=False)
-transfer_df.to_csv(f'{output_dir}/optimization_transfers.csv', index=False)
-inventory_df.to_csv(f'{output_dir}/optimization_inventory.csv', index=False)
-print(f"CSV outputs saved to {output_dir}/")
-
-# JSON outputs for NLP layer
-json_output_dir = 'output-json'
-transfers_json = [
-    {
-        'from_store': str(r['from_store']),
-        'to_store': str(r['to_store']),
-        'product_id': str(r['product_id']),
-        'quantity': r['qty'],
-        'reason_codes': r['reason_codes'],
-        'cost_impact': {'transport_cost': r['cost']}
-    }
-    for r in transfer_results
-]
-mfg_json = [
-    {
-        'store_id': r['store_id'],
-        'product_id': r['product_id'],
-        'quantity': r['qty'],
-        'cost': r['cost'],
-        'reason_codes': r['reason_codes']
-    }
-    for r in mfg_results
-]
-costs = {'total': total_cost, 'manufacturing': total_mfg, 'transfer': total_transfer, 'holding': total_holding}
-save_json_outputs(transfers_json, mfg_json, costs, json_output_dir)
+def print_cost_breakdown(costs, manufacturing_units, transfer_units):
+    total_cost = costs['total']
+    print(f"\n{'='*50}")
+    print(f"COST BREAKDOWN")
+    print(f"{'='*50}")
+    print(f"Manufacturing: ${costs['manufacturing']:>12,.2f} ({100*costs['manufacturing']/total_cost:.1f}%)")
+    print(f"Transfer:      ${costs['transfer']:>12,.2f} ({100*costs['transfer']/total_cost:.1f}%)")
+    print(f"Holding:       ${costs['holding']:>12,.2f} ({100*costs['holding']/total_cost:.1f}%)")
+    print(f"{'='*50}")
+    print(f"TOTAL:         ${total_cost:>12,.2f}")
+    print(f"\nManufacturing: {manufacturing_units:,.1f} units")
+    print(f"Transfers:     {transfer_units:,.1f} units")
 
+
+# 9. SAVE OUTPUTS
+
+def write_outputs(lookups, structure, solution, csv_dir=CSV_OUTPUT_DIR, json_dir=JSON_OUTPUT_DIR,
+                  fmt='csv', compression=None, solver=None, chunk_rows=CHUNK_ROWS, fixed_transfer_cost=0.0):
+    """Extract decisions and stream them to the output tables and the NLP JSON files.
+
+    Transfers and inventory are written chunk by chunk as they are extracted; only the
+    (much smaller) manufacturing table is held whole. ``fixed_transfer_cost`` (MIP route
+    costs) is added to the transfer cost. Returns the cost breakdown.
+    """
+    from optimization.lp_model import scenario_vectors, solution_costs, split_solution
+
+    os.makedirs(csv_dir, exist_ok=True)
+    os.makedirs(json_dir, exist_ok=True)
+    unit_cost = scenario_vectors(structure, lookups['params'])[0]
+    costs = solution_costs(structure, unit_cost, solution)
+    costs['transfer'] += fixed_transfer_cost
+    costs['total'] += fixed_transfer_cost
+    table = lambda name, columns: TableWriter(f'{csv_dir}/optimization_{name}', fmt, compression, columns)
+
+    mfg_df = manufacturing_frame(lookups, structure, solution, unit_cost)
+    with table('manufacturing', MANUFACTURING_COLUMNS) as writer:
+        writer.write(mfg_df)
+    write_records(f'{json_dir}/manufacturing_decisions.json', SCENARIO_NAME, 'manufacturing',
+                  manufacturing_json(manufacturing_by_product(mfg_df)))
+
+    t = split_solution(structure, solution)[1]
+    n_transfers = int((t > MIN_REPORTED_QTY).sum())
+    totals = {'transfers': 0, 'transfer_units': 0.0, 'manufacturing_units': float(mfg_df['qty'].sum())}
+
+    def transfer_records(writer):
+        for chunk in transfer_chunks(lookups, structure, solution, unit_cost, chunk_rows):
+            writer.write(chunk)
+            yield from transfer_json(chunk, totals['transfers'], n_transfers)
+            totals['transfers'] += len(chunk)
+            totals['transfer_units'] += float(chunk['qty'].sum())
+
+    with table('transfers', TRANSFER_COLUMNS) as writer:
+        write_records(f'{json_dir}/transfer_recommendations.json', SCENARIO_NAME, 'transfers',
+                      transfer_records(writer))
+    with table('inventory', INVENTORY_COLUMNS) as writer:
+        for chunk in inventory_chunks(lookups, structure, solution, chunk_rows):
+            writer.write(chunk)
+
+    save_json_summary(costs, totals, json_dir, solver)
+    print_cost_breakdown(costs, totals['manufacturing_units'], totals['transfer_units'])
+    print(f"{fmt.upper()} outputs saved to {csv_dir}/")
+    print(f"JSON outputs saved to {json_dir}/")
+    return costs
+
+
+def optimize(lookups, structure, lp, backend='cbc', time_limit=300, csv_dir=CSV_OUTPUT_DIR,
+             json_dir=JSON_OUTPUT_DIR, fmt='csv', compression=None, mip=None):
+    """Solve ``lp``, then write the decision tables, NLP JSON files and sensitivity report.
+
+    The greedy plan (heuristic.py) is computed first: it is the backend's starting
+    solution, the plan that is written when the backend returns none, and the whole
+    answer with ``backend='greedy'``. With ``mip`` (keyword arguments of mip.solve_mip:
+    lot_size, route_cost, min_shipment, fix, time_limit) the LP plan is then turned into
+    whole-lot shipments; when the MIP finds none, the LP (or greedy) plan is written and
+    ``solver.mip.fallback`` says so. Returns the solver result dict, with ``costs`` added
+    when a solution was found.
+    """
+    from optimization import solvers
+    from optimization.heuristic import cost_gap, greedy_plan
+    from optimization.mip import solve_mip
+    from optimization.sensitivity import save_sensitivity, sensitivity_tables
+
+    with stage('heuristic', prefix='optimizer'):
+        plan = greedy_plan(structure, lookups['params'])
+    print(f"Greedy plan: {plan['status']}, ${plan['objective']:,.2f} ({plan['solve_seconds'] * 1000:.1f} ms)")
+    heuristic = {'status': plan['status'], 'objective': round(plan['objective'], 2),
+                 'solve_seconds': round(plan['solve_seconds'], 4)}
+
+    if backend == 'greedy':
+        result = plan if plan['status'] == 'Feasible' else {**plan, 'x': None}
+    else:
+        start = plan['x'] if plan['status'] == 'Feasible' else None
+        with stage('solve', prefix='optimizer'):
+            result = solvers.solve(lp, backend, time_limit=time_limit, start=start)
+        print(f"Status: {result['status']} ({backend}, {result['solve_seconds']:.2f}s)")
+        if result['x'] is not None:
+            heuristic['gap_pct'] = round(cost_gap(plan['objective'], result['objective']), 3)
+            print(f"Greedy plan gap: {heuristic['gap_pct']:+.3f}% vs {backend}")
+        elif start is not None:
+            # Time limit or solver failure: the greedy plan is still a feasible answer
+            print(f"No {backend} solution; writing the greedy plan instead")
+            heuristic['fallback_from'] = {'backend': backend, 'status': result['status']}
+            result = plan
+    if result['x'] is None:
+        return result
+
+    solver_info = {'backend': result['backend'], 'status': result['status'],
+                   'solve_seconds': round(result['solve_seconds'], 3), 'heuristic': heuristic}
+    fixed_transfer_cost = 0.0
+    if mip is not None:
+        mip_backend = backend if backend in MIP_BACKENDS else 'highs'
+        with stage('mip', prefix='optimizer'):
+            mip_result = solve_mip(structure, lookups['params'], mip_backend, relaxation=result, **mip)
+        print(f"MIP: {mip_result['status']} ({mip_backend}, {mip_result['solve_seconds']:.2f}s)")
+        summary = mip_result['mip']
+        solver_info['mip'] = {'backend': mip_backend, 'status': mip_result['status'],
+                              'solve_seconds': round(mip_result['solve_seconds'], 3), **summary}
+        if mip_result['x'] is None:
+            # The continuous plan is still feasible; write it rather than nothing
+            print(f"No MIP solution; writing the {result['backend']} plan instead")
+            solver_info['mip']['fallback'] = result['backend']
+        else:
+            print(f"MIP plan: ${mip_result['objective']:,.2f}, {summary['routes']['used']} routes, "
+                  f"gap {summary['solver_gap_pct']}% (solver), {summary['gap_vs_lp_pct']}% vs LP bound; "
+                  f"{summary['arcs']['kept']:,} of {summary['arcs']['total']:,} arcs kept (fix={summary['fix']})")
+            fixed_transfer_cost = summary['fixed_route_cost']
+            result = mip_result
+
+    sensitivity = None
+    if result['row_duals'] is not None:
+        with stage('sensitivity', prefix='optimizer'):
+            sensitivity = sensitivity_tables(structure, lookups['params'], result['x'],
+                                             result['row_duals'], result['reduced_costs'])
+        capacity_df = sensitivity[0]
+        lookups['capacity_binding'] = set(capacity_df.loc[capacity_df['binding'], 'store_id'])
+
+    # Extraction is streamed into the writers, so one stage covers both
+    with stage('write', prefix='optimizer'):
+        result['costs'] = write_outputs(lookups, structure, result['x'], csv_dir, json_dir, fmt, compression,
+                                        solver=solver_info, fixed_transfer_cost=fixed_transfer_cost)
+        if sensitivity is not None:
+            save_sensitivity(*sensitivity, csv_dir, json_dir)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--solver', choices=SOLVER_CHOICES, default='cbc',
+                        help='LP backend (default: cbc), or greedy for the heuristic plan alone')
+    parser.add_argument('--time-limit', type=float, default=300, help='solver time limit in seconds')
+    parser.add_argument('--target-quantile', choices=('p50', 'p90', 'p95'), default=None,
+                        help='set targets from this 7-day forecast quantile instead of z × σ safety stock')
+    parser.add_argument('--output-format', choices=FORMATS, default='csv', help='table format (default: csv)')
+    parser.add_argument('--compression', default=None,
+                        help='gzip|bz2|xz for csv/ndjson, or a parquet codec (snappy, zstd, ...)')
+    parser.add_argument('--forecast', default=FORECAST_PATH,
+                        help='wide forecast CSV or forecast cube directory (default: top-50 RandomForest forecasts)')
+    mip = parser.add_argument_group('MIP mode', 'whole-lot transfers with fixed route costs (optimization/mip.py)')
+    mip.add_argument('--mip', action='store_true', help='round the LP plan into an integer shipment plan')
+    mip.add_argument('--lot-size', type=float, default=1, help='units per case pack (default: 1)')
+    mip.add_argument('--route-cost', type=float, default=0, help='fixed cost per used (from, to) route')
+    mip.add_argument('--min-shipment', type=float, default=0, help='minimum units on a used route')
+    mip.add_argument('--mip-fix', choices=FIX_MODES, default='arcs',
+                     help='drop arcs without LP flow (arcs, fast), only routes without LP flow (routes) '
+                          'or nothing (none); an infeasible reduced model is retried with the wider modes')
+    mip.add_argument('--mip-time-limit', type=float, default=60, help='MIP time limit in seconds (default: 60)')
+    args = parser.parse_args()
+
+    from optimization.lp_model import build_structure, structure_lp
+
+    with stage('load', prefix='optimizer'):
+        forecast, historical, store_params, transport_matrix = load_inputs(args.forecast)
+    count('optimizer_rows_loaded_total', len(forecast), table='forecast')
+    count('optimizer_rows_loaded_total', len(historical), table='historical')
+
+    with stage('prepare', prefix='optimizer'):
+        quantile_targets = load_quantile_targets(args.target_quantile) if args.target_quantile else None
+        demand_df = prepare_demand(forecast, historical, store_params, quantile_targets=quantile_targets)
+
+    with stage('build', prefix='optimizer'):
+        lookups = build_lookups(demand_df, store_params, transport_matrix)
+        structure = build_structure(demand_df, store_params, transport_matrix)
+        lp = structure_lp(structure, lookups['params'])
+
+    n_stores = len(lookups['stores'])
+    n_pairs = len(lookups['valid_pairs'])
+    gauge('optimizer_model_size', lp['a'].shape[1], dimension='variables')
+    gauge('optimizer_model_size', lp['a'].shape[0], dimension='constraints')
+    gauge('optimizer_model_size', lp['a'].nnz, dimension='nonzeros')
+    n_products = demand_df.groupby('store_id')['product_id'].nunique().max()
+    print(f"Scope: {n_stores} stores, {n_pairs} store-product pairs (up to {n_products} products/store)")
+
+    # 6. SOLVE
+    print(f"Solving: {n_stores} stores, {n_pairs} store-product pairs, {structure['n_arcs']} transfer arcs")
+    mip_options = None
+    if args.mip:
+        mip_options = {'lot_size': args.lot_size, 'route_cost': args.route_cost, 'min_shipment': args.min_shipment,
+                       'fix': args.mip_fix, 'time_limit': args.mip_time_limit}
+    result = optimize(lookups, structure, lp, args.solver, args.time_limit,
+                      fmt=args.output_format, compression=args.compression, mip=mip_options)
+    if result['x'] is None:
+        raise SystemExit(f"No solution from {args.solver}: {result['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Chunked table writers for optimizer outputs.
+
+A TableWriter appends DataFrame chunks to one file as they are produced, so a table
+never has to exist in memory in full:
+
+    csv      pandas to_csv, header written once (the default, same files as before)
+    ndjson   one orjson-encoded record per line
+    parquet  pyarrow ParquetWriter, one row group per chunk (needs pyarrow)
+
+Compression for csv / ndjson is one of gzip, bz2, xz (standard library streams) and
+adds the usual suffix; for parquet it is passed through as the column codec
+(snappy, zstd, gzip, ...).
+
+``read_table`` reads any of these back. Given only the base path it picks the most
+recently written file, so a run in another format does not leave a stale table behind.
+A table that got no rows is still written, with the header (csv) or schema (parquet)
+from the writer's ``columns``; ndjson has no header, so an empty one reads back with
+the ``columns`` passed to read_table.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+
+import orjson
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+STREAM_COMPRESSION = {'gzip': (gzip.open, '.gz'), 'bz2': (bz2.open, '.bz2'), 'xz': (lzma.open, '.xz')}
+CHUNK_ROWS = 50_000
+
+
+def table_path(base_path, fmt='csv', compression=None):
+    """File name TableWriter uses for ``base_path`` in this format / compression."""
+    path = f'{base_path}.{fmt}'
+    if fmt != 'parquet' and compression:
+        path += STREAM_COMPRESSION[compression][1]
+    return path
+
+
+def table_candidates(base_path):
+    """Existing files of ``base_path`` in any format / compression, newest first."""
+    paths = [table_path(base_path, fmt, compression)
+             for fmt in FORMATS
+             for compression in ((None,) if fmt == 'parquet' else (None, *STREAM_COMPRESSION))]
+    return sorted((p for p in paths if os.path.exists(p)), key=os.path.getmtime, reverse=True)
+
+
+def read_table(base_path, fmt=None, compression=None, columns=None):
+    """Read a table written by TableWriter into a DataFrame.
+
+    With ``fmt`` the file for that format / compression is read; without it the most
+    recently written one. FileNotFoundError when there is none; an empty file reads as an
+    empty frame with ``columns``.
+    """
+    import pandas as pd
+
+    if fmt is None:
+        candidates = table_candidates(base_path)
+        if not candidates:
+            raise FileNotFoundError(f"No {os.path.basename(base_path)} table in {os.path.dirname(base_path)}/ "
+                                    f"(looked for .csv, .ndjson, .parquet, compressed or not)")
+        path = candidates[0]
+    else:
+        path = table_path(base_path, fmt, compression)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    if '.ndjson' in os.path.basename(path):
+        df = pd.read_json(path, lines=True, dtype=False, convert_dates=False, compression='infer')
+        if df.columns.empty:
+            return pd.DataFrame(columns=columns)
+        return df[columns] if columns else df
+    try:
+        return pd.read_csv(path, usecols=columns, compression='infer')
+    except pd.errors.EmptyDataError:  # written without a header by an older TableWriter
+        return pd.DataFrame(columns=columns)
+
+
+class TableWriter:
+    """Append DataFrame chunks to ``<base>.<format>[.<compression suffix>]``.
+
+    ``columns`` names the table's columns, for the header of a table that gets no rows.
+    """
+
+    def __init__(self, base_path, fmt='csv', compression=None, columns=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format {fmt!r}; expected one of {FORMATS}")
+        if fmt != 'parquet' and compression not in (None, *STREAM_COMPRESSION):
+            raise ValueError(f"{fmt} compression must be one of {sorted(STREAM_COMPRESSION)}")
+        self.fmt = fmt
+        self.compression = compression
+        self.path = table_path(base_path, fmt, compression)
+        self.columns = columns
+        self.rows = 0
+        self._handle = None
+        self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _open(self, mode):
+        if self.compression:
+            return STREAM_COMPRESSION[self.compression][0](self.path, mode)
+        return open(self.path, mode)
+
+    def write(self, df):
+        if self.fmt == 'parquet':
+            self._write_parquet(df)
+        elif self.fmt == 'csv':
+            header = self._handle is None
+            if header:
+                self._handle = self._open('wt')
+            df.to_csv(self._handle, header=header, index=False)
+        else:
+            if self._handle is None:
+                self._handle = self._open('wb')
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+            for record in df.to_dict('records'):
+                self._handle.write(orjson.dumps(record, option=option))
+        self.rows += len(df)
+
+    def _write_parquet(self, df):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("parquet output needs pyarrow (pip install pyarrow)") from exc
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema, compression=self.compression or 'snappy')
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._handle is None and self._parquet is None:
+            # An empty table still produces its file, with the header / schema of ``columns``
+            if self.columns is not None and self.fmt != 'ndjson':
+                import pandas as pd
+
+                self.write(pd.DataFrame(columns=list(self.columns)))
+            elif self.fmt != 'parquet':
+                self._handle = self._open('wb')
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
@@ -0,0 +1,193 @@
+"""
+What-if scenario runner.
+
+Prepares the store-product pair table and the sparse LP structure once, then solves
+a list or grid of parameter overrides in parallel worker processes. Each worker
+receives the structure once at start-up; a scenario only rebuilds the cost vector
+and right-hand sides (see lp_model.scenario_vectors).
+
+Overridable parameters are the keys of optimization.DEFAULT_PARAMS:
+mfg_base, holding_cost, transport_scale, mfg_capacity, z.
+
+Run from the repository root:
+    python -m optimization.scenarios --grid '{"mfg_capacity": [3000, 5000], "z": [1.28, 1.65, 2.05]}'
+    python -m optimization.scenarios --scenarios my_scenarios.json --workers 4 --solver highs
+
+Outputs one comparison table indexed by scenario (output-csv/scenario_comparison.csv)
+and the same data for the NLP layer (output-json/scenario_comparison.json), with
+every scenario compared against the default parameters.
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from optimization.lp_model import build_structure, solve_structure, split_solution
+from optimization.solvers import BACKENDS
+from optimization.optimization import (
+    CSV_OUTPUT_DIR, DEFAULT_PARAMS, JSON_OUTPUT_DIR, load_inputs, prepare_demand,
+)
+
+BASELINE_SCENARIO = 'baseline'
+MIN_REPORTED_QTY = 0.01  # same cut-off optimization.py uses for reported decisions
+
+_worker_structure = None
+
+
+def expand_grid(grid):
+    """{'z': [1.28, 1.65], 'mfg_capacity': [3000]} -> list of override dicts (cartesian product)."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _validate(overrides):
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {sorted(unknown)}; expected {sorted(DEFAULT_PARAMS)}")
+
+
+def _init_worker(structure):
+    global _worker_structure
+    _worker_structure = structure
+
+
+def _solve_scenario(task):
+    scenario_id, overrides, backend = task
+    return summarize_scenario(_worker_structure, scenario_id, overrides, backend)
+
+
+def summarize_scenario(structure, scenario_id, overrides, backend='scipy'):
+    """Solve one scenario and reduce it to a flat metrics row."""
+    params = {**DEFAULT_PARAMS, **overrides}
+    result = solve_structure(structure, params, backend)
+    row = {'scenario': scenario_id, **params, 'status': result['status'], 'solver': backend,
+           'solve_seconds': round(result['solve_seconds'], 4)}
+    if result['solution'] is None:
+        return row
+
+    x, t, _ = split_solution(structure, result['solution'])
+    row.update({
+        'total_cost': result['costs']['total'],
+        'manufacturing_cost': result['costs']['manufacturing'],
+        'transfer_cost': result['costs']['transfer'],
+        'holding_cost_total': result['costs']['holding'],
+        'manufacturing_units': float(x[x > MIN_REPORTED_QTY].sum()),
+        'transfer_units': float(t[t > MIN_REPORTED_QTY].sum()),
+        'total_transfers': int((t > MIN_REPORTED_QTY).sum()),
+    })
+    return row
+
+
+def run_scenarios(structure, scenarios, workers=None, backend='scipy'):
+    """Solve ``scenarios`` ({scenario_id: overrides}) in parallel; returns a DataFrame indexed by scenario.
+
+    The baseline (default parameters) is always included so every row has a delta; its
+    name is reserved.
+    """
+    if BASELINE_SCENARIO in scenarios:
+        raise ValueError(f"Scenario name {BASELINE_SCENARIO!r} is reserved for the default parameters, "
+                         "which always run; rename that scenario")
+    scenarios = {BASELINE_SCENARIO: {}, **scenarios}
+    for overrides in scenarios.values():
+        _validate(overrides)
+
+    tasks = [(sid, overrides, backend) for sid, overrides in scenarios.items()]
+    if workers == 1:
+        rows = [summarize_scenario(structure, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(structure,)) as pool:
+            rows = list(pool.map(_solve_scenario, tasks))
+
+    df = pd.DataFrame(rows).set_index('scenario')
+    if 'total_cost' in df.columns:
+        base_cost = df.loc[BASELINE_SCENARIO, 'total_cost']
+        df['cost_change'] = df['total_cost'] - base_cost
+        df['cost_change_pct'] = df['cost_change'] / base_cost if base_cost else np.nan
+    return df
+
+
+def comparison_records(df):
+    """Per-scenario records shaped like scenario_summary.json for the NLP layer."""
+    records = []
+    for scenario_id, row in df.iterrows():
+        record = {
+            'scenario': scenario_id,
+            'params': {k: row[k] for k in DEFAULT_PARAMS},
+            'status': row['status'],
+            'solver': row['solver'],
+            'solve_seconds': row['solve_seconds'],
+        }
+        if pd.notna(row.get('total_cost')):
+            record['optimized'] = {
+                'total_cost': round(row['total_cost'], 2),
+                'total_transfers': int(row['total_transfers']),
+                'manufacturing_units': round(row['manufacturing_units'], 1),
+                'transfer_units': round(row['transfer_units'], 1),
+            }
+            record['cost_breakdown'] = {
+                'manufacturing_cost': round(row['manufacturing_cost'], 2),
+                'transfer_cost': round(row['transfer_cost'], 2),
+                'holding_cost': round(row['holding_cost_total'], 2),
+            }
+            record['delta'] = {
+                'cost_change': round(row['cost_change'], 2),
+                'cost_change_pct': round(row['cost_change_pct'], 4),
+            }
+        records.append(record)
+    return records
+
+
+def save_comparison(df, csv_dir=CSV_OUTPUT_DIR, json_dir=JSON_OUTPUT_DIR):
+    os.makedirs(csv_dir, exist_ok=True)
+    os.makedirs(json_dir, exist_ok=True)
+    df.to_csv(f'{csv_dir}/scenario_comparison.csv')
+    with open(f'{json_dir}/scenario_comparison.json', 'w') as f:
+        json.dump({'baseline_scenario': BASELINE_SCENARIO, 'scenarios': comparison_records(df)},
+                  f, indent=2, default=float)
+    print(f"Scenario comparison saved to {csv_dir}/ and {json_dir}/")
+
+
+def _scenario_name(overrides):
+    return ','.join(f'{k}={v}' for k, v in overrides.items()) or BASELINE_SCENARIO
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grid', help='JSON object of parameter -> list of values (cartesian product)')
+    parser.add_argument('--scenarios', help='JSON file: list of override objects, or {name: overrides}')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--solver', choices=BACKENDS, default='scipy', help='LP backend (default: scipy)')
+    args = parser.parse_args()
+
+    scenarios = {}
+    if args.grid:
+        scenarios.update({_scenario_name(o): o for o in expand_grid(json.loads(args.grid))})
+    if args.scenarios:
+        with open(args.scenarios) as f:
+            loaded = json.load(f)
+        if isinstance(loaded, list):
+            loaded = {_scenario_name(o): o for o in loaded}
+        scenarios.update(loaded)
+    # An empty override set is the baseline itself, which always runs
+    if scenarios.get(BASELINE_SCENARIO) == {}:
+        del scenarios[BASELINE_SCENARIO]
+
+    forecast, historical, store_params, transport_matrix = load_inputs()
+    demand_df = prepare_demand(forecast, historical, store_params)
+    structure = build_structure(demand_df, store_params, transport_matrix)
+    print(f"Scope: {len(structure['stores'])} stores, {structure['n_pairs']} store-product pairs, "
+          f"{structure['n_arcs']} transfer arcs")
+    print(f"Solving {len(scenarios) + 1} scenarios")
+
+    df = run_scenarios(structure, scenarios, workers=args.workers, backend=args.solver)
+    print(df[['status', 'total_cost', 'cost_change', 'solve_seconds']].to_string())
+    save_comparison(df)
+
+
+if __name__ == '__main__':
+    main()
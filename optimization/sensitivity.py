@@ -0,0 +1,102 @@
+"""
+Dual values and reduced costs from a solved inventory LP.
+
+Row blocks of lp_model.structure_lp, in order:
+
+    balance   n_pairs   final_inv - x - Σ t_in + Σ t_out = current
+    demand    n_pairs   -final_inv <= -(demand_7d + safety_stock)
+    transfer  n_pairs   Σ t_out <= current
+    capacity  n_stores  Σ x over the store's products <= mfg_capacity
+
+A row dual is the change in total cost per unit increase of the row's bound (see
+solvers.py), so:
+
+    capacity_shadow_price  dual of the capacity row; negative when one more unit of
+                           capacity at that store would lower total cost
+    marginal_cost          cost of covering one more unit of target inventory at the pair
+                           (minus the dual of the demand row, since that row is negated)
+    transfer_limit_value   dual of the transfer-limit row; cost change per extra unit of
+                           current stock that may be shipped out
+    mfg_reduced_cost       reduced cost of the pair's manufacturing variable; > 0 means
+                           manufacturing there is priced out
+
+Duals describe small changes around the optimal basis; past the basis' validity range
+the problem needs a re-solve.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+TOP_PAIRS = 20
+
+
+def _row_blocks(structure):
+    n, n_stores = structure['n_pairs'], len(structure['stores'])
+    return {
+        'balance': slice(0, n),
+        'demand': slice(n, 2 * n),
+        'transfer': slice(2 * n, 3 * n),
+        'capacity': slice(3 * n, 3 * n + n_stores),
+    }
+
+
+def sensitivity_tables(structure, params, solution, row_duals, reduced_costs):
+    """Return (capacity_df, pair_df): per-store shadow prices and per-pair marginal costs."""
+    blocks = _row_blocks(structure)
+    n = structure['n_pairs']
+    x = solution[:n]
+
+    mfg_by_store = np.bincount(structure['store_index'], weights=x, minlength=len(structure['stores']))
+    capacity_df = pd.DataFrame({
+        'store_id': structure['stores'],
+        'capacity': params['mfg_capacity'],
+        'manufactured': np.round(mfg_by_store, 2),
+        'utilization': np.round(mfg_by_store / params['mfg_capacity'], 4) if params['mfg_capacity'] else np.nan,
+        'capacity_shadow_price': np.round(row_duals[blocks['capacity']], 4) + 0.0,
+    })
+    capacity_df['binding'] = capacity_df['capacity_shadow_price'] < 0
+
+    pair_df = pd.DataFrame({
+        'store_id': structure['store_id'],
+        'product_id': structure['product_id'],
+        'marginal_cost': np.round(-row_duals[blocks['demand']], 4),
+        'transfer_limit_value': np.round(row_duals[blocks['transfer']], 4),
+        'mfg_reduced_cost': np.round(reduced_costs[:n], 4) if reduced_costs is not None else np.nan,
+    })
+    return capacity_df, pair_df
+
+
+def sensitivity_json(capacity_df, pair_df, scenario='optimization_run', top_pairs=TOP_PAIRS):
+    """Compact form for the NLP layer: every store's shadow price, the costliest pairs."""
+    stores = capacity_df.sort_values('capacity_shadow_price')
+    pairs = pair_df.nlargest(top_pairs, 'marginal_cost')
+    return {
+        'scenario': scenario,
+        'capacity': [
+            {
+                'store_id': str(r.store_id),
+                'capacity': float(r.capacity),
+                'manufactured': float(r.manufactured),
+                'utilization': float(r.utilization),
+                'shadow_price': float(r.capacity_shadow_price),
+            }
+            for r in stores.itertuples()
+        ],
+        'marginal_costs': [
+            {'store_id': str(r.store_id), 'product_id': str(r.product_id), 'marginal_cost': float(r.marginal_cost)}
+            for r in pairs.itertuples()
+        ],
+    }
+
+
+def save_sensitivity(capacity_df, pair_df, csv_dir, json_dir):
+    os.makedirs(csv_dir, exist_ok=True)
+    os.makedirs(json_dir, exist_ok=True)
+    capacity_df.to_csv(f'{csv_dir}/sensitivity_capacity.csv', index=False)
+    pair_df.to_csv(f'{csv_dir}/sensitivity_pairs.csv', index=False)
+    with open(f'{json_dir}/sensitivity.json', 'w') as f:
+        json.dump(sensitivity_json(capacity_df, pair_df), f, indent=2)
+    print(f"Sensitivity report saved to {csv_dir}/ and {json_dir}/")
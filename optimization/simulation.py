@@ -0,0 +1,164 @@
+"""
+Monte Carlo check of the service level the optimized plan actually achieves.
+
+For every (store, product) pair the planned final inventory is tested against
+sampled demand:
+
+    horizon demand   Σ_d max(0, forecast_d + demand_std × ε_d)          d = 1..7
+    lead-time risk   demand_std × √(L × (1 + delayed)) × ε_L
+                     L       ~ N(lead_time_days_mean, lead_time_days_std), clipped at 0
+                     delayed ~ Bernoulli(p), p ~ N(delay_probability_mean, delay_probability_std) in [0, 1]
+
+A delayed replenishment doubles the exposed lead time, which is the sampled
+counterpart of the (1 + delay_probability) factor in the safety stock formula.
+Shortfall is max(0, demand - final_inv); per pair we report the stockout
+probability, expected shortfall and fill rate.
+
+Samples are drawn in float32 batches sized to a memory budget, so 10^4 samples
+over 50k pairs run without holding the full N × pairs × days array.
+
+The planned inventory is read in whichever format optimization.py last wrote
+(--output-format / --compression pick one explicitly).
+
+Run from the repository root after optimization.py has written its outputs:
+    python -m optimization.simulation --samples 10000 --memory-mb 256
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from optimization.optimization import CSV_OUTPUT_DIR, load_inputs, prepare_demand
+from optimization.outputs import FORMATS, read_table
+
+HORIZON_DAYS = 7
+DEFAULT_SAMPLES = 10_000
+DEFAULT_MEMORY_MB = 256
+# float32 arrays alive per (sample, pair) cell: 7 daily draws, their sum and a few per-cell temporaries
+_BYTES_PER_CELL = 4 * (HORIZON_DAYS + 6)
+
+
+def _chunk_sizes(n_samples, n_pairs, memory_budget_mb):
+    """Largest (sample_chunk, pair_chunk) whose working set fits in the budget."""
+    cells = max(1, int(memory_budget_mb * 1024 ** 2 // _BYTES_PER_CELL))
+    pair_chunk = min(n_pairs, max(1, cells // min(n_samples, 1024)))
+    sample_chunk = min(n_samples, max(1, cells // pair_chunk))
+    return sample_chunk, pair_chunk
+
+
+def simulate_plan(final_inv, daily_forecast, demand_std, lead_time_mean, lead_time_std,
+                  delay_mean, delay_std, n_samples=DEFAULT_SAMPLES,
+                  memory_budget_mb=DEFAULT_MEMORY_MB, seed=42):
+    """Vectorized simulation over all pairs; every argument is a per-pair array.
+
+    ``daily_forecast`` has shape (n_pairs, HORIZON_DAYS). Returns a dict of per-pair
+    arrays: stockout_prob, expected_shortfall, fill_rate.
+    """
+    rng = np.random.default_rng(seed)
+    as32 = lambda a: np.asarray(a, dtype=np.float32)
+    final_inv, demand_std = as32(final_inv), as32(demand_std)
+    lead_time_mean, lead_time_std = as32(lead_time_mean), as32(lead_time_std)
+    delay_mean, delay_std = as32(delay_mean), as32(delay_std)
+    daily_forecast = as32(daily_forecast)
+
+    n_pairs = len(final_inv)
+    stockouts = np.zeros(n_pairs, dtype=np.int64)
+    shortfall_sum = np.zeros(n_pairs, dtype=np.float64)
+    demand_sum = np.zeros(n_pairs, dtype=np.float64)
+
+    sample_chunk, pair_chunk = _chunk_sizes(n_samples, n_pairs, memory_budget_mb)
+    for p0 in range(0, n_pairs, pair_chunk):
+        sl = slice(p0, min(p0 + pair_chunk, n_pairs))
+        k = sl.stop - sl.start
+        for s0 in range(0, n_samples, sample_chunk):
+            s = min(sample_chunk, n_samples - s0)
+
+            daily = rng.standard_normal((s, k, HORIZON_DAYS), dtype=np.float32)
+            daily *= demand_std[sl, None]
+            daily += daily_forecast[sl]
+            np.maximum(daily, 0, out=daily)
+            demand = daily.sum(axis=2)
+            del daily
+
+            lead = lead_time_mean[sl] + lead_time_std[sl] * rng.standard_normal((s, k), dtype=np.float32)
+            np.maximum(lead, 0, out=lead)
+            p_delay = np.clip(delay_mean[sl] + delay_std[sl] * rng.standard_normal((s, k), dtype=np.float32), 0, 1)
+            lead *= 1 + (rng.random((s, k), dtype=np.float32) < p_delay)
+            demand += demand_std[sl] * np.sqrt(lead) * rng.standard_normal((s, k), dtype=np.float32)
+            np.maximum(demand, 0, out=demand)
+
+            shortfall = demand - final_inv[sl]
+            np.maximum(shortfall, 0, out=shortfall)
+            stockouts[sl] += np.count_nonzero(shortfall, axis=0)
+            shortfall_sum[sl] += shortfall.sum(axis=0, dtype=np.float64)
+            demand_sum[sl] += demand.sum(axis=0, dtype=np.float64)
+
+    expected_shortfall = shortfall_sum / n_samples
+    mean_demand = demand_sum / n_samples
+    fill_rate = np.where(mean_demand > 0, 1 - expected_shortfall / np.where(mean_demand > 0, mean_demand, 1), 1.0)
+    return {
+        'stockout_prob': stockouts / n_samples,
+        'expected_shortfall': expected_shortfall,
+        'fill_rate': fill_rate,
+    }
+
+
+def simulation_inputs(demand_df, store_params, inventory_df):
+    """Join the pair table with planned final inventory and the supply-risk spreads."""
+    spreads = store_params[['store_id', 'lead_time_days_std', 'delay_probability_std']]
+    df = demand_df.merge(spreads, on='store_id', how='left').merge(
+        inventory_df[['store_id', 'product_id', 'final']], on=['store_id', 'product_id'], how='inner'
+    )
+    df['lead_time_days_std'] = df['lead_time_days_std'].fillna(0)
+    df['delay_probability_std'] = df['delay_probability_std'].fillna(0)
+    return df
+
+
+def simulate_frame(df, n_samples=DEFAULT_SAMPLES, memory_budget_mb=DEFAULT_MEMORY_MB, seed=42):
+    """Run simulate_plan on a simulation_inputs frame; returns a per-pair results frame."""
+    stats = simulate_plan(
+        df['final'], df[[f'day+{i}' for i in range(1, HORIZON_DAYS + 1)]].to_numpy(),
+        df['demand_std'], df['lead_time_days_mean'], df['lead_time_days_std'],
+        df['delay_probability_mean'], df['delay_probability_std'],
+        n_samples=n_samples, memory_budget_mb=memory_budget_mb, seed=seed,
+    )
+    out = df[['store_id', 'product_id', 'final', 'target_inventory']].rename(
+        columns={'final': 'final_inv', 'target_inventory': 'target'}
+    )
+    for name, values in stats.items():
+        out[name] = np.round(values, 4)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument('--memory-mb', type=float, default=DEFAULT_MEMORY_MB)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-format', choices=FORMATS, default=None,
+                        help="format optimization.py wrote (default: the most recently written table)")
+    parser.add_argument('--compression', default=None, help='compression optimization.py used with --output-format')
+    args = parser.parse_args()
+
+    forecast, historical, store_params, _ = load_inputs()
+    demand_df = prepare_demand(forecast, historical, store_params)
+    inventory_df = read_table(f'{CSV_OUTPUT_DIR}/optimization_inventory', args.output_format, args.compression,
+                              columns=['store_id', 'product_id', 'final'])
+    df = simulation_inputs(demand_df, store_params, inventory_df)
+
+    print(f"Simulating {args.samples:,} demand scenarios for {len(df):,} store-product pairs")
+    results = simulate_frame(df, args.samples, args.memory_mb, args.seed)
+
+    print(f"Mean stockout probability: {results['stockout_prob'].mean():.1%}")
+    print(f"Pairs below 95% service:   {(results['stockout_prob'] > 0.05).sum():,}")
+    print(f"Expected shortfall:        {results['expected_shortfall'].sum():,.1f} units")
+    print(f"Mean fill rate:            {results['fill_rate'].mean():.1%}")
+
+    os.makedirs(CSV_OUTPUT_DIR, exist_ok=True)
+    results.to_csv(f'{CSV_OUTPUT_DIR}/service_level_simulation.csv', index=False)
+    print(f"Simulation results saved to {CSV_OUTPUT_DIR}/")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Solver backends for the sparse inventory LP.
+
+A model is a dict of NumPy arrays in row-bounded form:
+
+    min c·x   s.t.   row_lower ≤ A x ≤ row_upper,   col_lower ≤ x ≤ col_upper
+
+with A as a scipy CSR matrix. Backends:
+
+    cbc    CBC through PuLP (writes an MPS file and runs the CBC binary)
+    highs  HiGHS in-process through highspy; the CSR arrays are passed directly
+    scipy  HiGHS through scipy.optimize.linprog(method="highs")
+    glop   OR-Tools GLOP
+
+Solver packages are imported only when their backend is used, and NumPy / SciPy only
+when a model is built or solved, so reading BACKENDS (e.g. for a --help) stays cheap. Some OR-Tools wheels
+bundle their own HiGHS and fail to import once highspy is loaded in the same process
+(PuLP loads highspy when it is installed), so run glop in its own process. Every backend returns the
+same result dict: status (PuLP-style name), x, objective, solve_seconds, backend, and
+row_duals / reduced_costs when the backend reports them. A row dual is the change in
+objective per unit increase of that row's active bound.
+
+An optional ``integrality`` mask (True for integer columns) makes the model a MIP.
+highs, cbc and scipy (scipy.optimize.milp) solve those; glop is LP-only. A MIP stopped
+by the time limit still returns its best integer solution, with its status, the
+relative ``mip_gap`` where the backend reports it, and no duals.
+
+``start`` is an optional starting solution (e.g. optimization/heuristic.py's greedy plan):
+highs loads it with setSolution and cbc passes it as a MIP start (warmStart); scipy and
+glop have no way to accept one and ignore it.
+"""
+
+import time
+
+from telemetry.metrics import count, registry
+
+BACKENDS = ('cbc', 'highs', 'scipy', 'glop')
+MIP_BACKENDS = ('highs', 'cbc', 'scipy')  # backends that accept an integrality mask
+
+# scipy.optimize.linprog status codes, named like PuLP's LpStatus
+LINPROG_STATUS = {0: 'Optimal', 1: 'Not Solved', 2: 'Infeasible', 3: 'Unbounded', 4: 'Undefined'}
+
+
+def make_lp(c, a, row_lower, row_upper, col_lower=None, col_upper=None, integrality=None):
+    import numpy as np
+    from scipy import sparse
+
+    n_cols = len(c)
+    return {
+        'c': np.asarray(c, dtype=float),
+        'a': sparse.csr_matrix(a),
+        'row_lower': np.asarray(row_lower, dtype=float),
+        'row_upper': np.asarray(row_upper, dtype=float),
+        'col_lower': np.zeros(n_cols) if col_lower is None else np.asarray(col_lower, dtype=float),
+        'col_upper': np.full(n_cols, np.inf) if col_upper is None else np.asarray(col_upper, dtype=float),
+        'integrality': None if integrality is None else np.asarray(integrality, dtype=bool),
+    }
+
+
+def solve(lp, backend='highs', time_limit=300, start=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown solver backend {backend!r}; expected one of {BACKENDS}")
+    if backend == 'glop' and lp.get('integrality') is not None:
+        raise ValueError("glop solves LPs only; use highs, cbc or scipy for integer models")
+    began = time.perf_counter()
+    if start is not None and backend in ('cbc', 'highs'):
+        result = _SOLVERS[backend](lp, time_limit, start=start)
+    else:
+        result = _SOLVERS[backend](lp, time_limit)
+    result['solve_seconds'] = time.perf_counter() - began
+    result['backend'] = backend
+    registry.observe('optimizer_solve_seconds', result['solve_seconds'], backend=backend)
+    count('optimizer_solves_total', backend=backend, status=result['status'])
+    if result['x'] is not None and result.get('objective') is None:
+        result['objective'] = float(lp['c'] @ result['x'])
+    return result
+
+
+def _empty_result(status):
+    return {'status': status, 'x': None, 'objective': None, 'row_duals': None, 'reduced_costs': None}
+
+
+def highs_model(lp, time_limit=None, start=None):
+    """Build a highspy.Highs object holding ``lp``; callers may keep it to warm-start re-solves."""
+    import highspy
+    import numpy as np
+
+    h = highspy.Highs()
+    h.setOptionValue('output_flag', False)
+    if time_limit is not None:
+        h.setOptionValue('time_limit', float(time_limit))
+    model = highspy.HighsLp()
+    model.num_col_, model.num_row_ = len(lp['c']), lp['a'].shape[0]
+    model.col_cost_ = lp['c']
+    model.col_lower_, model.col_upper_ = lp['col_lower'], lp['col_upper']
+    model.row_lower_, model.row_upper_ = lp['row_lower'], lp['row_upper']
+    if lp.get('integrality') is not None:
+        model.integrality_ = [highspy.HighsVarType.kInteger if integer else highspy.HighsVarType.kContinuous
+                              for integer in lp['integrality']]
+    model.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    model.a_matrix_.start_ = lp['a'].indptr
+    model.a_matrix_.index_ = lp['a'].indices
+    model.a_matrix_.value_ = lp['a'].data
+    h.passModel(model)
+    if start is not None:
+        solution = highspy.HighsSolution()
+        solution.col_value = np.asarray(start, dtype=float)
+        solution.value_valid = True
+        h.setSolution(solution)
+    return h
+
+
+def run_highs(h, mip=False):
+    """Run a highspy model and convert its solution to the common result dict."""
+    import numpy as np
+
+    h.run()
+    status = h.modelStatusToString(h.getModelStatus())
+    info = h.getInfo()
+    if mip:
+        # Any integer-feasible incumbent counts, e.g. the best one at the time limit
+        if info.primal_solution_status != 2:
+            return _empty_result(status)
+        return {
+            'status': status,
+            'x': np.asarray(h.getSolution().col_value),
+            'objective': info.objective_function_value,
+            'mip_gap': info.mip_gap,
+            'row_duals': None,
+            'reduced_costs': None,
+        }
+    if status != 'Optimal':
+        return _empty_result(status)
+    solution = h.getSolution()
+    return {
+        'status': status,
+        'x': np.asarray(solution.col_value),
+        'objective': info.objective_function_value,
+        'row_duals': np.asarray(solution.row_dual),
+        'reduced_costs': np.asarray(solution.col_dual),
+    }
+
+
+def _solve_highs(lp, time_limit, start=None):
+    return run_highs(highs_model(lp, time_limit, start), mip=lp.get('integrality') is not None)
+
+
+def _solve_scipy_milp(lp, time_limit):
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    res = milp(
+        lp['c'], integrality=lp['integrality'].astype(int),
+        bounds=Bounds(lp['col_lower'], lp['col_upper']),
+        constraints=LinearConstraint(lp['a'], lp['row_lower'], lp['row_upper']),
+        options={'time_limit': time_limit},
+    )
+    if res.x is None:
+        return _empty_result(LINPROG_STATUS.get(res.status, 'Undefined'))
+    return {
+        'status': 'Optimal' if res.status == 0 else 'Time limit reached',
+        'x': res.x,
+        'objective': float(res.fun),
+        'mip_gap': getattr(res, 'mip_gap', None),
+        'row_duals': None,
+        'reduced_costs': None,
+    }
+
+
+def _solve_scipy(lp, time_limit):
+    import numpy as np
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    if lp.get('integrality') is not None:
+        return _solve_scipy_milp(lp, time_limit)
+    lo, up, a = lp['row_lower'], lp['row_upper'], lp['a']
+    eq = lo == up
+    upper = ~eq & np.isfinite(up)
+    lower = ~eq & np.isfinite(lo)
+    a_ub = sparse.vstack([a[upper], -a[lower]]).tocsr()
+    b_ub = np.concatenate([up[upper], -lo[lower]])
+    res = linprog(
+        lp['c'], A_ub=a_ub if a_ub.shape[0] else None, b_ub=b_ub if a_ub.shape[0] else None,
+        A_eq=a[eq] if eq.any() else None, b_eq=lo[eq] if eq.any() else None,
+        bounds=np.column_stack([lp['col_lower'], lp['col_upper']]),
+        method='highs', options={'time_limit': time_limit},
+    )
+    status = LINPROG_STATUS.get(res.status, 'Undefined')
+    if res.status != 0:
+        return _empty_result(status)
+
+    # Map marginals of the split A_eq / A_ub rows back onto the original rows
+    row_duals = np.zeros(a.shape[0])
+    if eq.any():
+        row_duals[eq] = res.eqlin.marginals
+    n_upper = int(upper.sum())
+    if a_ub.shape[0]:
+        row_duals[upper] += res.ineqlin.marginals[:n_upper]
+        row_duals[lower] -= res.ineqlin.marginals[n_upper:]
+    return {
+        'status': status,
+        'x': res.x,
+        'objective': float(res.fun),
+        'row_duals': row_duals,
+        'reduced_costs': res.lower.marginals + res.upper.marginals,
+    }
+
+
+def _solve_cbc(lp, time_limit, start=None):
+    import numpy as np
+    import pulp
+
+    n_cols = len(lp['c'])
+    integrality = lp.get('integrality')
+    model = pulp.LpProblem("Inventory_Optimization", pulp.LpMinimize)
+    bound = lambda v: None if not np.isfinite(v) else float(v)
+    category = lambda j: 'Integer' if integrality is not None and integrality[j] else 'Continuous'
+    xs = [pulp.LpVariable(f"x{j}", bound(lp['col_lower'][j]), bound(lp['col_upper'][j]), category(j))
+          for j in range(n_cols)]
+    model += pulp.LpAffineExpression(zip(xs, lp['c'].tolist()))
+    if start is not None:
+        for var, value in zip(xs, start.tolist()):
+            var.setInitialValue(value)
+
+    a = lp['a']
+    rows = []
+    for i in range(a.shape[0]):
+        lo, up = lp['row_lower'][i], lp['row_upper'][i]
+        cols = a.indices[a.indptr[i]:a.indptr[i + 1]]
+        vals = a.data[a.indptr[i]:a.indptr[i + 1]].tolist()
+        expr = pulp.LpAffineExpression(zip((xs[j] for j in cols), vals))
+        if lo == up:
+            constraint = expr == lo
+        elif np.isfinite(up):
+            constraint = expr <= up
+        else:
+            constraint = expr >= lo
+        model += constraint, f"r{i}"
+        rows.append(f"r{i}")
+        if lo != up and np.isfinite(up) and np.isfinite(lo):
+            model += expr >= lo, f"r{i}_lo"
+
+    solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit, warmStart=start is not None)
+    status = pulp.LpStatus[model.solve(solver)]
+    if integrality is not None:
+        # CBC stopped by the time limit with an incumbent: integer feasible, not proven optimal
+        if model.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            return _empty_result(status)
+        return {
+            'status': 'Optimal' if model.sol_status == pulp.LpSolutionOptimal else 'Time limit reached',
+            'x': np.array([v.varValue or 0.0 for v in xs]),
+            'objective': pulp.value(model.objective),
+            'mip_gap': None,
+            'row_duals': None,
+            'reduced_costs': None,
+        }
+    if status != 'Optimal':
+        return _empty_result(status)
+    constraints = model.constraints
+    return {
+        'status': status,
+        'x': np.array([v.varValue or 0.0 for v in xs]),
+        'objective': pulp.value(model.objective),
+        'row_duals': np.array([(constraints[name].pi or 0.0) for name in rows]),
+        'reduced_costs': np.array([(v.dj or 0.0) for v in xs]),
+    }
+
+
+def _solve_glop(lp, time_limit):
+    import numpy as np
+    from ortools.linear_solver import pywraplp
+
+    solver = pywraplp.Solver.CreateSolver('GLOP')
+    solver.SetTimeLimit(int(time_limit * 1000))
+    inf = solver.infinity()
+    clip = lambda v: v if np.isfinite(v) else (inf if v > 0 else -inf)
+    xs = [solver.NumVar(clip(lo), clip(up), '') for lo, up in zip(lp['col_lower'], lp['col_upper'])]
+    objective = solver.Objective()
+    for var, cost in zip(xs, lp['c']):
+        objective.SetCoefficient(var, float(cost))
+    objective.SetMinimization()
+
+    a = lp['a']
+    rows = []
+    for i in range(a.shape[0]):
+        row = solver.RowConstraint(clip(lp['row_lower'][i]), clip(lp['row_upper'][i]), '')
+        for j, v in zip(a.indices[a.indptr[i]:a.indptr[i + 1]], a.data[a.indptr[i]:a.indptr[i + 1]]):
+            row.SetCoefficient(xs[j], float(v))
+        rows.append(row)
+
+    code = solver.Solve()
+    status = {
+        pywraplp.Solver.OPTIMAL: 'Optimal', pywraplp.Solver.INFEASIBLE: 'Infeasible',
+        pywraplp.Solver.UNBOUNDED: 'Unbounded',
+    }.get(code, 'Not Solved')
+    if status != 'Optimal':
+        return _empty_result(status)
+    return {
+        'status': status,
+        'x': np.array([v.solution_value() for v in xs]),
+        'objective': objective.Value(),
+        'row_duals': np.array([r.dual_value() for r in rows]),
+        'reduced_costs': np.array([v.reduced_cost() for v in xs]),
+    }
+
+
+_SOLVERS = {'cbc': _solve_cbc, 'highs': _solve_highs, 'scipy': _solve_scipy, 'glop': _solve_glop}
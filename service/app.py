@@ -0,0 +1,176 @@
+"""
+Local HTTP service for optimizer jobs and scenario explanations.
+
+One warm process serves several planners: optimizer runs are queued as async jobs on a
+bounded pool of worker processes (service/jobs.py), and explanation queries run against
+scenario data kept in memory (service/store.py) instead of re-reading the JSON files.
+
+Run from the repository root:
+    uvicorn service.app:app --port 8000
+
+    curl -X POST localhost:8000/jobs -H 'Content-Type: application/json' \\
+         -d '{"solver": "highs", "params": {"mfg_capacity": 3000}}'
+    curl localhost:8000/jobs/<job_id>
+    curl -X POST localhost:8000/explain -H 'Content-Type: application/json' \\
+         -d '{"prompt": "Why was T001 recommended?", "scenario": "<job_id>"}'
+    curl localhost:8000/metrics
+
+Configuration (environment variables):
+    SERVICE_WORKERS            optimizer worker processes (default 2)
+    SERVICE_MAX_PENDING        queued jobs before POST /jobs answers 429 (default 100)
+    SERVICE_JOBS_DIR           job output root (default service/jobs)
+    SERVICE_MAX_FINISHED_JOBS  finished jobs kept in /jobs (default 1000)
+    SERVICE_FINISHED_JOB_TTL   seconds a finished job stays in /jobs (default 86400); its
+                               scenario stays available to /explain
+
+Scenario "sample" is nlp/sample_inputs; every finished job is added as scenario <job_id>.
+"""
+
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, field_validator
+
+from optimization.optimization import SOLVER_CHOICES
+from optimization.outputs import FORMATS
+from service.jobs import JobQueue, QueueFull
+from service.store import ScenarioStore, explain_turn
+from telemetry.metrics import count, registry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BASE_DIR)
+SAMPLE_SCENARIO = "sample"
+SAMPLE_DATA_DIR = os.path.join(REPO_DIR, "nlp", "sample_inputs")
+
+WORKERS = int(os.environ.get("SERVICE_WORKERS", 2))
+MAX_PENDING = int(os.environ.get("SERVICE_MAX_PENDING", 100))
+JOBS_DIR = os.environ.get("SERVICE_JOBS_DIR", os.path.join(BASE_DIR, "jobs"))
+MAX_FINISHED_JOBS = int(os.environ.get("SERVICE_MAX_FINISHED_JOBS", 1000))
+FINISHED_JOB_TTL = float(os.environ.get("SERVICE_FINISHED_JOB_TTL", 86400))
+
+
+class ScenarioParams(BaseModel):
+    """Overrides of optimization.DEFAULT_PARAMS; unset fields keep the defaults."""
+
+    mfg_base: Optional[float] = None
+    holding_cost: Optional[float] = None
+    transport_scale: Optional[float] = None
+    mfg_capacity: Optional[float] = None
+    z: Optional[float] = None
+
+
+class OptimizeRequest(BaseModel):
+    solver: str = "highs"
+    time_limit: float = Field(300, gt=0)
+    params: ScenarioParams = ScenarioParams()
+    output_format: str = "csv"
+    compression: Optional[str] = None
+
+    @field_validator("solver")
+    @classmethod
+    def _known_solver(cls, value):
+        if value not in SOLVER_CHOICES:
+            raise ValueError(f"expected one of {SOLVER_CHOICES}")
+        return value
+
+    @field_validator("output_format")
+    @classmethod
+    def _known_format(cls, value):
+        if value not in FORMATS:
+            raise ValueError(f"expected one of {FORMATS}")
+        return value
+
+
+class ExplainRequest(BaseModel):
+    prompt: str = Field(min_length=1)
+    scenario: str = SAMPLE_SCENARIO
+    refine: bool = True
+
+
+store = ScenarioStore()
+store.register(SAMPLE_SCENARIO, SAMPLE_DATA_DIR)
+
+
+def _register_job_scenario(job):
+    store.register(job["job_id"], os.path.join(queue.job_dir(job["job_id"]), "json"))
+
+
+queue = JobQueue(JOBS_DIR, workers=WORKERS, max_pending=MAX_PENDING, on_done=_register_job_scenario,
+                 max_finished=MAX_FINISHED_JOBS, finished_ttl=FINISHED_JOB_TTL)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    await queue.start()
+    try:
+        yield
+    finally:
+        await queue.stop()
+
+
+app = FastAPI(title="Supply Chain Optimization Service", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_latency(request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    registry.observe("service_request_seconds", time.perf_counter() - start, method=request.method, path=path)
+    count("service_requests_total", method=request.method, path=path, status=response.status_code)
+    return response
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "workers": queue.workers, "pending": queue.pending}
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: OptimizeRequest):
+    options = request.model_dump()
+    options["params"] = request.params.model_dump(exclude_none=True)
+    try:
+        job = queue.submit(options)
+    except QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    return job
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return sorted(queue.jobs.values(), key=lambda job: job["submitted_at"], reverse=True)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    if job_id not in queue.jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return queue.jobs[job_id]
+
+
+@app.get("/scenarios")
+async def list_scenarios():
+    return store.names()
+
+
+@app.post("/explain")
+async def explain(request: ExplainRequest):
+    try:
+        data_dir = store.data_dir(request.scenario)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown scenario {request.scenario}")
+    # Classification and refinement block on Ollama; keep them off the event loop
+    return await run_in_threadpool(explain_turn, request.prompt, data_dir, store, request.refine)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return registry.prometheus_text()
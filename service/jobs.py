@@ -0,0 +1,162 @@
+"""
+Async job queue for optimizer runs.
+
+Submitted jobs wait in an asyncio.Queue and are taken by ``workers`` consumer tasks, each
+handing one job at a time to a ProcessPoolExecutor of the same size, so at most
+``workers`` solves run at once and at most ``max_pending`` jobs wait. Worker processes
+load the inputs and build the sparse model structure once at start-up (``_init_worker``);
+a job then only rebuilds the lookups for its parameters, solves and writes.
+
+Every job writes to its own directory:
+
+    <jobs_dir>/<job_id>/csv/    decision tables and sensitivity report
+    <jobs_dir>/<job_id>/json/   NLP JSON files, served as scenario <job_id> by /explain
+
+Finished jobs stay listed until there are more than ``max_finished`` of them or they are
+older than ``finished_ttl`` seconds; the oldest are then dropped from ``jobs``. Their
+output directories, and the scenarios registered from them, are kept.
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from optimization.lp_model import build_structure, structure_lp
+from optimization.optimization import (
+    FORECAST_PATH, INPUT_DIR, build_lookups, load_inputs, optimize, prepare_demand,
+)
+from telemetry.metrics import count, gauge, registry
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_worker_inputs = None
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when ``max_pending`` jobs are already waiting."""
+
+
+def _init_worker(forecast_path, input_dir):
+    global _worker_inputs
+    forecast, historical, store_params, transport_matrix = load_inputs(forecast_path, input_dir)
+    demand_df = prepare_demand(forecast, historical, store_params)
+    structure = build_structure(demand_df, store_params, transport_matrix)
+    _worker_inputs = demand_df, store_params, transport_matrix, structure
+
+
+def run_job(job_dir, options):
+    """Worker-process entry point: solve one parameter set and write its outputs."""
+    demand_df, store_params, transport_matrix, structure = _worker_inputs
+    lookups = build_lookups(demand_df, store_params, transport_matrix, options["params"])
+    lp = structure_lp(structure, lookups["params"])
+    with contextlib.redirect_stdout(None):
+        result = optimize(lookups, structure, lp, options["solver"], options["time_limit"],
+                          os.path.join(job_dir, "csv"), os.path.join(job_dir, "json"),
+                          options["output_format"], options["compression"])
+    summary = {"status": result["status"], "solve_seconds": round(result["solve_seconds"], 3)}
+    if result["x"] is not None:
+        summary["costs"] = {name: round(value, 2) for name, value in result["costs"].items()}
+    return summary
+
+
+class JobQueue:
+    """Bounded queue of optimizer jobs served by a pool of warm worker processes."""
+
+    def __init__(self, jobs_dir: str, workers: int = 2, max_pending: int = 100,
+                 forecast_path: str = FORECAST_PATH, input_dir: str = INPUT_DIR, on_done=None,
+                 max_finished: int = 1000, finished_ttl: float = None):
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.jobs = {}
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl  # seconds; None keeps finished jobs until max_finished
+        self._finished = deque()  # finished job IDs, oldest first
+        self.on_done = on_done  # called with the job dict once a job has a solution
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._initargs = (forecast_path, input_dir)
+        self._pool = None
+        self._consumers = []
+
+    async def start(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=self._initargs)
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, options: dict) -> dict:
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "job_id": job_id,
+            "status": QUEUED,
+            "options": options,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            count("service_jobs_rejected_total")
+            raise QueueFull(f"{self._queue.maxsize} jobs already pending")
+        self.evict_finished()
+        self.jobs[job_id] = job
+        gauge("service_jobs_pending", self._queue.qsize())
+        return job
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def evict_finished(self, now: float = None) -> int:
+        """Drop the oldest finished jobs past ``max_finished`` or ``finished_ttl``; returns how many."""
+        now = time.time() if now is None else now
+        evicted = 0
+        while self._finished and (
+                len(self._finished) > self.max_finished
+                or self.finished_ttl is not None
+                and now - self.jobs[self._finished[0]]["finished_at"] > self.finished_ttl):
+            del self.jobs[self._finished.popleft()]
+            evicted += 1
+        if evicted:
+            count("service_jobs_evicted_total", evicted)
+        return evicted
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self.jobs[await self._queue.get()]
+            gauge("service_jobs_pending", self._queue.qsize())
+            job["status"], job["started_at"] = RUNNING, time.time()
+            try:
+                job["result"] = await loop.run_in_executor(
+                    self._pool, run_job, self.job_dir(job["job_id"]), job["options"])
+                if "costs" in job["result"]:
+                    job["status"] = DONE
+                else:
+                    job["status"], job["error"] = FAILED, f"No solution: {job['result']['status']}"
+            except Exception as exc:
+                job["status"], job["error"] = FAILED, f"{type(exc).__name__}: {exc}"
+            finally:
+                job["finished_at"] = time.time()
+                self._finished.append(job["job_id"])
+                self.evict_finished()
+                self._queue.task_done()
+            registry.observe("service_job_seconds", job["finished_at"] - job["started_at"])
+            count("service_jobs_total", status=job["status"])
+            if job["status"] == DONE and self.on_done is not None:
+                self.on_done(job)
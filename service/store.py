@@ -0,0 +1,80 @@
+"""
+In-memory scenario store and the explanation path used by the service.
+
+Scenario data stays loaded per directory and is re-read only when the file fingerprint
+(nlp.cache.data_version) changes, so an explanation request never pays for the JSON
+loads of an unchanged scenario.
+"""
+
+import threading
+
+from nlp.cache import data_version
+from nlp.pipeline import TurnPipeline, load_scenario_data, scenario_paths
+from nlp.refiner import refine_explanation
+from telemetry.metrics import count, stage
+
+# Tabular answers are returned as built; refining them invites hallucinated numbers
+NO_REFINE_INTENTS = ("list_entities", "total_counts")
+EMPTY_STATE_PREFIXES = ("No transfers match", "No manufacturing actions match")
+
+
+class ScenarioStore:
+    """Named scenario directories and their loaded data."""
+
+    def __init__(self):
+        self._dirs = {}
+        self._loaded = {}  # data_dir -> (version, data)
+        self._lock = threading.Lock()
+
+    def register(self, name: str, data_dir: str) -> None:
+        with self._lock:
+            self._dirs[name] = data_dir
+
+    def names(self) -> list[str]:
+        return sorted(self._dirs)
+
+    def data_dir(self, name: str) -> str:
+        """Directory of scenario ``name``; KeyError when it is not registered."""
+        return self._dirs[name]
+
+    def load(self, data_dir: str) -> dict:
+        version = data_version(scenario_paths(data_dir))
+        with self._lock:
+            cached = self._loaded.get(data_dir)
+        if cached is not None and cached[0] == version:
+            count("service_scenario_loads_total", result="cached")
+            return cached[1]
+        data = load_scenario_data(data_dir)
+        with self._lock:
+            self._loaded[data_dir] = (version, data)
+        count("service_scenario_loads_total", result="loaded")
+        return data
+
+
+def explain_turn(prompt: str, data_dir: str, store: ScenarioStore, refine: bool = True) -> dict:
+    """Classify ``prompt`` and explain it against ``data_dir``; returns the answer and stage timings."""
+    timings = {}
+    with stage("classify", prefix="service") as classify_timer:
+        pipeline = TurnPipeline(prompt, data_dir, loader=store.load)
+        intent, tier = pipeline.intent()
+    timings["classify"] = classify_timer.elapsed
+    response = {"intent": intent, "intent_tier": tier, "params": pipeline.params,
+                "explanation": None, "refined": False, "timings": timings}
+    if intent in ("greeting", "out_of_scope"):
+        return response
+
+    with stage("build", prefix="service") as build_timer:
+        explanation = pipeline.explanation(intent)
+    timings["build"] = build_timer.elapsed
+    response["explanation"] = explanation
+
+    if refine and intent not in NO_REFINE_INTENTS and not explanation.startswith(EMPTY_STATE_PREFIXES):
+        with stage("refine", prefix="service") as refine_timer:
+            try:
+                response["explanation"] = refine_explanation(explanation, user_question=prompt)
+                response["refined"] = True
+            except Exception:
+                # Ollama down or slow: the deterministic explanation is still a full answer
+                count("service_refine_fallbacks_total")
+        timings["refine"] = refine_timer.elapsed
+    return response
@@ -0,0 +1,183 @@
+"""Process-wide timers, counters and gauges shared by the pipeline stages.
+
+Usage:
+
+    from telemetry.metrics import count, gauge, stage, timer
+
+    with timer("optimizer_stage_seconds", stage="solve") as t:
+        ...
+    t.elapsed                          # seconds, also recorded in the registry
+    count("nlp_cache_lookups_total", cache="intent", result="hit")
+    gauge("optimizer_model_size", 1234, dimension="variables")
+    with stage("solve"):               # timer + optional profiler capture (see profiling.py)
+        ...
+
+Everything lands in the module-level ``registry``. Exports are opt-in through
+environment variables, so library code can record unconditionally:
+
+    TELEMETRY_JSONL   append every observation as one JSON line to this path
+    TELEMETRY_PROM    write a Prometheus text-format snapshot to this path at exit
+                      (or whenever ``export_configured`` is called)
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from telemetry import profiling
+
+JSONL_ENV = "TELEMETRY_JSONL"
+PROM_ENV = "TELEMETRY_PROM"
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and timer summaries (count, sum, max)."""
+
+    def __init__(self, jsonl_path: str = None):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.summaries = {}
+        self.jsonl_path = jsonl_path
+
+    def _emit(self, kind: str, name: str, labels: dict, value: float):
+        if not self.jsonl_path:
+            return
+        line = json.dumps({"ts": time.time(), "type": kind, "name": name, "labels": labels, "value": value})
+        with open(self.jsonl_path, "a") as f:
+            f.write(line + "\n")
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._emit("counter", name, labels, value)
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+            self._emit("gauge", name, labels, value)
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            n, total, peak = self.summaries.get(key, (0, 0.0, 0.0))
+            self.summaries[key] = (n + 1, total + seconds, max(peak, seconds))
+            self._emit("timer", name, labels, seconds)
+
+    def snapshot(self) -> dict:
+        """Plain-dict copy: {"counters": {...}, "gauges": {...}, "summaries": {...}} keyed by (name, labels)."""
+        with self._lock:
+            return {"counters": dict(self.counters), "gauges": dict(self.gauges),
+                    "summaries": dict(self.summaries)}
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.summaries.clear()
+
+    def prometheus_text(self) -> str:
+        snap = self.snapshot()
+        lines = []
+        typed = set()
+
+        def sample(name, labels, value):
+            rendered = ",".join(f'{k}="{str(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(snap["counters"].items()):
+            declare(name, "counter")
+            sample(name, labels, value)
+        for (name, labels), value in sorted(snap["gauges"].items()):
+            declare(name, "gauge")
+            sample(name, labels, value)
+        for (name, labels), (n, total, peak) in sorted(snap["summaries"].items()):
+            declare(name, "summary")
+            sample(f"{name}_count", labels, n)
+            sample(f"{name}_sum", labels, round(total, 6))
+            declare(f"{name}_max", "gauge")
+            sample(f"{name}_max", labels, round(peak, 6))
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the text exposition atomically, for node_exporter's textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+registry = MetricsRegistry(jsonl_path=os.environ.get(JSONL_ENV))
+
+
+class Timer:
+    """Context manager recording wall time into ``registry.observe``; ``elapsed`` is set on exit."""
+
+    def __init__(self, name: str, **labels):
+        self.name = name
+        self.labels = labels
+        self.elapsed = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        registry.observe(self.name, self.elapsed, **self.labels)
+        return False
+
+
+def timer(name: str, **labels) -> Timer:
+    return Timer(name, **labels)
+
+
+def count(name: str, value: float = 1, **labels):
+    registry.count(name, value, **labels)
+
+
+def gauge(name: str, value: float, **labels):
+    registry.gauge(name, value, **labels)
+
+
+class Stage(Timer):
+    """Timer named ``<prefix>_stage_seconds`` that also runs the configured profiler for ``name``."""
+
+    def __init__(self, name: str, prefix: str, **labels):
+        super().__init__(f"{prefix}_stage_seconds", stage=name, **labels)
+        self._profile = profiling.profile(f"{prefix}-{name}")
+
+    def __enter__(self):
+        self._profile.__enter__()
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        super().__exit__(*exc)
+        self._profile.__exit__(*exc)
+        return False
+
+
+def stage(name: str, prefix: str = "pipeline", **labels) -> Stage:
+    return Stage(name, prefix, **labels)
+
+
+def export_configured():
+    """Write the Prometheus snapshot if TELEMETRY_PROM is set; JSON lines are written as they happen."""
+    path = os.environ.get(PROM_ENV)
+    if path:
+        registry.write_prometheus(path)
+
+
+atexit.register(export_configured)
@@ -0,0 +1,89 @@
+"""Optional profiler capture around named stages.
+
+Off unless TELEMETRY_PROFILE lists the stage names to capture (comma separated,
+or ``all``):
+
+    TELEMETRY_PROFILE=optimizer-solve,optimizer-build  python -m optimization.optimization
+    TELEMETRY_PROFILER=pyspy TELEMETRY_PROFILE=all     python -m optimization.optimization
+
+TELEMETRY_PROFILER picks the backend: ``cprofile`` (default) dumps a .prof file
+readable with pstats/snakeviz; ``pyspy`` attaches ``py-spy record`` to this process
+and writes a flame graph .svg (py-spy must be on PATH and allowed to ptrace).
+Captures go to TELEMETRY_PROFILE_DIR (default ./profiles).
+"""
+
+import cProfile
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "TELEMETRY_PROFILE"
+PROFILER_ENV = "TELEMETRY_PROFILER"
+PROFILE_DIR_ENV = "TELEMETRY_PROFILE_DIR"
+
+
+def enabled_for(name: str) -> bool:
+    wanted = {s.strip() for s in os.environ.get(PROFILE_ENV, "").split(",") if s.strip()}
+    return "all" in wanted or name in wanted
+
+
+def _output_path(name: str, suffix: str) -> str:
+    out_dir = os.environ.get(PROFILE_DIR_ENV, "profiles")
+    os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.{suffix}")
+
+
+class Profile:
+    """Context manager; a no-op unless ``enabled_for(name)``."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.path = None
+        self._profiler = None
+        self._spy = None
+
+    def __enter__(self):
+        if not enabled_for(self.name):
+            return self
+        if os.environ.get(PROFILER_ENV, "cprofile") == "pyspy":
+            self._start_pyspy()
+        else:
+            self.path = _output_path(self.name, "prof")
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def _start_pyspy(self):
+        exe = shutil.which("py-spy")
+        if exe is None:
+            logger.warning("py-spy not found on PATH; stage %s not profiled", self.name)
+            return
+        self.path = _output_path(self.name, "svg")
+        self._spy = subprocess.Popen(
+            [exe, "record", "--pid", str(os.getpid()), "--output", self.path, "--format", "flamegraph"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def __exit__(self, *exc):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.path)
+            logger.info("cProfile for %s written to %s", self.name, self.path)
+        if self._spy is not None:
+            # py-spy writes its output when interrupted
+            self._spy.send_signal(signal.SIGINT)
+            try:
+                self._spy.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self._spy.kill()
+            logger.info("py-spy flame graph for %s written to %s", self.name, self.path)
+        return False
+
+
+def profile(name: str) -> Profile:
+    return Profile(name)
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.cube import DAY_COLUMNS, ForecastCube, is_current
+from optimization import optimization
+
+WIDE = pd.DataFrame({"store_id": [0, 0, 1, 2], "product_id": [4, 6, 4, 6],
+                     **{day: [1.5 + k, 2.0, 0.25 * k, 3.0] for k, day in enumerate(DAY_COLUMNS)}})
+
+
+@pytest.fixture
+def built(tmp_path):
+    """(wide CSV path, cube dir) with the cube built from the CSV."""
+    wide_path = tmp_path / "product_forecasts_wide.csv"
+    WIDE.to_csv(wide_path, index=False)
+    cube_dir = tmp_path / "forecast_cube"
+    ForecastCube.from_wide(pd.read_csv(wide_path)).save(str(cube_dir), source=str(wide_path))
+    return str(wide_path), str(cube_dir)
+
+
+def test_pair_frame_matches_the_wide_layout(built):
+    cube = ForecastCube.open(built[1])
+    frame = cube.pair_frame(total_days=7)
+    pd.testing.assert_frame_equal(frame.drop(columns="total"), cube.to_wide())
+    pd.testing.assert_frame_equal(frame.drop(columns="total"), WIDE, check_dtype=False)
+    np.testing.assert_allclose(frame["total"], WIDE[DAY_COLUMNS].sum(axis=1), rtol=1e-6)
+
+
+def test_cube_is_stale_once_its_source_changes(built, tmp_path):
+    wide_path, cube_dir = built
+    assert ForecastCube.open(cube_dir).source["file"] == "product_forecasts_wide.csv"
+    assert is_current(cube_dir, wide_path)
+
+    WIDE.assign(**{"day+1": 19.25}).to_csv(wide_path, index=False)
+    assert not is_current(cube_dir, wide_path)
+    # Without its source the cube is the only copy of the forecasts
+    os.remove(wide_path)
+    assert is_current(cube_dir, wide_path)
+
+
+def test_cube_without_recorded_source_is_stale(built):
+    wide_path, cube_dir = built
+    ForecastCube.from_wide(WIDE).save(cube_dir)
+    assert not is_current(cube_dir, wide_path)
+
+
+@pytest.fixture
+def inputs(built, tmp_path, monkeypatch):
+    wide_path, cube_dir = built
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    WIDE[["store_id", "product_id"]].assign(demand_std=1.0, city_id=0).to_csv(
+        input_dir / "processed_store_product_params.csv", index=False)
+    pd.DataFrame({"store_id": [0, 1, 2], "lead_time_days_mean": 2.0, "delay_probability_mean": 0.3,
+                  "shipping_costs_mean": 450.0}).to_csv(input_dir / "store_supply_params.csv", index=False)
+    pd.DataFrame(np.ones((3, 3))).to_csv(input_dir / "transport_cost_matrix.csv")
+    monkeypatch.setattr(optimization, "FORECAST_PATH", wide_path)
+    monkeypatch.setattr(optimization, "FORECAST_CUBE_DIR", cube_dir)
+    return wide_path, str(input_dir)
+
+
+def test_load_inputs_reads_a_current_cube(inputs, capsys):
+    wide_path, input_dir = inputs
+    forecast = optimization.load_inputs(wide_path, input_dir)[0]
+    assert "total_demand_7d" in forecast
+    assert "rebuild" not in capsys.readouterr().out
+
+    # Same demand table as from the CSV
+    historical, store_params = optimization.load_inputs(wide_path, input_dir)[1:3]
+    from_cube = optimization.prepare_demand(forecast, historical, store_params)
+    from_csv = optimization.prepare_demand(pd.read_csv(wide_path), historical, store_params)
+    pd.testing.assert_frame_equal(from_cube, from_csv[from_cube.columns], rtol=1e-6)
+
+
+def test_load_inputs_falls_back_to_the_csv_for_a_stale_cube(inputs, capsys):
+    wide_path, input_dir = inputs
+    changed = WIDE.assign(**{"day+1": 19.25})
+    changed.to_csv(wide_path, index=False)
+    forecast = optimization.load_inputs(wide_path, input_dir)[0]
+    assert "rebuild with: python -m forecasting.cube build" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(forecast, changed)
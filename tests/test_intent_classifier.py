@@ -0,0 +1,76 @@
+import pytest
+
+from nlp import intent_classifier
+from nlp.cache import intent_cache
+from nlp.intent_classifier import _local_is_confident, classify_intent_tiered, match_turn
+
+OFF_TOPIC = [
+    "what should I eat for dinner",
+    "I recommend a good movie",
+    "produce a poem about cats",
+    "is this discount account effective?",
+]
+
+CONFIDENT = {
+    "Why should I transfer product_892 from store_112?": "explain_transfer",
+    "Explain the transfer recommendations": "explain_transfer",
+    "How many transfers are there in total?": "total_counts",
+    "What was the cost impact?": "impact_analysis",
+    "What if capacity at store 347 went up by 100 units?": "sensitivity_analysis",
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_intent_cache():
+    intent_cache.clear()
+    yield
+    intent_cache.clear()
+
+
+def test_keywords_match_whole_words():
+    assert "total_counts" not in match_turn("is this discount account effective?")["scores"]
+    assert "total_counts" in match_turn("give me a count of transfers")["scores"]
+    # Inflections and ids glued with underscores still count
+    assert "explain_manufacturing" in match_turn("why was it manufactured")["scores"]
+    assert "explain_transfer" in match_turn("anything from store_12?")["scores"]
+
+
+@pytest.mark.parametrize("prompt", OFF_TOPIC)
+def test_single_weak_hits_are_not_confident(prompt):
+    assert not _local_is_confident(prompt)
+
+
+@pytest.mark.parametrize("prompt", OFF_TOPIC)
+def test_off_topic_prompts_go_to_the_llm(prompt, monkeypatch):
+    calls = []
+
+    def fake_llm(messages):
+        calls.append(messages)
+        return "out_of_scope"
+
+    monkeypatch.setattr(intent_classifier, "call_llm", fake_llm)
+    assert classify_intent_tiered(prompt) == ("out_of_scope", "llm")
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("prompt,intent", CONFIDENT.items())
+def test_clear_questions_skip_the_llm(prompt, intent, monkeypatch):
+    def fail(messages):
+        raise AssertionError("LLM called for a confident prompt")
+
+    monkeypatch.setattr(intent_classifier, "call_llm", fail)
+    assert classify_intent_tiered(prompt) == (intent, "local")
+
+
+def test_close_runner_up_goes_to_the_llm(monkeypatch):
+    monkeypatch.setattr(intent_classifier, "call_llm", lambda messages: "explain_manufacturing")
+    # One transfer keyword and one manufacturing keyword: no margin between them
+    assert classify_intent_tiered("transfer or produce?") == ("explain_manufacturing", "llm")
+
+
+def test_llm_failure_falls_back_to_keyword_label(monkeypatch):
+    def down(messages):
+        raise ConnectionError("ollama down")
+
+    monkeypatch.setattr(intent_classifier, "call_llm", down)
+    assert classify_intent_tiered("Give me the shadow prices") == ("sensitivity_analysis", "fallback")
@@ -0,0 +1,43 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from service import jobs
+from service.jobs import DONE, JobQueue
+from telemetry.metrics import registry
+
+OPTIONS = {"solver": "highs", "params": {}}
+
+
+def _run_jobs(queue, n_jobs):
+    """Submit ``n_jobs`` and wait for all of them; returns their IDs in submission order."""
+    async def run():
+        await queue.start()
+        try:
+            ids = [queue.submit(OPTIONS)["job_id"] for _ in range(n_jobs)]
+            await queue._queue.join()
+        finally:
+            await queue.stop()
+        return ids
+
+    return asyncio.run(run())
+
+
+def test_finished_jobs_are_evicted_past_the_limit_and_ttl(tmp_path, monkeypatch):
+    # Threads and a stub solve instead of warm worker processes
+    monkeypatch.setattr(jobs, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(jobs, "_init_worker", lambda *args: None)
+    monkeypatch.setattr(jobs, "run_job", lambda job_dir, options: {"status": "Optimal", "costs": {}})
+    registry.clear()
+    done = []
+    queue = JobQueue(str(tmp_path), workers=1, max_finished=2, finished_ttl=60, on_done=done.append)
+
+    ids = _run_jobs(queue, 4)
+    assert [job["job_id"] for job in done] == ids
+    assert all(job["status"] == DONE for job in done)
+    assert list(queue.jobs) == ids[2:]
+    assert registry.snapshot()["counters"][("service_jobs_evicted_total", ())] == 2
+
+    assert queue.evict_finished(now=time.time() + 30) == 0
+    assert queue.evict_finished(now=time.time() + 120) == 2
+    assert queue.jobs == {}
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from optimization.lp_model import build_structure, structure_lp
+from optimization.mip import solve_mip
+from optimization.optimization import build_lookups, optimize, prepare_demand
+
+pytest.importorskip('highspy')
+
+DAYS = [f'day+{d}' for d in range(1, 8)]
+
+
+@pytest.fixture
+def instance():
+    """Manufacturing capacity 3.5 binds at store 1, which needs 3 units of products 4 and 6.
+
+    Store 0 has 2.5 spare units of product 4 and no spare product 6, so the LP ships the
+    2.5 units and leaves the 0 -> 1 arc of product 6 without flow.
+    """
+    rows = [(0, 4, 0.0, 2.5), (0, 6, 10.0, 10.0), (1, 4, 3.0, 0.0), (1, 6, 3.0, 0.0)]
+    forecast = pd.DataFrame([{'store_id': s, 'product_id': p, **{d: demand / 7 for d in DAYS}}
+                             for s, p, demand, _ in rows])
+    historical = pd.DataFrame([{'store_id': s, 'product_id': p, 'demand_std': 0.0, 'city_id': 0,
+                                'current_inventory': stock} for s, p, _, stock in rows])
+    store_params = pd.DataFrame({'store_id': [0, 1], 'lead_time_days_mean': 2.0,
+                                 'delay_probability_mean': 0.1, 'shipping_costs_mean': 450.0})
+    transport = np.array([[0.0, 10.0], [10.0, 0.0]])
+    demand_df = prepare_demand(forecast, historical, store_params)
+    lookups = build_lookups(demand_df, store_params, transport, {'mfg_capacity': 3.5})
+    structure = build_structure(demand_df, store_params, transport)
+    return lookups, structure, structure_lp(structure, lookups['params'])
+
+
+def test_infeasible_reduced_model_is_retried_with_more_arcs(instance):
+    lookups, structure, _ = instance
+    result = solve_mip(structure, lookups['params'], lot_size=2, route_cost=25)
+    assert result['status'] == 'Optimal'
+    assert result['mip']['fix_tried'] == ['arcs', 'routes']
+    assert result['mip']['fix'] == 'routes'
+
+    # Two whole lots of 2: product 4 from the spare stock, product 6 made at store 0
+    t = result['x'][structure['n_pairs']:structure['n_pairs'] + structure['n_arcs']]
+    to_store_1 = structure['store_id'][structure['dst']] == 1
+    shipped = dict(zip(structure['product_id'][structure['src']][to_store_1], t[to_store_1]))
+    assert shipped == pytest.approx({4: 2.0, 6: 2.0})
+
+
+def test_lp_plan_is_written_when_no_whole_lot_plan_exists(instance, tmp_path):
+    lookups, structure, lp = instance
+    # Lots of 4: store 0 cannot ship product 4 and cannot make 4 units of product 6
+    result = optimize(lookups, structure, lp, backend='highs', csv_dir=str(tmp_path / 'csv'),
+                      json_dir=str(tmp_path / 'json'), mip={'lot_size': 4, 'time_limit': 30})
+    assert result['x'] is not None
+    assert result['costs']['total'] == pytest.approx(result['objective'])
+
+    with open(tmp_path / 'json' / 'scenario_summary.json') as f:
+        mip = json.load(f)['solver']['mip']
+    assert mip['status'] == 'Infeasible'
+    assert mip['fallback'] == 'highs'
+    assert mip['fix_tried'] == ['arcs', 'routes', 'none']
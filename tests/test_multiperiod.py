@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from optimization.lp_model import build_structure
+from optimization.multiperiod import DEFAULT_TRANSFER_LEAD_DAYS, solve_rolling_horizon, transfer_lead_days
+from optimization.optimization import prepare_demand
+
+DAYS = [f'day+{d}' for d in range(1, 8)]
+
+
+@pytest.fixture
+def instance():
+    """Store 0 holds surplus stock; stores 1 and 2 need it; store 3 has no supply params."""
+    stores, products = [0, 1, 2, 3], [4]
+    forecast = pd.DataFrame([{'store_id': s, 'product_id': p, **{d: 5.0 for d in DAYS}}
+                             for s in stores for p in products])
+    historical = forecast[['store_id', 'product_id']].assign(
+        demand_std=0.5, city_id=0, current_inventory=[400.0, 0.0, 0.0, 0.0])
+    store_params = pd.DataFrame({'store_id': [0, 1, 2], 'lead_time_days_mean': [1.0, 1.2, 2.0],
+                                 'delay_probability_mean': 0.1, 'shipping_costs_mean': 450.0})
+    transport = np.full((4, 4), 1.0)
+    demand_df = prepare_demand(forecast, historical, store_params)
+    return demand_df, store_params, transport
+
+
+def test_transfer_lead_is_the_destination_lead_rounded_up(instance):
+    demand_df, store_params, transport = instance
+    structure = build_structure(demand_df, store_params, transport)
+    lead = transfer_lead_days(structure, store_params)
+    to_store = structure['store_id'][structure['dst']]
+    assert dict(zip(to_store, lead)) == {0: 1, 1: 2, 2: 2, 3: DEFAULT_TRANSFER_LEAD_DAYS}
+    assert set(transfer_lead_days(structure, store_params, default=3)[to_store == 3]) == {3}
+
+
+def test_transfers_arrive_after_the_destination_lead(instance):
+    demand_df, store_params, transport = instance
+    result = solve_rolling_horizon(demand_df, store_params, transport, window=7, step=7,
+                                   params={'mfg_capacity': 0})
+    transfers = result['transfers']
+    assert not transfers.empty
+    lead = {0: 1, 1: 2, 2: 2, 3: DEFAULT_TRANSFER_LEAD_DAYS}
+    assert (transfers['arrive_day'] - transfers['ship_day'] == transfers['to_store'].map(lead)).all()
+    # Nothing shipped can arrive before day 3 at store 1, so its first two days go short
+    shortfall = result['inventory'].query('store_id == 1').set_index('day')['shortfall']
+    assert shortfall.loc[[1, 2]].sum() == pytest.approx(10.0)
+
+
+def test_fixed_transfer_lead_applies_to_every_arc(instance):
+    demand_df, store_params, transport = instance
+    result = solve_rolling_horizon(demand_df, store_params, transport, window=7, step=7,
+                                   params={'mfg_capacity': 0}, transfer_lead=1, mfg_lead=2)
+    assert set(result['transfer_lead']) == {1}
+    transfers = result['transfers']
+    assert (transfers['arrive_day'] - transfers['ship_day'] == 1).all()
+
+
+def test_default_window_fits_six_day_leads(instance):
+    demand_df, store_params, transport = instance
+    # The sample stores' ~5.2-day lead times: every arc takes 6 days
+    store_params = store_params.assign(lead_time_days_mean=5.2)
+    result = solve_rolling_horizon(demand_df.query('store_id < 3'), store_params, transport,
+                                   params={'mfg_capacity': 0})
+    assert set(result['transfer_lead']) == {6}
+    assert result['window'] == 7
+    transfers = result['transfers']
+    assert not transfers.empty
+    assert (transfers['arrive_day'] == transfers['ship_day'] + 6).all()
+    assert (transfers['ship_day'] == 1).all()
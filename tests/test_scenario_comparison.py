@@ -0,0 +1,81 @@
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+from nlp.explanation_engine import build_explanation
+from nlp.pipeline import OPTIMIZER_SCENARIO_FILES, load_comparison, load_scenario_data
+from optimization.optimization import DEFAULT_PARAMS, JSON_OUTPUT_DIR
+from optimization.scenarios import BASELINE_SCENARIO, run_scenarios, save_comparison
+
+
+def _row(scenario, total_cost, status="Optimal", **params):
+    row = {"scenario": scenario, **DEFAULT_PARAMS, **params, "status": status, "solver": "highs",
+           "solve_seconds": 0.5}
+    if total_cost is not None:
+        row.update({"total_cost": total_cost, "manufacturing_cost": total_cost * 0.8,
+                    "transfer_cost": total_cost * 0.1, "holding_cost_total": total_cost * 0.1,
+                    "manufacturing_units": 100.0, "transfer_units": 20.0, "total_transfers": 4})
+    return row
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """The optimizer's output-json files plus a comparison of three scenarios."""
+    for name in OPTIMIZER_SCENARIO_FILES.values():
+        shutil.copy(f"{JSON_OUTPUT_DIR}/{name}", tmp_path)
+    df = pd.DataFrame([
+        _row(BASELINE_SCENARIO, 1000.0),
+        _row("mfg_capacity=3000", 1100.0, mfg_capacity=3000),
+        _row("z=1.28", 900.0, z=1.28),
+        _row("mfg_capacity=10", None, status="Infeasible", mfg_capacity=10),
+    ]).set_index("scenario")
+    df["cost_change"] = df["total_cost"] - 1000.0
+    df["cost_change_pct"] = df["cost_change"] / 1000.0
+    save_comparison(df, csv_dir=str(tmp_path), json_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+def test_baseline_name_is_reserved():
+    with pytest.raises(ValueError, match="reserved"):
+        run_scenarios(None, {BASELINE_SCENARIO: {"z": 2.05}})
+
+
+def test_comparison_is_loaded_with_the_scenario(data_dir):
+    comparison = load_scenario_data(data_dir)["comparison"]
+    assert comparison["baseline_scenario"] == BASELINE_SCENARIO
+    assert [run["scenario"] for run in comparison["scenarios"]] == [
+        BASELINE_SCENARIO, "mfg_capacity=3000", "z=1.28", "mfg_capacity=10"]
+
+
+def test_shipped_optimizer_output_matches_the_schemas(caplog):
+    data = load_scenario_data(JSON_OUTPUT_DIR)
+    assert data["transfers"]["transfers"]
+    assert "failed schema validation" not in caplog.text
+
+
+def test_invalid_comparison_is_ignored(tmp_path, caplog):
+    path = tmp_path / "scenario_comparison.json"
+    path.write_text(json.dumps({"scenarios": [{"scenario": "x"}]}))
+    assert load_comparison(str(path)) == {}
+    assert "failed schema validation" in caplog.text
+    assert load_comparison(str(tmp_path / "missing.json")) == {}
+
+
+@pytest.mark.parametrize("intent", ["scenario_summary", "impact_analysis"])
+def test_summary_answers_from_the_comparison(data_dir, intent):
+    text = build_explanation(intent, load_scenario_data(data_dir))
+    assert "**What-if scenarios:** 3 compared against baseline" in text
+    assert "Baseline total cost: **$1,000**" in text
+    assert "Cheapest alternative: **z=1.28** at $900 (-$100 vs baseline)" in text
+    # Cheapest first; unsolved runs are listed apart
+    assert text.index("| z=1.28 |") < text.index("| baseline |") < text.index("| mfg_capacity=3000 |")
+    assert "| mfg_capacity=3000 | $1,100 | +$100 (+10.0%) | 4 | 100 |" in text
+    assert "**Not solved:** mfg_capacity=10 (Infeasible)" in text
+
+
+def test_summary_without_comparison_is_unchanged(data_dir):
+    data = load_scenario_data(data_dir)
+    data["comparison"] = {}
+    assert "What-if" not in build_explanation("scenario_summary", data)
@@ -0,0 +1,166 @@
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # TestClient's transport
+
+from fastapi.testclient import TestClient
+
+from benchmark.ollama_mock import MockOllama
+from nlp.cache import intent_cache, refine_cache
+from service import app as service_app
+from service.jobs import DONE, FAILED, JobQueue
+from telemetry.metrics import registry
+
+# One weak keyword hit: classified by the model, with explain_transfer as the local guess
+LLM_PROMPT = "Tell me about the transfers"
+JOB_TIMEOUT = 120
+
+
+def _write_inputs(tmp_path):
+    """Three stores, two products: enough for a real solve in a few seconds."""
+    stores, products = range(3), (4, 6)
+    forecast = tmp_path / "product_forecasts_wide.csv"
+    forecast.write_text("store_id,product_id," + ",".join(f"day+{d}" for d in range(1, 8)) + "\n" + "".join(
+        f"{s},{p}," + ",".join(str(3.0 + s + d * 0.1) for d in range(7)) + "\n" for s in stores for p in products))
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "processed_store_product_params.csv").write_text(
+        "store_id,product_id,city_id,demand_std,current_inventory\n" + "".join(
+            f"{s},{p},0,1.5,{40.0 if s == 0 else 2.0}\n" for s in stores for p in products))
+    (input_dir / "store_supply_params.csv").write_text(
+        "store_id,shipping_costs_mean,lead_time_days_mean,delay_probability_mean\n" + "".join(
+            f"{s},450.0,{2.0 + s},0.3\n" for s in stores))
+    (input_dir / "transport_cost_matrix.csv").write_text(
+        "," + ",".join(map(str, stores)) + "\n" + "".join(
+            f"{i}," + ",".join(str(0.0 if i == j else 10.0 + i + j) for j in stores) + "\n" for i in stores))
+    return str(forecast), str(input_dir)
+
+
+def _post_explain(client, prompt, **body):
+    response = client.post("/explain", json={"prompt": prompt, **body})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    intent_cache.clear()
+    refine_cache.clear()
+    registry.clear()
+    yield
+    intent_cache.clear()
+    refine_cache.clear()
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Start a MockOllama with the given options and point llm_client at it."""
+    servers = []
+
+    def start(**options):
+        mock = MockOllama(latency_ms=options.pop("latency_ms", 5.0), **options).start()
+        servers.append(mock)
+        monkeypatch.setenv("OLLAMA_HOST", mock.url)
+        return mock
+
+    yield start
+    for mock in servers:
+        mock.stop()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    forecast_path, input_dir = _write_inputs(tmp_path)
+    jobs_dir = str(tmp_path / "jobs")
+    queue = JobQueue(jobs_dir, workers=1, max_pending=4, forecast_path=forecast_path, input_dir=input_dir,
+                     on_done=service_app._register_job_scenario)
+    monkeypatch.setattr(service_app, "JOBS_DIR", jobs_dir)
+    monkeypatch.setattr(service_app, "queue", queue)
+    with TestClient(service_app.app) as test_client:
+        yield test_client
+
+
+def test_job_runs_to_done_and_becomes_a_scenario(client, ollama):
+    ollama()
+    response = client.post("/jobs", json={"solver": "highs", "time_limit": 60, "params": {"mfg_capacity": 500}})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    assert job["options"]["params"] == {"mfg_capacity": 500}
+
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while job["status"] not in (DONE, FAILED) and time.monotonic() < deadline:
+        time.sleep(0.2)
+        job = client.get(f"/jobs/{job['job_id']}").json()
+    assert job["status"] == DONE, job["error"]
+    assert job["finished_at"] >= job["started_at"] >= job["submitted_at"]
+    assert job["result"]["costs"]
+    assert [listed["job_id"] for listed in client.get("/jobs").json()] == [job["job_id"]]
+
+    # The finished job is served as its own scenario
+    assert job["job_id"] in client.get("/scenarios").json()
+    answer = _post_explain(client, "How many transfers are there in total?", scenario=job["job_id"])
+    assert answer["intent"] == "total_counts"
+    assert answer["explanation"]
+
+
+def test_unknown_job_and_invalid_solver(client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.post("/jobs", json={"solver": "simplex"}).status_code == 422
+    assert client.post("/explain", json={"prompt": "hi", "scenario": "nope"}).status_code == 404
+
+
+def test_explain_repeats_are_served_from_the_caches(client, ollama):
+    mock = ollama()
+    first = _post_explain(client, LLM_PROMPT)
+    assert (first["intent"], first["intent_tier"]) == ("explain_transfer", "llm")
+    assert first["refined"]
+    chat_requests = mock.stats["chat"]
+
+    second = _post_explain(client, LLM_PROMPT)
+    assert second["intent_tier"] == "cache"
+    assert second["explanation"] == first["explanation"]
+    assert mock.stats["chat"] == chat_requests
+    assert intent_cache.hits == 1
+    assert refine_cache.hits == 1
+
+
+@pytest.mark.parametrize("fault", [{"error_rate": 1.0}, {"hang_rate": 1.0, "hang_seconds": 3.0}],
+                         ids=["errors", "hangs"])
+def test_explain_falls_back_when_the_model_fails(client, ollama, monkeypatch, fault):
+    monkeypatch.setenv("OLLAMA_TIMEOUT", "0.5")
+    mock = ollama(**fault)
+    start = time.perf_counter()
+    answer = _post_explain(client, LLM_PROMPT)
+    assert time.perf_counter() - start < 5
+
+    # The keyword guess and the deterministic explanation stand in for the model's answers
+    assert (answer["intent"], answer["intent_tier"]) == ("explain_transfer", "fallback")
+    assert answer["explanation"]
+    assert not answer["refined"]
+    assert "refine" in answer["timings"]
+    assert mock.stats["chat"] == 2
+    counters = registry.snapshot()["counters"]
+    assert counters[("service_refine_fallbacks_total", ())] == 1
+    assert counters[("llm_errors_total", (("endpoint", "chat"),))] == 2
+
+
+def test_requests_record_latency_per_route(client, ollama):
+    ollama()
+    _post_explain(client, "hello")
+    _post_explain(client, "hello")
+    client.get("/jobs/nope")
+
+    summaries = registry.snapshot()["summaries"]
+    n, total, peak = summaries[("service_request_seconds", (("method", "POST"), ("path", "/explain")))]
+    assert n == 2
+    assert 0 < peak <= total
+    # Routes are labelled by their template, not the concrete path
+    assert summaries[("service_request_seconds", (("method", "GET"), ("path", "/jobs/{job_id}")))][0] == 1
+
+    text = client.get("/metrics").text
+    assert 'service_request_seconds_count{method="POST",path="/explain"} 2' in text
+    assert 'service_requests_total{method="GET",path="/jobs/{job_id}",status="404"} 1' in text
+    assert 'service_stage_seconds_count{stage="classify"} 2' in text